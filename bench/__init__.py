@@ -0,0 +1,8 @@
+"""
+Benchmark do CRM: gerador de dados sintéticos e cenários cronometrados.
+
+Uso típico:
+    python -m bench gerar --escala 100k
+    python -m bench executar --db bench/dados/crm_100k.db
+    python -m bench comparar bench/resultados/antes.json bench/resultados/depois.json
+"""
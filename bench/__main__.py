@@ -0,0 +1,92 @@
+"""
+Linha de comando do benchmark.
+
+    python -m bench gerar --escala 100k [--saida bench/dados/crm_100k.db] [--semente 42]
+    python -m bench executar --db bench/dados/crm_100k.db [--cenario NOME ...] [--repeticoes N] [--saida arquivo.json]
+    python -m bench comparar base.json atual.json [--tolerancia 10]
+    python -m bench importacao [--repeticoes 5] [--orcamento-abertura MS] [--orcamento-janela MS]
+"""
+import argparse
+import os
+import sys
+
+
+def _raiz():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark do CRM")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_gerar = sub.add_parser("gerar", help="gerar banco sintético")
+    p_gerar.add_argument("--escala", default="10k", help="linhas de itens_cotacao (1k, 10k, 100k, 1m ou número)")
+    p_gerar.add_argument("--saida", help="caminho do banco (padrão: bench/dados/crm_<escala>.db)")
+    p_gerar.add_argument("--semente", type=int, default=42)
+
+    p_exec = sub.add_parser("executar", help="executar cenários")
+    p_exec.add_argument("--db", required=True, help="banco gerado com 'gerar'")
+    p_exec.add_argument("--cenario", action="append", help="executar apenas este cenário (repetível)")
+    p_exec.add_argument("--repeticoes", type=int)
+    p_exec.add_argument("--semente", type=int, default=42)
+    p_exec.add_argument("--saida", help="arquivo JSON de resultados (padrão: bench/resultados/)")
+
+    p_comp = sub.add_parser("comparar", help="comparar dois resultados")
+    p_comp.add_argument("base")
+    p_comp.add_argument("atual")
+    p_comp.add_argument("--tolerancia", type=float, default=10.0, help="piora máxima aceita (%%)")
+
+    p_imp = sub.add_parser("importacao", help="verificar o orçamento de importação da abertura")
+    p_imp.add_argument("--repeticoes", type=int, default=5)
+    p_imp.add_argument("--orcamento-abertura", type=float, help="ms até a tela de login")
+    p_imp.add_argument("--orcamento-janela", type=float, help="ms para abrir a janela principal")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "executar":
+        # O banco precisa ser definido antes de importar os módulos do sistema
+        os.environ["CRM_DB"] = os.path.abspath(args.db)
+    sys.path.insert(0, _raiz())
+
+    if args.comando == "importacao":
+        from .importacao import executar
+        return executar(args.repeticoes, {"abertura": args.orcamento_abertura,
+                                          "janela": args.orcamento_janela})
+
+    if args.comando == "gerar":
+        from .gerador import gerar_banco
+        saida = args.saida or os.path.join(_raiz(), "bench", "dados", f"crm_{args.escala.lower()}.db")
+        print(f"Gerando {saida} (escala {args.escala}, semente {args.semente})...")
+        linhas = gerar_banco(saida, args.escala, args.semente)
+        print("✅ Banco gerado:", ", ".join(f"{t}={n}" for t, n in linhas.items()))
+        return 0
+
+    if args.comando == "executar":
+        from .cenarios import CENARIOS
+        from .executor import executar_cenarios, salvar
+        desconhecidos = [c for c in args.cenario or [] if c not in CENARIOS]
+        if desconhecidos:
+            parser.error(f"cenário(s) desconhecido(s): {', '.join(desconhecidos)}. "
+                         f"Disponíveis: {', '.join(CENARIOS)}")
+        if not os.path.exists(args.db):
+            parser.error(f"banco não encontrado: {args.db}")
+        resultados = executar_cenarios(args.db, args.cenario, args.repeticoes, args.semente)
+        caminho = salvar(resultados, args.saida)
+        print(f"✅ Resultados gravados em {caminho}")
+        return 1 if any(r["status"] == "erro" for r in resultados["cenarios"].values()) else 0
+
+    from .executor import carregar, comparar
+    linhas = comparar(carregar(args.base), carregar(args.atual), args.tolerancia)
+    regressoes = 0
+    for nome, antes, depois, variacao, regressao in linhas:
+        marca = "❌" if regressao else ("✅" if variacao < -args.tolerancia else "  ")
+        print(f"{marca} {nome:<26} {antes:>10.1f} ms -> {depois:>10.1f} ms  ({variacao:+.1f}%)")
+        regressoes += regressao
+    if regressoes:
+        print(f"\n{regressoes} cenário(s) piorou(aram) mais de {args.tolerancia:.0f}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
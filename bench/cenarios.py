@@ -0,0 +1,226 @@
+"""
+Cenários de benchmark: os caminhos críticos reais do sistema.
+
+Cada cenário recebe o contexto da execução e devolve uma função sem
+argumentos que executa uma iteração. Os identificadores usados (cotações,
+relatórios) são sorteados com semente fixa para que execuções sobre o
+mesmo banco façam exatamente o mesmo trabalho.
+"""
+import random
+
+
+class CenarioIgnorado(Exception):
+    """Cenário não pode ser executado neste ambiente (ex.: sem fpdf ou sem display)"""
+
+
+class Contexto:
+    """Estado compartilhado entre os cenários de uma execução"""
+
+    def __init__(self, db_name, semente=42):
+        self.db_name = db_name
+        self.rnd = random.Random(semente)
+        self._root = None
+        self._ids = {}
+
+    def ids(self, tabela, quantidade=50):
+        """Amostra fixa de ids da tabela"""
+        if tabela not in self._ids:
+            from db import get_connection
+            ids = [row[0] for row in get_connection(self.db_name).execute(f"SELECT id FROM {tabela}")]
+            if not ids:
+                raise CenarioIgnorado(f"Tabela {tabela} vazia")
+            self._ids[tabela] = self.rnd.sample(ids, min(quantidade, len(ids)))
+        return self._ids[tabela]
+
+    def usuario_admin(self):
+        from db import get_connection
+        row = get_connection(self.db_name).execute(
+            "SELECT id FROM usuarios WHERE username = 'admin'").fetchone()
+        return row[0] if row else 1
+
+    def root(self):
+        """Janela Tk oculta para os cenários de interface"""
+        if self._root is None:
+            import tkinter as tk
+            try:
+                self._root = tk.Tk()
+            except tk.TclError as e:
+                raise CenarioIgnorado(f"Tkinter indisponível: {e}")
+            self._root.withdraw()
+        return self._root
+
+    def modulo(self, classe):
+        """Instanciar um módulo da interface em um frame oculto"""
+        import tkinter as tk
+        frame = tk.Frame(self.root())
+        return classe(frame, self.usuario_admin(), "Admin", _JanelaPrincipal())
+
+    def encerrar(self):
+        if self._root is not None:
+            self._root.destroy()
+            self._root = None
+
+
+class _JanelaPrincipal:
+    """Substituto mínimo da MainWindow (os módulos só a usam para eventos)"""
+
+
+def _importar(modulo, nome):
+    """Importar um objeto do sistema; dependências ausentes ignoram o cenário"""
+    import importlib
+    try:
+        return getattr(importlib.import_module(modulo), nome)
+    except ImportError as e:
+        raise CenarioIgnorado(f"Dependência ausente: {e}")
+
+
+def _ciclo(valores):
+    estado = {"i": 0}
+
+    def proximo():
+        valor = valores[estado["i"] % len(valores)]
+        estado["i"] += 1
+        return valor
+    return proximo
+
+
+def pdf_cotacao(ctx):
+    gerar_pdf_cotacao_nova = _importar("pdf_generators.cotacao_nova", "gerar_pdf_cotacao_nova")
+    proximo = _ciclo(ctx.ids("cotacoes", 10))
+
+    def executar():
+        # Sem o cache de PDFs: o cenário mede a geração do documento
+        ok, resultado = gerar_pdf_cotacao_nova(proximo(), ctx.db_name, usar_cache=False)
+        if not ok:
+            raise RuntimeError(resultado)
+    return executar
+
+
+def pdf_relatorio(ctx):
+    gerar_pdf_relatorio = _importar("pdf_generators.relatorio_tecnico", "gerar_pdf_relatorio")
+    proximo = _ciclo(ctx.ids("relatorios_tecnicos", 10))
+
+    def executar():
+        ok, resultado = gerar_pdf_relatorio(proximo(), ctx.db_name)
+        if not ok:
+            raise RuntimeError(resultado)
+    return executar
+
+
+def resolver_cotacao(ctx):
+    DynamicFieldResolver = _importar("utils.dynamic_field_resolver", "DynamicFieldResolver")
+    proximo = _ciclo(ctx.ids("cotacoes"))
+
+    def executar():
+        resolver = DynamicFieldResolver(ctx.db_name)
+        if not resolver.load_cotacao_data(proximo()):
+            raise RuntimeError("Cotação não carregada")
+    return executar
+
+
+def dashboard(ctx):
+    modulo = ctx.modulo(_importar("interface.modules.dashboard", "DashboardModule"))
+
+    def executar():
+        modulo.load_dashboard_data()
+        modulo.frame.update_idletasks()
+    return executar
+
+
+def carregar_clientes(ctx):
+    modulo = ctx.modulo(_importar("interface.modules.clientes", "ClientesModule"))
+
+    def executar():
+        modulo.carregar_clientes()
+        modulo.frame.update_idletasks()
+    return executar
+
+
+def buscar_cotacoes(ctx):
+    modulo = ctx.modulo(_importar("interface.modules.cotacoes", "CotacoesModule"))
+    termos = _ciclo(["", "PROP-1", "Metalúrgica", "Silva"])
+
+    def executar():
+        modulo.search_var.set(termos())
+        modulo.buscar_cotacoes()
+        modulo.frame.update_idletasks()
+    return executar
+
+
+def rolar_cotacoes(ctx):
+    modulo = ctx.modulo(_importar("interface.modules.cotacoes", "CotacoesModule"))
+    lista = modulo.cotacoes_lista
+    posicoes = _ciclo([ctx.rnd.randrange(max(1, lista.total())) for _ in range(50)])
+
+    def executar():
+        # Saltos pela barra de rolagem: o redesenho não deve depender do tamanho da lista
+        lista.ir_para(posicoes())
+        modulo.frame.update_idletasks()
+    return executar
+
+
+def _textos_pdf():
+    """Textos típicos de um PDF de cotação/relatório (com as repetições de um documento)"""
+    unicos = [
+        "Filtro de ar", "Válvula de admissão", "Separador ar/óleo", "Óleo lubrificante 20 L",
+        "Mão de obra técnica", "Deslocamento", "Kit revisão 4.000 h", "Compressor parafuso GA 37",
+        "R$ 1.234,56", "R$ 98.765,43", "12/03/2024", "22.790.603/0001-77", "(11) 4543-6896",
+        "PROP-20240312-0001", "Quantidade: 2", "CIF", "FOB", "30/60/90 dias", "15 dias úteis",
+        "Metalúrgica São João Ltda.", "Indústria de Plásticos Ação", "A/C SR. JOSÉ CONCEIÇÃO",
+        "Temperatura de descarga: 95°C", "Pressão máxima — 10 bar", "Garantia… consulte",
+        "• Troca do elemento separador\n• Limpeza do radiador\n• Verificação das correias",
+        "Serviço:\tRevisão geral\tPeças inclusas", "Marca® Modelo™ ©2024", "Preço em € e £",
+        "Condição encontrada: rotores com desgaste acentuado na região de vedação, folga axial "
+        "acima do especificado pelo fabricante e sinais de contaminação do óleo por água. "
+        "Recomenda-se a substituição dos rolamentos e retentores, limpeza da galeria hidráulica "
+        "e análise do óleo após 500 horas de operação.",
+    ]
+    return unicos * 20
+
+
+def clean_text_antigo(ctx):
+    from .texto_antigo import clean_text_cotacao, clean_text_relatorio
+    textos = _textos_pdf()
+
+    def executar():
+        for texto in textos:
+            clean_text_cotacao(texto)
+            clean_text_relatorio(texto)
+            clean_text_relatorio(texto, aggressive=True)
+    return executar
+
+
+def clean_text(ctx):
+    from utils import text_sanitize
+    from .texto_antigo import clean_text_cotacao, clean_text_relatorio
+    textos = _textos_pdf()
+
+    # O resultado precisa ser idêntico ao das implementações anteriores
+    for texto in set(textos):
+        if (text_sanitize.limpar_texto_cotacao(texto) != clean_text_cotacao(texto)
+                or text_sanitize.limpar_texto_relatorio(texto) != clean_text_relatorio(texto)
+                or text_sanitize.limpar_texto_relatorio(texto, True) != clean_text_relatorio(texto, True)):
+            raise RuntimeError(f"Resultado diferente da implementação anterior: {texto!r}")
+
+    def executar():
+        # Cada iteração equivale a um documento novo (memória vazia)
+        text_sanitize._traduzir_memo.cache_clear()
+        for texto in textos:
+            text_sanitize.limpar_texto_cotacao(texto)
+            text_sanitize.limpar_texto_relatorio(texto)
+            text_sanitize.limpar_texto_relatorio(texto, True)
+    return executar
+
+
+# nome -> (preparação, repetições padrão)
+CENARIOS = {
+    "gerar_pdf_cotacao_nova": (pdf_cotacao, 5),
+    "gerar_pdf_relatorio": (pdf_relatorio, 5),
+    "load_cotacao_data": (resolver_cotacao, 50),
+    "load_dashboard_data": (dashboard, 5),
+    "carregar_clientes": (carregar_clientes, 5),
+    "buscar_cotacoes": (buscar_cotacoes, 8),
+    "rolar_cotacoes": (rolar_cotacoes, 50),
+    "clean_text_antigo": (clean_text_antigo, 200),
+    "clean_text": (clean_text, 200),
+}
@@ -0,0 +1,163 @@
+"""
+Execução dos cenários e comparação de resultados.
+
+Os resultados são gravados em JSON (um arquivo por execução) com os
+metadados necessários para comparar duas execuções: commit, versões do
+Python/SQLite e contagem de linhas do banco usado.
+"""
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+
+from .cenarios import CENARIOS, CenarioIgnorado, Contexto
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, "bench", "resultados")
+
+# Arquivos lidos por caminho relativo pelos geradores de PDF
+_ARQUIVOS_RELATIVOS = ("logo.jpg", "assets")
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+@contextmanager
+def diretorio_trabalho():
+    """Executar em diretório temporário para que os PDFs gerados não caiam em data/"""
+    anterior = os.getcwd()
+    trabalho = tempfile.mkdtemp(prefix="crm_bench_")
+    for nome in _ARQUIVOS_RELATIVOS:
+        try:
+            os.symlink(os.path.join(RAIZ, nome), os.path.join(trabalho, nome))
+        except OSError:
+            pass
+    os.chdir(trabalho)
+    try:
+        yield trabalho
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(trabalho, ignore_errors=True)
+
+
+def _estatisticas(tempos_ms):
+    ordenados = sorted(tempos_ms)
+    p95 = ordenados[min(len(ordenados) - 1, int(round(0.95 * (len(ordenados) - 1))))]
+    return {
+        "repeticoes": len(tempos_ms),
+        "min_ms": round(ordenados[0], 3),
+        "mediana_ms": round(statistics.median(ordenados), 3),
+        "media_ms": round(statistics.fmean(ordenados), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ordenados[-1], 3),
+    }
+
+
+def medir(executar, repeticoes, aquecimento=1):
+    """Tempos (ms) de `repeticoes` chamadas após `aquecimento` chamadas descartadas"""
+    for _ in range(aquecimento):
+        executar()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        executar()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def executar_cenarios(db_name, nomes=None, repeticoes=None, semente=42, progresso=print):
+    """Executar os cenários e retornar o dicionário de resultados"""
+    from .gerador import contar_linhas
+
+    db_name = os.path.abspath(db_name)
+    resultados = {
+        "meta": {
+            "commit": commit_atual(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "banco": os.path.basename(db_name),
+            "linhas": contar_linhas(db_name),
+            "semente": semente,
+        },
+        "cenarios": {},
+    }
+
+    ctx = Contexto(db_name, semente)
+    with diretorio_trabalho():
+        try:
+            for nome in nomes or CENARIOS:
+                preparar, repeticoes_padrao = CENARIOS[nome]
+                try:
+                    executar = preparar(ctx)
+                    tempos = medir(executar, repeticoes or repeticoes_padrao)
+                    resultado = {"status": "ok", **_estatisticas(tempos)}
+                    progresso(f"{nome}: mediana {resultado['mediana_ms']:.1f} ms "
+                              f"(p95 {resultado['p95_ms']:.1f} ms, n={resultado['repeticoes']})")
+                except CenarioIgnorado as e:
+                    resultado = {"status": "ignorado", "motivo": str(e)}
+                    progresso(f"{nome}: ignorado ({e})")
+                except Exception as e:
+                    resultado = {"status": "erro", "motivo": str(e)}
+                    progresso(f"{nome}: erro ({e})")
+                    traceback.print_exc()
+                resultados["cenarios"][nome] = resultado
+        finally:
+            ctx.encerrar()
+    return resultados
+
+
+def salvar(resultados, caminho=None):
+    """Gravar resultados em JSON; retorna o caminho usado"""
+    if caminho is None:
+        meta = resultados["meta"]
+        itens = meta["linhas"].get("itens_cotacao", 0)
+        nome = f"{meta['commit']}_{itens}_{meta['data'].replace(':', '')}.json"
+        caminho = os.path.join(DIRETORIO_RESULTADOS, nome)
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+def carregar(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparar(base, atual, tolerancia=10.0):
+    """
+    Comparar medianas de duas execuções.
+
+    Retorna [(cenario, mediana_base, mediana_atual, variacao_percentual, regressao)].
+    Uma regressão é uma piora maior que `tolerancia` por cento.
+    """
+    if base["meta"].get("linhas") != atual["meta"].get("linhas"):
+        print("⚠️  Aviso: as execuções usaram bancos com contagens de linhas diferentes")
+
+    linhas = []
+    for nome, resultado in atual["cenarios"].items():
+        anterior = base["cenarios"].get(nome)
+        if not anterior or anterior.get("status") != "ok" or resultado.get("status") != "ok":
+            continue
+        antes = anterior["mediana_ms"]
+        depois = resultado["mediana_ms"]
+        variacao = (depois - antes) / antes * 100 if antes else 0.0
+        linhas.append((nome, antes, depois, variacao, variacao > tolerancia))
+    return linhas
@@ -0,0 +1,268 @@
+"""
+Gerador de dados sintéticos para benchmark.
+
+A escala é o número de linhas de itens_cotacao (a maior tabela); as demais
+tabelas são geradas em proporções próximas às da base real. Com a mesma
+semente o banco gerado é sempre idêntico, o que permite comparar execuções.
+"""
+import os
+import random
+from datetime import date, datetime, timedelta
+
+from db import aplicar_migracoes, close_connection, get_connection, transaction
+
+ESCALAS = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+SEMENTE_PADRAO = 42
+TAMANHO_LOTE = 10_000
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Fábio", "Gabriela", "Hugo", "Íris",
+         "João", "Karina", "Luís", "Mariana", "Nelson", "Otávio", "Paula", "Renato", "Sônia",
+         "Tiago", "Vânia"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Pereira", "Lima", "Carvalho", "Gonçalves",
+              "Araújo", "Ribeiro", "Cerqueira", "Conceição", "Assunção"]
+RAMOS = ["Metalúrgica", "Indústria", "Comércio", "Alimentos", "Plásticos", "Têxtil",
+         "Embalagens", "Química", "Usinagem", "Automação"]
+CIDADES = [("São Paulo", "SP"), ("Jundiaí", "SP"), ("Campinas", "SP"), ("Sorocaba", "SP"),
+           ("Curitiba", "PR"), ("Joinville", "SC"), ("Belo Horizonte", "MG"),
+           ("Porto Alegre", "RS"), ("Goiânia", "GO"), ("Salvador", "BA")]
+CARGOS = ["Comprador", "Gerente de Manutenção", "Engenheiro", "Supervisor", "Diretor"]
+PECAS = ["Filtro de ar", "Filtro de óleo", "Separador ar/óleo", "Válvula de admissão",
+         "Rolamento", "Retentor", "Correia", "Óleo sintético 20L", "Sensor de temperatura",
+         "Pressostato", "Mangueira", "Kit de reparo"]
+SERVICOS = ["Manutenção preventiva", "Revisão geral", "Troca de elemento", "Diagnóstico",
+            "Instalação", "Visita técnica"]
+MODELOS = ["GA 37", "GA 55", "SRP 2030", "CSD 105", "ZT 75", "BSD 72"]
+STATUS = ["Em Aberto", "Aprovada", "Rejeitada"]
+TIPOS_EVENTO = ["Início", "Pausa", "Retorno", "Fim"]
+
+
+def interpretar_escala(valor):
+    """Converter '10k', '1m' ou um inteiro em número de linhas"""
+    texto = str(valor).strip().lower()
+    if texto in ESCALAS:
+        return ESCALAS[texto]
+    multiplicador = 1
+    if texto.endswith("k"):
+        multiplicador, texto = 1_000, texto[:-1]
+    elif texto.endswith("m"):
+        multiplicador, texto = 1_000_000, texto[:-1]
+    return int(float(texto) * multiplicador)
+
+
+def proporcoes(escala):
+    """Quantidade de linhas de cada tabela para a escala informada"""
+    clientes = max(10, escala // 50)
+    produtos = max(50, min(escala // 100, 5000))
+    relatorios = max(5, escala // 20)
+    return {
+        "clientes": clientes,
+        "contatos": clientes * 2,
+        "produtos": produtos,
+        "kits": max(5, produtos // 10),
+        "itens_cotacao": escala,
+        "relatorios_tecnicos": relatorios,
+        "eventos_campo": relatorios * 4,
+    }
+
+
+def _lotes(linhas, tamanho=TAMANHO_LOTE):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _inserir(db_name, sql, linhas):
+    conn = get_connection(db_name)
+    total = 0
+    for lote in _lotes(linhas):
+        with transaction(db_name):
+            conn.executemany(sql, lote)
+        total += len(lote)
+    return total
+
+
+def _cnpj(rnd):
+    return "".join(str(rnd.randint(0, 9)) for _ in range(14))
+
+
+def _telefone(rnd):
+    return f"11{rnd.randint(30000000, 99999999)}"
+
+
+def _data(rnd, inicio, dias):
+    return inicio + timedelta(days=rnd.randint(0, dias))
+
+
+def gerar_banco(caminho, escala, semente=SEMENTE_PADRAO, progresso=print):
+    """Criar em `caminho` um banco com o esquema atual e dados sintéticos"""
+    escala = interpretar_escala(escala)
+    if os.path.exists(caminho):
+        raise FileExistsError(f"Banco de benchmark já existe: {caminho}")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+
+    rnd = random.Random(semente)
+    qtd = proporcoes(escala)
+    aplicar_migracoes(caminho, progresso=None)
+    conn = get_connection(caminho)
+    # Geração descartável: durabilidade não importa aqui
+    conn.execute("PRAGMA synchronous=OFF")
+
+    hoje = date.today()
+    inicio = hoje - timedelta(days=3 * 365)
+
+    # Usuários (os padrão vêm das migrações) + técnicos
+    with transaction(caminho):
+        for i in range(5):
+            conn.execute(
+                "INSERT OR IGNORE INTO usuarios (username, password, role, nome_completo) VALUES (?, ?, ?, ?)",
+                (f"tecnico_bench_{i}", "-", "Técnico", f"Técnico {rnd.choice(NOMES)}")
+            )
+    usuarios = [row[0] for row in conn.execute("SELECT id FROM usuarios WHERE role != 'Técnico'")]
+    tecnicos = [row[0] for row in conn.execute("SELECT id FROM usuarios WHERE role = 'Técnico'")]
+
+    def clientes():
+        for i in range(qtd["clientes"]):
+            cidade, estado = rnd.choice(CIDADES)
+            nome = f"{rnd.choice(RAMOS)} {rnd.choice(SOBRENOMES)} {i} Ltda"
+            yield (nome, nome.split(" Ltda")[0], _cnpj(rnd), f"Rua {rnd.choice(SOBRENOMES)}",
+                   str(rnd.randint(1, 3000)), "Centro", cidade, estado,
+                   f"{rnd.randint(10000, 99999)}-{rnd.randint(100, 999)}", _telefone(rnd),
+                   f"contato{i}@cliente.com.br", f"{rnd.randint(1, 4) * 15} dias",
+                   rnd.choice(usuarios))
+
+    n = _inserir(caminho, """
+        INSERT INTO clientes (nome, nome_fantasia, cnpj, endereco, numero, bairro, cidade, estado,
+                              cep, telefone, email, prazo_pagamento, responsavel_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, clientes())
+    progresso(f"clientes: {n}")
+
+    def contatos():
+        for i in range(qtd["contatos"]):
+            yield (i % qtd["clientes"] + 1, f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}",
+                   rnd.choice(CARGOS), _telefone(rnd), f"pessoa{i}@cliente.com.br")
+
+    n = _inserir(caminho, "INSERT INTO contatos (cliente_id, nome, cargo, telefone, email) VALUES (?, ?, ?, ?, ?)",
+                 contatos())
+    progresso(f"contatos: {n}")
+
+    def produtos():
+        for i in range(qtd["produtos"]):
+            tipo = "Serviço" if i % 4 == 0 else "Produto"
+            base = rnd.choice(SERVICOS if tipo == "Serviço" else PECAS)
+            yield (f"{base} {i}", tipo, "84149039" if tipo == "Produto" else None,
+                   round(rnd.uniform(20, 5000), 2), f"{base} para compressor {rnd.choice(MODELOS)}")
+        for i in range(qtd["kits"]):
+            yield (f"Kit manutenção {rnd.choice(MODELOS)} {i}", "Kit", None, 0, "Kit de manutenção")
+
+    n = _inserir(caminho, "INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao) VALUES (?, ?, ?, ?, ?)",
+                 produtos())
+    progresso(f"produtos: {n}")
+
+    simples = [row for row in conn.execute("SELECT id, nome, tipo, valor_unitario FROM produtos WHERE tipo != 'Kit'")]
+    kits = [row[0] for row in conn.execute("SELECT id FROM produtos WHERE tipo = 'Kit'")]
+
+    def kit_items():
+        for kit_id in kits:
+            for produto in rnd.sample(simples, k=min(4, len(simples))):
+                yield (kit_id, produto[0], rnd.randint(1, 4))
+
+    n = _inserir(caminho, "INSERT INTO kit_items (kit_id, produto_id, quantidade) VALUES (?, ?, ?)", kit_items())
+    progresso(f"kit_items: {n}")
+
+    # Cotações e itens são gerados juntos para que valor_total bata com a soma dos itens
+    cotacoes = []
+    itens = []
+    restante = qtd["itens_cotacao"]
+    cotacao_id = 0
+    while restante > 0:
+        cotacao_id += 1
+        quantidade_itens = min(restante, rnd.randint(1, 9))
+        restante -= quantidade_itens
+        total = 0.0
+        for _ in range(quantidade_itens):
+            produto_id, nome, tipo, valor = rnd.choice(simples)
+            quantidade = rnd.randint(1, 10)
+            valor_item = round(valor * quantidade, 2)
+            total += valor_item
+            itens.append((cotacao_id, produto_id, tipo, nome, quantidade, nome, valor, valor_item,
+                           rnd.choice(["Compra", "Locação"])))
+        criacao = _data(rnd, inicio, 3 * 365)
+        cotacoes.append((f"PROP-{cotacao_id}", rnd.randint(1, qtd["clientes"]), rnd.choice(usuarios),
+                         criacao.isoformat(), (criacao + timedelta(days=30)).isoformat(),
+                         rnd.choice(MODELOS), f"SN{rnd.randint(100000, 999999)}",
+                         rnd.choice(SERVICOS), round(total, 2), rnd.choice(STATUS),
+                         rnd.choice([1, 2]),
+                         datetime.combine(criacao, datetime.min.time()).isoformat(sep=" ")))
+
+    n = _inserir(caminho, """
+        INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao, data_validade,
+                              modelo_compressor, numero_serie_compressor, descricao_atividade,
+                              valor_total, status, filial_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, cotacoes)
+    progresso(f"cotacoes: {n}")
+    del cotacoes
+
+    n = _inserir(caminho, """
+        INSERT INTO itens_cotacao (cotacao_id, produto_id, tipo, item_nome, quantidade, descricao,
+                                   valor_unitario, valor_total_item, tipo_transacao)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, itens)
+    progresso(f"itens_cotacao: {n}")
+    del itens
+
+    def relatorios():
+        for i in range(qtd["relatorios_tecnicos"]):
+            criacao = _data(rnd, inicio, 3 * 365)
+            yield (f"REL-{i + 1}", rnd.randint(1, qtd["clientes"]), rnd.choice(tecnicos),
+                   criacao.isoformat(), rnd.choice(SERVICOS), rnd.choice(SERVICOS),
+                   "Equipamento operando com ruído", "Legível", "Bom estado", "Desgaste normal",
+                   rnd.randint(1, cotacao_id) if rnd.random() < 0.5 else None,
+                   datetime.combine(criacao, datetime.min.time()).isoformat(sep=" "))
+
+    n = _inserir(caminho, """
+        INSERT INTO relatorios_tecnicos (numero_relatorio, cliente_id, responsavel_id, data_criacao,
+                                         formulario_servico, tipo_servico, condicao_encontrada,
+                                         placa_identificacao, acoplamento, aspectos_rotores,
+                                         cotacao_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, relatorios())
+    progresso(f"relatorios_tecnicos: {n}")
+
+    def eventos():
+        for i in range(qtd["eventos_campo"]):
+            momento = datetime.combine(_data(rnd, inicio, 3 * 365), datetime.min.time()) + timedelta(
+                minutes=rnd.randint(6 * 60, 18 * 60))
+            yield (i // 4 + 1, rnd.choice(tecnicos), momento.isoformat(sep=" "),
+                   f"Registro {TIPOS_EVENTO[i % 4].lower()}", TIPOS_EVENTO[i % 4])
+
+    n = _inserir(caminho, """
+        INSERT INTO eventos_campo (relatorio_id, tecnico_id, data_hora, evento, tipo)
+        VALUES (?, ?, ?, ?, ?)
+    """, eventos())
+    progresso(f"eventos_campo: {n}")
+
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    close_connection(caminho)
+    return contar_linhas(caminho)
+
+
+def contar_linhas(caminho):
+    """Quantidade de linhas das tabelas usadas no benchmark"""
+    conn = get_connection(caminho)
+    tabelas = ["clientes", "contatos", "produtos", "kit_items", "cotacoes", "itens_cotacao",
+               "relatorios_tecnicos", "eventos_campo"]
+    return {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0] for tabela in tabelas}
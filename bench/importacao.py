@@ -0,0 +1,110 @@
+"""
+Orçamento de tempo de importação da abertura do programa.
+
+Mede, com `python -X importtime`, os módulos importados em cada fase da
+abertura e falha se o tempo somado passar do orçamento ou se algum módulo
+pesado (geração de PDF, Pillow, reportlab, pool de processos...) for
+importado antes do primeiro uso real.
+
+    python -m bench importacao [--repeticoes 5] [--orcamento-abertura MS] [--orcamento-janela MS]
+
+O tempo de cada fase é a soma do tempo próprio dos módulos importados nela
+(os já carregados pelo interpretador ou por fases anteriores não contam),
+pela mediana das repetições.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Fases: nome, módulos importados (na ordem do main.py) e orçamento padrão (ms)
+FASES = (
+    ("abertura", ("tkinter", "utils.perf", "utils.perfil", "database", "interface.login"), 100),
+    ("janela", ("interface.main_window", "interface.modules.dashboard"), 50),
+)
+
+# Não podem ser importados na abertura: só quando a ação que os usa acontece
+PROIBIDOS = (
+    "fpdf",
+    "PIL",
+    "reportlab",
+    "cProfile",
+    "multiprocessing",
+    "concurrent.futures.process",
+    "pdf_generators.cotacao_nova",
+    "pdf_generators.relatorio_tecnico",
+    "utils.pdf_template_engine",
+    "interface.modules.editor_template_pdf",
+)
+
+_LINHA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _raiz():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _importar(modulos):
+    """{módulo: tempo próprio em µs} dos módulos importados por 'import <modulos>' em um processo novo"""
+    codigo = "; ".join(f"import {m}" for m in modulos) if modulos else "pass"
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=_raiz(), capture_output=True, text=True
+    )
+    if saida.returncode != 0:
+        raise RuntimeError(f"falha ao importar {', '.join(modulos)}:\n{saida.stderr[-2000:]}")
+    tempos = {}
+    for linha in saida.stderr.splitlines():
+        encontrado = _LINHA.match(linha)
+        if encontrado:
+            tempos[encontrado.group(4)] = int(encontrado.group(1))
+    return tempos
+
+
+def medir(repeticoes=5):
+    """[(fase, mediana_ms, {módulo: µs} da última repetição)] de cada fase da abertura"""
+    resultados = []
+    anteriores = []
+    for nome, modulos, _orcamento in FASES:
+        totais = []
+        for _ in range(repeticoes):
+            base = set(_importar(anteriores))
+            tempos = {m: t for m, t in _importar(anteriores + list(modulos)).items() if m not in base}
+            totais.append(sum(tempos.values()) / 1000)
+        resultados.append((nome, statistics.median(totais), tempos))
+        anteriores.extend(modulos)
+    return resultados
+
+
+def verificar(resultados, orcamentos=None):
+    """Lista de problemas (vazia se tudo dentro do orçamento)"""
+    orcamentos = orcamentos or {}
+    problemas = []
+    importados = set()
+    for (nome, total_ms, tempos), (_nome, _modulos, orcamento) in zip(resultados, FASES):
+        orcamento = orcamentos.get(nome) or orcamento
+        if total_ms > orcamento:
+            problemas.append(f"fase {nome}: {total_ms:.1f} ms (orçamento {orcamento} ms)")
+        importados.update(tempos)
+    for proibido in PROIBIDOS:
+        encontrados = sorted(m for m in importados if m == proibido or m.startswith(proibido + "."))
+        if encontrados:
+            problemas.append(f"{proibido} importado na abertura ({len(encontrados)} módulo(s))")
+    return problemas
+
+
+def executar(repeticoes=5, orcamentos=None, mais_lentos=8):
+    """Medir, mostrar o resumo e devolver o código de saída (1 se houver problemas)"""
+    resultados = medir(repeticoes)
+    for nome, total_ms, tempos in resultados:
+        print(f"{nome}: {total_ms:.1f} ms em {len(tempos)} módulos")
+        for modulo, micros in sorted(tempos.items(), key=lambda item: -item[1])[:mais_lentos]:
+            print(f"    {micros / 1000:7.1f} ms  {modulo}")
+    problemas = verificar(resultados, orcamentos)
+    print()
+    for problema in problemas:
+        print(f"❌ {problema}")
+    if not problemas:
+        print("✅ Importações da abertura dentro do orçamento")
+    return 1 if problemas else 0
@@ -0,0 +1,134 @@
+"""
+Implementações anteriores de clean_text (cotacao_nova.py e relatorio_tecnico.py),
+mantidas sem alteração como referência para os cenários de limpeza de texto
+(comparação de tempo e de resultado com utils/text_sanitize).
+"""
+
+
+def clean_text_cotacao(text):
+    """Substitui tabs por espaços e remove caracteres problemáticos"""
+    if text is None:
+        return ""
+    
+    # Converter para string se não for
+    text = str(text)
+    
+    # Substitui tabs por 4 espaços
+    text = text.replace('\t', '    ')
+    
+    # Substituir caracteres especiais problemáticos
+    replacements = {
+        # Bullets e símbolos especiais
+        '•': '- ',
+        '●': '- ',
+        '◦': '- ',
+        '◆': '- ',
+        '▪': '- ',
+        '▫': '- ',
+        '★': '* ',
+        '☆': '* ',
+        
+        # Aspas especiais
+        '"': '"',
+        '"': '"',
+        ''': "'",
+        ''': "'",
+        
+        # Travessões
+        '–': '-',
+        '—': '-',
+        
+        # Outros símbolos
+        '…': '...',
+        '®': '(R)',
+        '™': '(TM)',
+        '©': '(C)',
+        '°': ' graus',
+        '€': 'EUR',
+        '£': 'GBP',
+        '¥': 'JPY',
+        
+        # Acentos problemáticos (fallback)
+        'À': 'A', 'Á': 'A', 'Â': 'A', 'Ã': 'A', 'Ä': 'A',
+        'È': 'E', 'É': 'E', 'Ê': 'E', 'Ë': 'E',
+        'Ì': 'I', 'Í': 'I', 'Î': 'I', 'Ï': 'I',
+        'Ò': 'O', 'Ó': 'O', 'Ô': 'O', 'Õ': 'O', 'Ö': 'O',
+        'Ù': 'U', 'Ú': 'U', 'Û': 'U', 'Ü': 'U',
+        'Ç': 'C', 'Ñ': 'N',
+        'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a',
+        'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+        'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+        'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o',
+        'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
+        'ç': 'c', 'ñ': 'n',
+    }
+    
+    # Aplicar substituições
+    for old_char, new_char in replacements.items():
+        text = text.replace(old_char, new_char)
+    
+    # Remover caracteres não ASCII restantes
+    try:
+        # Tentar encoding/decoding para limpar caracteres problemáticos
+        text = text.encode('ascii', 'ignore').decode('ascii')
+    except:
+        # Se falhar, usar apenas caracteres básicos
+        text = ''.join(char for char in text if ord(char) < 128)
+    
+    return text
+
+
+def clean_text_relatorio(text, aggressive=False):
+    """Substitui tabs por espaços e remove caracteres problemáticos"""
+    if text is None:
+        return ""
+    
+    # Converter para string se não for
+    text = str(text)
+    
+    # Substituir tabs por espaços
+    text = text.replace('\t', '    ')
+    
+    # Remover ou substituir caracteres problemáticos
+    replacements = {
+        '"': '"',  # Smart quotes
+        '"': '"',
+        ''': "'",
+        ''': "'",
+        '…': '...',
+        '–': '-',
+        '—': '-',
+        '°': 'o',
+        '®': '(R)',
+        '©': '(C)',
+        '™': '(TM)',
+        'ª': 'a',
+        'º': 'o',
+        'ç': 'c',
+        'Ç': 'C'
+    }
+    
+    for old_char, new_char in replacements.items():
+        text = text.replace(old_char, new_char)
+    
+    # Se aggressive=True, remover todos os acentos também
+    if aggressive:
+        accents = {
+            'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a', 'ä': 'a',
+            'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+            'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
+            'ó': 'o', 'ò': 'o', 'õ': 'o', 'ô': 'o', 'ö': 'o',
+            'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u',
+            'Á': 'A', 'À': 'A', 'Ã': 'A', 'Â': 'A', 'Ä': 'A',
+            'É': 'E', 'È': 'E', 'Ê': 'E', 'Ë': 'E',
+            'Í': 'I', 'Ì': 'I', 'Î': 'I', 'Ï': 'I',
+            'Ó': 'O', 'Ò': 'O', 'Õ': 'O', 'Ô': 'O', 'Ö': 'O',
+            'Ú': 'U', 'Ù': 'U', 'Û': 'U', 'Ü': 'U'
+        }
+        for old_char, new_char in accents.items():
+            text = text.replace(old_char, new_char)
+    
+    # Remover caracteres não-ASCII restantes
+    text = ''.join(char if ord(char) < 128 else '?' for char in text)
+    
+    return text
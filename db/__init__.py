@@ -0,0 +1,30 @@
+from .connection import (
+    DB_NAME,
+    PRAGMAS,
+    get_connection,
+    transaction,
+    close_connection,
+    close_all_connections,
+)
+from .indices import INDICES, sincronizar_indices
+from .migrations import (
+    VERSAO_ESQUEMA,
+    aplicar_migracoes,
+    executar_em_lotes,
+    versao_atual,
+)
+
+__all__ = [
+    'DB_NAME',
+    'PRAGMAS',
+    'get_connection',
+    'transaction',
+    'close_connection',
+    'close_all_connections',
+    'VERSAO_ESQUEMA',
+    'aplicar_migracoes',
+    'executar_em_lotes',
+    'versao_atual',
+    'INDICES',
+    'sincronizar_indices',
+]
@@ -0,0 +1,214 @@
+"""
+Gravação por várias estações no mesmo banco (ex.: arquivo em uma pasta
+compartilhada da rede).
+
+Bloqueios: executar(gravar) roda gravar(conn) em uma transação BEGIN
+IMMEDIATE. Se outra estação mantiver o banco bloqueado além do busy_timeout
+(ou o SQLite recusar a espera), a transação inteira é repetida após uma
+espera exponencial com jitter, até TENTATIVAS vezes.
+
+    def gravar(conn):
+        concorrencia.reivindicar(conn, 'cliente', cliente_id, versao_lida)
+        conn.execute("UPDATE clientes SET ... WHERE id = ?", (..., cliente_id))
+
+    nova_versao = concorrencia.executar(gravar)
+
+gravar pode rodar mais de uma vez: não deve alterar o formulário nem ter
+efeitos fora do banco (devolva o que precisar e aplique após executar).
+
+Conflitos: clientes, cotações e relatórios técnicos têm a coluna versao e as
+permissões de cada usuário usam usuarios.versao_permissoes (migração 15).
+O formulário guarda a versão lida ao abrir o registro; ao salvar,
+reivindicar() incrementa a versão somente se ela ainda for a lida e lança
+ConflitoVersao se outra estação salvou (ou excluiu) o registro nesse meio-tempo.
+
+Métricas em utils.perf.contadores() (ver metricas()). Teste de contenção
+entre processos em um banco temporário:
+
+    python -m db.concorrencia [--processos 8] [--operacoes 200]
+"""
+import logging
+import random
+import sqlite3
+import sys
+import time
+
+from utils import perf
+
+from .connection import close_connection, get_connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Repetições de uma transação bloqueada e espera entre elas (s): exponencial, limitada
+TENTATIVAS = 5
+ESPERA_INICIAL = 0.05
+ESPERA_MAXIMA = 2.0
+
+# entidade -> (tabela, coluna da versão)
+VERSOES = {
+    'cliente': ('clientes', 'versao'),
+    'cotacao': ('cotacoes', 'versao'),
+    'relatorio': ('relatorios_tecnicos', 'versao'),
+    'permissoes': ('usuarios', 'versao_permissoes'),
+}
+
+# Contadores em utils.perf (prefixo "concorrencia.")
+METRICAS = ('transacoes', 'bloqueios', 'repeticoes', 'espera_ms', 'desistencias', 'conflitos')
+
+
+class ConflitoVersao(Exception):
+    """O registro foi alterado (ou excluído, versao_atual None) por outra estação depois de lido"""
+
+    def __init__(self, entidade, registro_id, versao_lida, versao_atual):
+        self.entidade = entidade
+        self.registro_id = registro_id
+        self.versao_lida = versao_lida
+        self.versao_atual = versao_atual
+        situacao = "excluído" if versao_atual is None else f"versão {versao_atual}"
+        super().__init__(f"{entidade} {registro_id}: lida a versão {versao_lida}, atual {situacao}")
+
+
+def bloqueado(erro):
+    """O erro é de banco bloqueado/ocupado por outra conexão (e a transação pode ser repetida)?"""
+    nome = getattr(erro, "sqlite_errorname", None)
+    if nome:
+        return nome.startswith(("SQLITE_BUSY", "SQLITE_LOCKED"))
+    mensagem = str(erro).lower()
+    return "locked" in mensagem or "busy" in mensagem
+
+
+def _espera(tentativa):
+    """Espera antes da repetição: metade fixa e metade aleatória do limite exponencial"""
+    limite = min(ESPERA_MAXIMA, ESPERA_INICIAL * 2 ** tentativa)
+    return limite / 2 + random.uniform(0, limite / 2)
+
+
+def executar(gravar, db_name=None):
+    """
+    Rodar gravar(conn) em uma transação BEGIN IMMEDIATE e devolver o retorno,
+    repetindo a transação inteira enquanto o banco estiver bloqueado.
+    Dentro de outra transação não há repetição (o erro é propagado para ela).
+    """
+    perf.incrementar("concorrencia.transacoes")
+    for tentativa in range(TENTATIVAS):
+        try:
+            with transaction(db_name, immediate=True) as conn:
+                return gravar(conn)
+        except sqlite3.OperationalError as e:
+            if not bloqueado(e):
+                raise
+            perf.incrementar("concorrencia.bloqueios")
+            if get_connection(db_name).in_transaction or tentativa == TENTATIVAS - 1:
+                perf.incrementar("concorrencia.desistencias")
+                raise
+            espera = _espera(tentativa)
+            perf.incrementar("concorrencia.repeticoes")
+            perf.incrementar("concorrencia.espera_ms", round(espera * 1000))
+            logger.info("Banco bloqueado (%s); nova tentativa em %.0f ms", e, espera * 1000)
+            time.sleep(espera)
+
+
+def versao(entidade, registro_id, conn=None):
+    """
+    Versão atual do registro (None se não existir). Ao abrir um formulário,
+    leia a versão antes dos dados: uma gravação entre as duas leituras resulta
+    em conflito ao salvar, nunca em alteração perdida.
+    """
+    tabela, coluna = VERSOES[entidade]
+    row = (conn or get_connection()).execute(
+        f"SELECT {coluna} FROM {tabela} WHERE id = ?", (registro_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def reivindicar(conn, entidade, registro_id, versao_lida):
+    """
+    Incrementar a versão do registro se ela ainda for versao_lida (no início
+    da transação de gravação) e devolver a nova versão; ConflitoVersao se não for.
+    """
+    tabela, coluna = VERSOES[entidade]
+    cursor = conn.execute(
+        f"UPDATE {tabela} SET {coluna} = {coluna} + 1 WHERE id = ? AND {coluna} = ?",
+        (registro_id, versao_lida)
+    )
+    if cursor.rowcount == 1:
+        return versao_lida + 1
+    perf.incrementar("concorrencia.conflitos")
+    raise ConflitoVersao(entidade, registro_id, versao_lida, versao(entidade, registro_id, conn))
+
+
+def metricas():
+    """{métrica: valor} dos contadores de contenção do processo (ver METRICAS)"""
+    contadores = perf.contadores()
+    return {nome: contadores.get(f"concorrencia.{nome}", 0) for nome in METRICAS}
+
+
+def _trabalhador(caminho, operacoes, semente, busy_timeout_ms):
+    """Processo do teste de contenção: salvar o mesmo cliente repetidamente, relendo em caso de conflito"""
+    random.seed(semente)
+    get_connection(caminho).execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+    salvas = 0
+    while salvas < operacoes:
+        lida = versao('cliente', 1, get_connection(caminho))
+
+        def gravar(conn):
+            nova = reivindicar(conn, 'cliente', 1, lida)
+            conn.execute("UPDATE clientes SET telefone = ? WHERE id = 1", (str(semente),))
+            return nova
+
+        try:
+            executar(gravar, caminho)
+            salvas += 1
+        except ConflitoVersao:
+            pass
+    return metricas()
+
+
+def main(argv=None):
+    import argparse
+    import os
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .migrations import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(prog="python -m db.concorrencia",
+                                     description="Teste de contenção de gravação entre processos")
+    parser.add_argument("--processos", type=int, default=8)
+    parser.add_argument("--operacoes", type=int, default=200, help="gravações confirmadas por processo")
+    parser.add_argument("--busy-timeout", type=int, default=0,
+                        help="busy_timeout (ms) das conexões do teste; 0 = só as repetições de executar()")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="crm_concorrencia_") as diretorio:
+        caminho = os.path.join(diretorio, "crm.db")
+        aplicar_migracoes(caminho, progresso=None)
+        with transaction(caminho) as conn:
+            conn.execute("INSERT INTO clientes (id, nome) VALUES (1, 'Cliente de teste')")
+
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(args.processos) as executor:
+            resultados = list(executor.map(
+                _trabalhador, [caminho] * args.processos,
+                [args.operacoes] * args.processos, range(args.processos),
+                [args.busy_timeout] * args.processos
+            ))
+        duracao = time.perf_counter() - inicio
+
+        esperada = 1 + args.processos * args.operacoes
+        final = versao('cliente', 1, get_connection(caminho))
+        close_connection(caminho)
+
+    total = {nome: sum(r[nome] for r in resultados) for nome in METRICAS}
+    print(f"{args.processos} processos x {args.operacoes} gravações em {duracao:.2f} s")
+    for nome in METRICAS:
+        print(f"    {nome:<14} {total[nome]:>8}")
+    if final != esperada:
+        print(f"❌ Versão final {final}, esperada {esperada}: gravações perdidas")
+        return 1
+    print(f"✅ Nenhuma gravação perdida (versão final {final})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from utils import perf
+
+logger = logging.getLogger(__name__)
+
+# Caminho do banco; CRM_DB permite apontar para outro arquivo (ex.: bases de benchmark)
+DB_NAME = os.environ.get("CRM_DB", "crm_compressores.db")
+
+# Pragmas aplicados em toda conexão aberta pelo sistema
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS = (
+    ("foreign_keys", "ON"),
+    ("busy_timeout", BUSY_TIMEOUT_MS),
+    ("cache_size", -20000),       # ~20 MB de cache de páginas
+    ("mmap_size", 268435456),     # 256 MB mapeados em memória
+    ("temp_store", "MEMORY"),
+)
+
+# Modo do journal: CRM_JOURNAL=WAL ou um modo de rollback (DELETE, TRUNCATE, PERSIST).
+# Sem a variável, WAL para bancos locais e DELETE para bancos em pasta de rede:
+# o WAL usa memória compartilhada e exige que todas as conexões estejam na mesma máquina.
+MODOS_JOURNAL = ("WAL", "DELETE", "TRUNCATE", "PERSIST")
+PRAGMAS_JOURNAL = {
+    "WAL": (("synchronous", "NORMAL"),),
+    # Banco compartilhado: gravação completa a cada commit e sem mapeamento do arquivo
+    "ROLLBACK": (("synchronous", "FULL"), ("mmap_size", 0)),
+}
+
+_local = threading.local()
+
+
+def _connection_key(db_name):
+    return os.path.abspath(db_name or DB_NAME)
+
+
+def em_rede(caminho):
+    """O arquivo está em uma pasta de rede (caminho UNC ou unidade de rede mapeada no Windows)?"""
+    caminho = os.path.abspath(caminho)
+    if caminho.startswith(("\\\\", "//")):
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        unidade = os.path.splitdrive(caminho)[0]
+        return bool(unidade) and ctypes.windll.kernel32.GetDriveTypeW(unidade + "\\") == 4  # DRIVE_REMOTE
+    return False
+
+
+def journal_mode(db_name=None):
+    """Modo do journal usado para o banco (ver MODOS_JOURNAL)"""
+    modo = os.environ.get("CRM_JOURNAL", "").strip().upper()
+    if modo:
+        if modo not in MODOS_JOURNAL:
+            raise ValueError(f"CRM_JOURNAL inválido: {modo} (use {', '.join(MODOS_JOURNAL)})")
+        return modo
+    return "DELETE" if em_rede(db_name or DB_NAME) else "WAL"
+
+
+def _apply_pragmas(conn, db_name):
+    """Aplicar os pragmas padrão e os do modo do journal na conexão"""
+    for pragma, value in PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}={value}")
+    modo = journal_mode(db_name)
+    atual = conn.execute(f"PRAGMA journal_mode={modo}").fetchone()[0].upper()
+    if atual != modo:
+        # Ex.: o banco está em WAL e outra conexão o mantém aberto
+        logger.warning("Não foi possível mudar o journal de %s para %s (atual: %s)", db_name, modo, atual)
+    for pragma, value in PRAGMAS_JOURNAL["WAL" if atual == "WAL" else "ROLLBACK"]:
+        conn.execute(f"PRAGMA {pragma}={value}")
+
+
+def _open_connection(db_name):
+    """Abrir uma nova conexão configurada"""
+    conn = sqlite3.connect(
+        db_name,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,  # transações controladas por transaction()
+    )
+    _apply_pragmas(conn, db_name)
+    # Contagem de consultas por operação (ver utils.perf)
+    conn.set_trace_callback(perf.contar_consulta)
+    return conn
+
+
+def _thread_state():
+    # Após um fork as conexões herdadas não podem ser reutilizadas
+    if getattr(_local, "pid", None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+        _local.depth = {}
+    return _local
+
+
+def get_connection(db_name=None):
+    """Retornar a conexão persistente da thread atual para o banco informado"""
+    state = _thread_state()
+    key = _connection_key(db_name)
+    conn = state.connections.get(key)
+    if conn is None:
+        conn = _open_connection(db_name or DB_NAME)
+        state.connections[key] = conn
+        state.depth[key] = 0
+    return conn
+
+
+@contextmanager
+def transaction(db_name=None, immediate=False):
+    """
+    Abrir uma transação na conexão da thread atual.
+
+    Faz COMMIT ao sair do bloco e ROLLBACK se uma exceção for lançada.
+    Chamadas aninhadas usam SAVEPOINT, de modo que um erro interno desfaz
+    apenas o trecho aninhado. Use immediate=True para reservar o lock de
+    escrita já no início (BEGIN IMMEDIATE).
+    """
+    state = _thread_state()
+    conn = get_connection(db_name)
+    key = _connection_key(db_name)
+    depth = state.depth.get(key, 0)
+
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    else:
+        conn.execute(f"SAVEPOINT sp_{depth}")
+
+    state.depth[key] = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        state.depth[key] = depth
+        if depth == 0:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        else:
+            conn.execute(f"ROLLBACK TO SAVEPOINT sp_{depth}")
+            conn.execute(f"RELEASE SAVEPOINT sp_{depth}")
+        raise
+    else:
+        state.depth[key] = depth
+        if depth == 0:
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+        else:
+            conn.execute(f"RELEASE SAVEPOINT sp_{depth}")
+
+
+def close_connection(db_name=None):
+    """Fechar a conexão da thread atual (ex.: ao encerrar uma thread de trabalho)"""
+    state = _thread_state()
+    key = _connection_key(db_name)
+    conn = state.connections.pop(key, None)
+    state.depth.pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+def close_all_connections():
+    """Fechar todas as conexões abertas pela thread atual"""
+    state = _thread_state()
+    for conn in state.connections.values():
+        conn.close()
+    state.connections.clear()
+    state.depth.clear()
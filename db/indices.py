@@ -0,0 +1,87 @@
+"""
+Conjunto de índices gerenciados pelo sistema.
+
+Todos os índices secundários do banco são declarados aqui e criados pelas
+migrações (ver db/migrations.py). Índices com o prefixo "idx_" que não
+estejam nesta lista são considerados obsoletos e removidos por
+sincronizar_indices(), de modo que o banco sempre reflete exatamente esta
+declaração. Ao alterar a lista, adicione uma nova migração que chame
+sincronizar_indices(). Índices de tabelas criadas por migrações
+posteriores (ou que usam colunas adicionadas depois) são ignorados até que
+a tabela e as colunas existam.
+"""
+import re
+
+PREFIXO = "idx_"
+
+# (nome, tabela, expressão das colunas)
+INDICES = (
+    # Itens carregados a cada abertura/PDF de cotação
+    ("idx_itens_cotacao_cotacao", "itens_cotacao", "cotacao_id"),
+    ("idx_itens_cotacao_produto", "itens_cotacao", "produto_id"),
+    # Verificação da FK kit_id -> itens_cotacao(id) ao excluir itens
+    ("idx_itens_cotacao_kit", "itens_cotacao", "kit_id"),
+    # Contatos do cliente (listados em ordem alfabética)
+    ("idx_contatos_cliente", "contatos", "cliente_id, nome"),
+    # Eventos de campo de cada relatório
+    ("idx_eventos_campo_relatorio", "eventos_campo", "relatorio_id"),
+    ("idx_eventos_campo_tecnico", "eventos_campo", "tecnico_id"),
+    # Indicadores por responsável/status e verificação de cotações vencidas
+    ("idx_cotacoes_responsavel_status", "cotacoes", "responsavel_id, status"),
+    ("idx_cotacoes_status_validade", "cotacoes", "status, date(data_validade)"),
+    ("idx_cotacoes_cliente", "cotacoes", "cliente_id"),
+    # Listagens paginadas (keyset) das cotações, mais recentes primeiro
+    ("idx_cotacoes_created", "cotacoes", "created_at"),
+    ("idx_cotacoes_status_created", "cotacoes", "status, created_at"),
+    # Relatórios técnicos
+    ("idx_relatorios_cliente", "relatorios_tecnicos", "cliente_id"),
+    ("idx_relatorios_responsavel", "relatorios_tecnicos", "responsavel_id, created_at"),
+    ("idx_relatorios_cotacao", "relatorios_tecnicos", "cotacao_id"),
+    ("idx_relatorios_data", "relatorios_tecnicos", "data_criacao"),
+    ("idx_relatorios_responsavel_data", "relatorios_tecnicos", "responsavel_id, data_criacao"),
+    # Composição de kits
+    ("idx_kit_items_kit", "kit_items", "kit_id"),
+    ("idx_kit_items_produto", "kit_items", "produto_id"),
+    # Filtros dos cadastros
+    ("idx_clientes_responsavel", "clientes", "responsavel_id"),
+    ("idx_clientes_nome", "clientes", "nome"),
+    ("idx_produtos_tipo_ativo", "produtos", "tipo, ativo, nome"),
+    ("idx_produtos_tipo_nome", "produtos", "tipo, nome"),
+    ("idx_tecnicos_nome", "tecnicos", "nome"),
+    # Cache dos PDFs de cotação: invalidação geral e limpeza dos arquivos removidos do diretório
+    ("idx_cotacoes_chave_pdf", "cotacoes", "chave_pdf"),
+    ("idx_cotacoes_caminho_pdf", "cotacoes", "caminho_arquivo_pdf"),
+    # Fila de geração de PDFs (pendentes de cada máquina, na ordem de chegada)
+    ("idx_pdf_jobs_maquina_status", "pdf_jobs", "maquina, status, id"),
+)
+
+
+def indices_existentes(conn):
+    """Nomes dos índices gerenciados presentes no banco"""
+    return {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE ?",
+            (PREFIXO + "%",)
+        )
+    }
+
+
+def sincronizar_indices(conn):
+    """Criar os índices declarados e remover os gerenciados que não existem mais"""
+    declarados = {nome for nome, _, _ in INDICES}
+    for nome in indices_existentes(conn) - declarados:
+        print(f"Removendo índice obsoleto {nome}...")
+        conn.execute(f"DROP INDEX IF EXISTS {nome}")
+    tabelas = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    for nome, tabela, colunas in INDICES:
+        if tabela in tabelas and _colunas_usadas(colunas) <= _colunas_tabela(conn, tabela):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas})")
+
+
+def _colunas_usadas(expressao):
+    """Colunas citadas na expressão do índice (nomes seguidos de "(" são funções)"""
+    return set(re.findall(r"\b([A-Za-z_]\w*)\b(?!\s*\()", expressao))
+
+
+def _colunas_tabela(conn, tabela):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
@@ -0,0 +1,756 @@
+"""
+Migrações versionadas do esquema.
+
+A versão aplicada fica gravada em PRAGMA user_version. Na inicialização
+basta comparar esse inteiro com a última versão conhecida: se forem iguais
+nada mais é executado (nenhum CREATE/ALTER/INSERT e nenhum lock de escrita).
+
+Para adicionar uma migração, escreva uma função que recebe a conexão e
+acrescente-a ao final de MIGRACOES. Nunca altere ou reordene migrações já
+publicadas. Migrações marcadas com em_lotes=True controlam as próprias
+transações (ver executar_em_lotes) e recebem também a função de progresso
+e o nome do banco.
+"""
+import hashlib
+import sqlite3
+from collections import namedtuple
+
+from .connection import get_connection, transaction
+from .indices import sincronizar_indices
+
+Migracao = namedtuple('Migracao', ['versao', 'descricao', 'funcao', 'em_lotes'])
+
+TAMANHO_LOTE_PADRAO = 5000
+
+
+def _colunas(conn, tabela):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")]
+
+
+def _tabela_existe(conn, tabela):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (tabela,)
+    ).fetchone() is not None
+
+
+def _adicionar_coluna(conn, tabela, coluna, definicao):
+    """Adicionar coluna somente se ainda não existir"""
+    if coluna not in _colunas(conn, tabela):
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+
+def progresso_console(descricao, feitos, total):
+    """Relatório de progresso padrão (terminal)"""
+    if total:
+        print(f"   {descricao}: {feitos}/{total} ({feitos * 100 // total}%)")
+    else:
+        print(f"   {descricao}: {feitos}")
+
+
+def executar_em_lotes(conn, tabela, processar_lote, descricao='', tamanho_lote=TAMANHO_LOTE_PADRAO,
+                      progresso=None, db_name=None):
+    """
+    Percorrer `tabela` por rowid em lotes, cada lote em sua própria transação.
+
+    processar_lote(conn, primeiro_rowid, ultimo_rowid) é chamado para cada
+    faixa. Como cada lote é confirmado separadamente, o lock de escrita é
+    liberado entre os lotes e o processamento deve ser idempotente para que
+    uma migração interrompida possa ser retomada.
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    ultimo = 0
+    feitos = 0
+    while True:
+        faixa = conn.execute(
+            f"SELECT MIN(rowid), MAX(rowid), COUNT(*) FROM "
+            f"(SELECT rowid FROM {tabela} WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+            (ultimo, tamanho_lote)
+        ).fetchone()
+        if not faixa or not faixa[2]:
+            break
+        primeiro, ultimo, quantidade = faixa
+        with transaction(db_name):
+            processar_lote(conn, primeiro, ultimo)
+        feitos += quantidade
+        if progresso:
+            progresso(descricao or tabela, feitos, total)
+    return feitos
+
+
+# ---------------------------------------------------------------------------
+# Migrações
+# ---------------------------------------------------------------------------
+
+def _m001_esquema_inicial(conn):
+    """Tabelas base do sistema"""
+    # Versões antigas usavam kit_composicao no lugar de kit_items
+    if _tabela_existe(conn, 'kit_composicao'):
+        if not _tabela_existe(conn, 'kit_items'):
+            print("Renomeando tabela kit_composicao para kit_items...")
+            conn.execute("ALTER TABLE kit_composicao RENAME TO kit_items")
+        else:
+            print("Ambas as tabelas kit_composicao e kit_items existem. Removendo kit_composicao...")
+            conn.execute("DROP TABLE kit_composicao")
+
+    # Tabela Usuários
+    conn.execute('''CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL DEFAULT 'operador',
+        nome_completo TEXT,
+        email TEXT,
+        telefone TEXT,
+        template_personalizado BOOLEAN DEFAULT 0,
+        template_image_path TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # Tabela Clientes
+    conn.execute('''CREATE TABLE IF NOT EXISTS clientes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        nome_fantasia TEXT,
+        cnpj TEXT UNIQUE,
+        inscricao_estadual TEXT,
+        inscricao_municipal TEXT,
+        endereco TEXT,
+        numero TEXT,
+        complemento TEXT,
+        bairro TEXT,
+        cidade TEXT,
+        estado TEXT,
+        cep TEXT,
+        telefone TEXT,
+        email TEXT,
+        site TEXT,
+        prazo_pagamento TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # Tabela Contatos do Cliente
+    conn.execute('''CREATE TABLE IF NOT EXISTS contatos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cliente_id INTEGER NOT NULL,
+        nome TEXT NOT NULL,
+        cargo TEXT,
+        telefone TEXT,
+        email TEXT,
+        observacoes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+    )''')
+
+    # Tabela Técnicos
+    conn.execute('''CREATE TABLE IF NOT EXISTS tecnicos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        especialidade TEXT,
+        telefone TEXT,
+        email TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # Tabela Produtos/Serviços/Kits
+    conn.execute('''CREATE TABLE IF NOT EXISTS produtos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        tipo TEXT NOT NULL CHECK (tipo IN ('Serviço', 'Produto', 'Kit')),
+        ncm TEXT,
+        valor_unitario REAL DEFAULT 0,
+        descricao TEXT,
+        ativo BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    # Tabela Itens do Kit
+    conn.execute('''CREATE TABLE IF NOT EXISTS kit_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kit_id INTEGER NOT NULL,
+        produto_id INTEGER NOT NULL,
+        quantidade REAL NOT NULL DEFAULT 1,
+        FOREIGN KEY (kit_id) REFERENCES produtos(id) ON DELETE CASCADE,
+        FOREIGN KEY (produto_id) REFERENCES produtos(id)
+    )''')
+
+    # Tabela Cotações
+    conn.execute('''CREATE TABLE IF NOT EXISTS cotacoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_proposta TEXT NOT NULL UNIQUE,
+        cliente_id INTEGER NOT NULL,
+        responsavel_id INTEGER NOT NULL,
+        filial_id INTEGER DEFAULT 2,
+        data_criacao DATE NOT NULL,
+        data_validade DATE,
+        modelo_compressor TEXT,
+        numero_serie_compressor TEXT,
+        descricao_atividade TEXT,
+        observacoes TEXT,
+        valor_total REAL DEFAULT 0,
+        tipo_frete TEXT DEFAULT 'FOB',
+        condicao_pagamento TEXT,
+        prazo_entrega TEXT,
+        moeda TEXT DEFAULT 'BRL',
+        status TEXT DEFAULT 'Em Aberto',
+        caminho_arquivo_pdf TEXT,
+        relacao_pecas TEXT,
+        esboco_servico TEXT,
+        relacao_pecas_substituir TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+        FOREIGN KEY (responsavel_id) REFERENCES usuarios(id)
+    )''')
+
+    # Tabela Itens da Cotação
+    conn.execute('''CREATE TABLE IF NOT EXISTS itens_cotacao (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cotacao_id INTEGER NOT NULL,
+        produto_id INTEGER,
+        tipo TEXT NOT NULL,
+        item_nome TEXT NOT NULL,
+        quantidade REAL NOT NULL,
+        descricao TEXT,
+        valor_unitario REAL NOT NULL,
+        valor_total_item REAL NOT NULL,
+        eh_kit BOOLEAN DEFAULT 0,
+        kit_id INTEGER,
+        mao_obra REAL DEFAULT 0,
+        deslocamento REAL DEFAULT 0,
+        estadia REAL DEFAULT 0,
+        tipo_transacao TEXT DEFAULT 'Compra',
+        FOREIGN KEY (cotacao_id) REFERENCES cotacoes(id),
+        FOREIGN KEY (produto_id) REFERENCES produtos(id),
+        FOREIGN KEY (kit_id) REFERENCES itens_cotacao(id)
+    )''')
+
+    # Tabela Relatórios Técnicos
+    conn.execute('''CREATE TABLE IF NOT EXISTS relatorios_tecnicos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_relatorio TEXT NOT NULL UNIQUE,
+        cliente_id INTEGER NOT NULL,
+        responsavel_id INTEGER NOT NULL,
+        data_criacao DATE NOT NULL,
+        formulario_servico TEXT,
+        tipo_servico TEXT,
+        descricao_servico TEXT,
+        data_recebimento DATE,
+
+        -- Aba 1: Condição Inicial
+        condicao_encontrada TEXT,
+        placa_identificacao TEXT,
+        acoplamento TEXT,
+        aspectos_rotores TEXT,
+        valvulas_acopladas TEXT,
+        data_recebimento_equip TEXT,
+
+        -- Aba 2: Peritagem do Subconjunto
+        parafusos_pinos TEXT,
+        superficie_vedacao TEXT,
+        engrenagens TEXT,
+        bico_injertor TEXT,
+        rolamentos TEXT,
+        aspecto_oleo TEXT,
+        data_peritagem TEXT,
+
+        -- Aba 3: Desmembrando Unidade Compressora
+        interf_desmontagem TEXT,
+        aspecto_rotores_aba3 TEXT,
+        aspecto_carcaca TEXT,
+        interf_mancais TEXT,
+        galeria_hidraulica TEXT,
+        data_desmembracao TEXT,
+
+        -- Aba 4: Relação de Peças e Serviços
+        servicos_propostos TEXT,
+        pecas_recomendadas TEXT,
+        data_pecas TEXT,
+
+        -- Outros campos
+        cotacao_id INTEGER,
+        tempo_trabalho_total TEXT,
+        tempo_deslocamento_total TEXT,
+        fotos TEXT,
+        anexos_aba1 TEXT,
+        anexos_aba2 TEXT,
+        anexos_aba3 TEXT,
+        anexos_aba4 TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+        FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+        FOREIGN KEY (responsavel_id) REFERENCES usuarios(id),
+        FOREIGN KEY (cotacao_id) REFERENCES cotacoes(id)
+    )''')
+
+    # Tabela Eventos de Campo
+    conn.execute('''CREATE TABLE IF NOT EXISTS eventos_campo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        relatorio_id INTEGER NOT NULL,
+        tecnico_id INTEGER NOT NULL,
+        data_hora DATETIME NOT NULL,
+        evento TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        FOREIGN KEY (relatorio_id) REFERENCES relatorios_tecnicos(id),
+        FOREIGN KEY (tecnico_id) REFERENCES usuarios(id)
+    )''')
+
+    # Tabela de Permissões por Módulo
+    conn.execute('''CREATE TABLE IF NOT EXISTS permissoes_usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        modulo TEXT NOT NULL,
+        nivel_acesso TEXT NOT NULL CHECK (nivel_acesso IN ('consulta', 'controle_total')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+        UNIQUE(usuario_id, modulo)
+    )''')
+
+    # Tabela para gerenciar capas de usuários
+    conn.execute('''CREATE TABLE IF NOT EXISTS user_covers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        cover_name TEXT NOT NULL,
+        cover_path TEXT NOT NULL,
+        is_default BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES usuarios (id),
+        UNIQUE(user_id, cover_name)
+    )''')
+
+    # Tabela para configurações de edição de PDF
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_edit_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        field_name TEXT NOT NULL,
+        field_value TEXT,
+        field_type TEXT DEFAULT 'text',
+        last_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES usuarios (id),
+        UNIQUE(user_id, field_name)
+    )''')
+
+    # Tabela para templates PDF
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        description TEXT,
+        template_data TEXT,
+        created_by INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES usuarios (id)
+    )''')
+
+    # Tabela de elementos dos templates PDF
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_template_elements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        template_id INTEGER,
+        page_number INTEGER,
+        element_type TEXT,
+        element_data TEXT,
+        position_x REAL,
+        position_y REAL,
+        width REAL,
+        height REAL,
+        font_family TEXT DEFAULT 'Arial',
+        font_size INTEGER DEFAULT 11,
+        font_style TEXT DEFAULT 'normal',
+        color TEXT DEFAULT '#000000',
+        z_index INTEGER DEFAULT 0,
+        FOREIGN KEY (template_id) REFERENCES pdf_templates (id)
+    )''')
+
+
+def _m002_contatos_legados(conn, progresso, db_name):
+    """Mover a antiga coluna clientes.contato para a tabela contatos"""
+    if 'contato' not in _colunas(conn, 'clientes'):
+        return
+
+    print("Migrando estrutura antiga de clientes...")
+
+    # Cópia em lotes; o NOT EXISTS permite retomar uma migração interrompida
+    def copiar_lote(conn, primeiro, ultimo):
+        conn.execute("""
+            INSERT INTO contatos (cliente_id, nome, cargo, observacoes)
+            SELECT cl.id, cl.contato, 'Contato Principal', 'Migrado da estrutura anterior'
+            FROM clientes cl
+            WHERE cl.rowid BETWEEN ? AND ?
+            AND cl.contato IS NOT NULL AND cl.contato != ''
+            AND NOT EXISTS (
+                SELECT 1 FROM contatos ct
+                WHERE ct.cliente_id = cl.id AND ct.observacoes = 'Migrado da estrutura anterior'
+            )
+        """, (primeiro, ultimo))
+
+    executar_em_lotes(conn, 'clientes', copiar_lote, descricao="Contatos migrados",
+                      progresso=progresso, db_name=db_name)
+
+    # SQLite não suporta DROP COLUMN em versões antigas: recriar a tabela
+    with transaction(db_name, immediate=True):
+        if 'contato' not in _colunas(conn, 'clientes'):
+            # Recriada por outra estação durante a cópia
+            return
+        conn.execute('''CREATE TABLE IF NOT EXISTS clientes_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            nome_fantasia TEXT,
+            cnpj TEXT UNIQUE,
+            inscricao_estadual TEXT,
+            inscricao_municipal TEXT,
+            endereco TEXT,
+            numero TEXT,
+            complemento TEXT,
+            bairro TEXT,
+            cidade TEXT,
+            estado TEXT,
+            cep TEXT,
+            telefone TEXT,
+            email TEXT,
+            site TEXT,
+            prazo_pagamento TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''')
+        conn.execute("""
+            INSERT INTO clientes_new (id, nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, site, prazo_pagamento, created_at, updated_at)
+            SELECT id, nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, site, prazo_pagamento, created_at, updated_at
+            FROM clientes
+        """)
+        conn.execute("DROP TABLE clientes")
+        conn.execute("ALTER TABLE clientes_new RENAME TO clientes")
+
+    print("Migração concluída!")
+
+
+def _m003_colunas_adicionais(conn):
+    """Colunas acrescentadas depois da criação original das tabelas"""
+    _adicionar_coluna(conn, 'usuarios', 'template_personalizado', 'BOOLEAN DEFAULT 0')
+    _adicionar_coluna(conn, 'usuarios', 'template_image_path', 'TEXT')
+    _adicionar_coluna(conn, 'itens_cotacao', 'tipo_transacao', "TEXT DEFAULT 'Compra'")
+    _adicionar_coluna(conn, 'cotacoes', 'esboco_servico', 'TEXT')
+    _adicionar_coluna(conn, 'cotacoes', 'relacao_pecas_substituir', 'TEXT')
+    _adicionar_coluna(conn, 'cotacoes', 'filial_id', 'INTEGER DEFAULT 2')
+    # Antes verificadas a cada abertura dos módulos
+    _adicionar_coluna(conn, 'clientes', 'responsavel_id', 'INTEGER')
+    _adicionar_coluna(conn, 'cotacoes', 'responsavel_id', 'INTEGER')
+    _adicionar_coluna(conn, 'relatorios_tecnicos', 'responsavel_id', 'INTEGER')
+
+
+def _m004_usuarios_padrao(conn):
+    """Criar os usuários padrão (apenas uma vez)"""
+    usuarios = [
+        ('admin', 'admin123', 'admin', 'Administrador Master', 'admin@empresa.com', '(11) 99999-9999'),
+        ('master', 'master123', 'admin', 'Usuário Master', 'master@empresa.com', '(11) 98888-8888'),
+        # Usuários da empresa de compressores
+        ('valdir', 'valdir123', 'operador', 'Valdir', 'valdir@worldcompressores.com.br', '(11) 4543-6893'),
+        ('vagner', 'vagner123', 'operador', 'Vagner Cerqueira', 'vagner@worldcompressores.com.br', '(11) 4543-6894'),
+        ('rogerio', 'rogerio123', 'operador', 'Rogério Cerqueira', 'rogerio@worldcompressores.com.br', '(11) 4543-6895'),
+        ('raquel', 'raquel123', 'operador', 'Raquel', 'raquel@worldcompressores.com.br', '(11) 4543-6896'),
+        ('jaqueline', 'jaqueline123', 'operador', 'Jaqueline', 'jaqueline@worldcompressores.com.br', '(11) 4543-6897'),
+        ('adam', 'adam123', 'operador', 'Adam', 'adam@worldcompressores.com.br', '(11) 4543-6899'),
+        ('cicero', 'cicero123', 'operador', 'Cicero', 'cicero@worldcompressores.com.br', '(11) 4543-6898'),
+    ]
+    for username, password, role, nome, email, telefone in usuarios:
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        conn.execute(
+            "INSERT OR IGNORE INTO usuarios (username, password, role, nome_completo, email, telefone) VALUES (?, ?, ?, ?, ?, ?)",
+            (username, hashed_password, role, nome, email, telefone)
+        )
+
+
+def _m005_perfis(conn):
+    """Atualizar valores de role para os novos perfis"""
+    role_mapping = {
+        'operador': 'Operador',
+        'admin': 'Admin',
+        'tecnico': 'Técnico'
+    }
+    for old_role, new_role in role_mapping.items():
+        conn.execute("UPDATE usuarios SET role = ? WHERE role = ?", (new_role, old_role))
+
+    # Definir Admin como padrão para usuários sem role específica
+    conn.execute("UPDATE usuarios SET role = 'Admin' WHERE role NOT IN ('Técnico', 'Operador', 'Admin')")
+
+
+def _m006_indices(conn):
+    """Índices das chaves estrangeiras e filtros das consultas frequentes"""
+    sincronizar_indices(conn)
+    conn.execute("ANALYZE")
+
+
+# Normalização do CNPJ para o índice (apenas dígitos)
+_CNPJ_DIGITOS = "replace(replace(replace(replace(coalesce({0}, ''), '.', ''), '/', ''), '-', ''), ' ', '')"
+
+# Tokenização sem acentos; prefixos de 2 e 3 caracteres aceleram buscas parciais
+_OPCOES_FTS = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+
+def _m007_busca_textual(conn):
+    """Índices FTS5 de clientes, produtos e cotações, mantidos por triggers"""
+    # Clientes
+    conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        nome, nome_fantasia, cnpj, cidade, {_OPCOES_FTS}
+    )""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts (rowid, nome, nome_fantasia, cnpj, cidade)
+        VALUES (new.id, new.nome, new.nome_fantasia, {_CNPJ_DIGITOS.format('new.cnpj')}, new.cidade);
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE rowid = old.id;
+    END""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS clientes_fts_au
+    AFTER UPDATE OF nome, nome_fantasia, cnpj, cidade ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE rowid = old.id;
+        INSERT INTO clientes_fts (rowid, nome, nome_fantasia, cnpj, cidade)
+        VALUES (new.id, new.nome, new.nome_fantasia, {_CNPJ_DIGITOS.format('new.cnpj')}, new.cidade);
+    END""")
+    conn.execute(f"""INSERT INTO clientes_fts (rowid, nome, nome_fantasia, cnpj, cidade)
+        SELECT id, nome, nome_fantasia, {_CNPJ_DIGITOS.format('cnpj')}, cidade FROM clientes""")
+
+    # Produtos
+    conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+        nome, descricao, ncm, tipo, {_OPCOES_FTS}
+    )""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+        INSERT INTO produtos_fts (rowid, nome, descricao, ncm, tipo)
+        VALUES (new.id, new.nome, new.descricao, new.ncm, new.tipo);
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+        DELETE FROM produtos_fts WHERE rowid = old.id;
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS produtos_fts_au
+    AFTER UPDATE OF nome, descricao, ncm, tipo ON produtos BEGIN
+        DELETE FROM produtos_fts WHERE rowid = old.id;
+        INSERT INTO produtos_fts (rowid, nome, descricao, ncm, tipo)
+        VALUES (new.id, new.nome, new.descricao, new.ncm, new.tipo);
+    END""")
+    conn.execute("""INSERT INTO produtos_fts (rowid, nome, descricao, ncm, tipo)
+        SELECT id, nome, descricao, ncm, tipo FROM produtos""")
+
+    # Cotações (inclui o nome do cliente)
+    conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS cotacoes_fts USING fts5(
+        numero_proposta, modelo_compressor, numero_serie_compressor, cliente_nome, {_OPCOES_FTS}
+    )""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS cotacoes_fts_ai AFTER INSERT ON cotacoes BEGIN
+        INSERT INTO cotacoes_fts (rowid, numero_proposta, modelo_compressor, numero_serie_compressor, cliente_nome)
+        VALUES (new.id, new.numero_proposta, new.modelo_compressor, new.numero_serie_compressor,
+                (SELECT nome FROM clientes WHERE id = new.cliente_id));
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS cotacoes_fts_ad AFTER DELETE ON cotacoes BEGIN
+        DELETE FROM cotacoes_fts WHERE rowid = old.id;
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS cotacoes_fts_au
+    AFTER UPDATE OF numero_proposta, modelo_compressor, numero_serie_compressor, cliente_id ON cotacoes BEGIN
+        DELETE FROM cotacoes_fts WHERE rowid = old.id;
+        INSERT INTO cotacoes_fts (rowid, numero_proposta, modelo_compressor, numero_serie_compressor, cliente_nome)
+        VALUES (new.id, new.numero_proposta, new.modelo_compressor, new.numero_serie_compressor,
+                (SELECT nome FROM clientes WHERE id = new.cliente_id));
+    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS clientes_nome_cotacoes_fts_au AFTER UPDATE OF nome ON clientes BEGIN
+        UPDATE cotacoes_fts SET cliente_nome = new.nome
+        WHERE rowid IN (SELECT id FROM cotacoes WHERE cliente_id = new.id);
+    END""")
+    conn.execute("""INSERT INTO cotacoes_fts (rowid, numero_proposta, modelo_compressor, numero_serie_compressor, cliente_nome)
+        SELECT c.id, c.numero_proposta, c.modelo_compressor, c.numero_serie_compressor, cl.nome
+        FROM cotacoes c LEFT JOIN clientes cl ON cl.id = c.cliente_id""")
+
+    # Pesos do ranking (bm25) por coluna, na ordem de declaração
+    conn.execute("INSERT INTO clientes_fts (clientes_fts, rank) VALUES ('rank', 'bm25(10.0, 8.0, 5.0, 1.0)')")
+    conn.execute("INSERT INTO produtos_fts (produtos_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 5.0, 1.0)')")
+    conn.execute("INSERT INTO cotacoes_fts (cotacoes_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 8.0, 5.0)')")
+
+
+def _m008_indices_paginacao(conn):
+    """Índices das ordenações usadas pelas listagens paginadas"""
+    sincronizar_indices(conn)
+
+
+def _m009_fila_pdf(conn):
+    """Fila persistente de geração de PDFs (ver pdf_generators/fila.py)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS pdf_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL,
+        registro_id INTEGER NOT NULL,
+        usuario TEXT,
+        solicitado_por INTEGER,
+        maquina TEXT NOT NULL,
+        pid INTEGER,
+        status TEXT NOT NULL DEFAULT 'pendente',
+        paginas INTEGER NOT NULL DEFAULT 0,
+        caminho TEXT,
+        erro TEXT,
+        criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        iniciado_em TIMESTAMP,
+        concluido_em TIMESTAMP
+    )''')
+    sincronizar_indices(conn)
+
+
+def _m010_caminho_pdf_relatorios(conn):
+    """Caminho do último PDF gerado do relatório (como em cotacoes.caminho_arquivo_pdf)"""
+    _adicionar_coluna(conn, 'relatorios_tecnicos', 'caminho_arquivo_pdf', 'TEXT')
+
+
+def _m011_chave_pdf_cotacoes(conn):
+    """Chave do conteúdo do último PDF gerado (ver pdf_generators/cache_pdf.py)"""
+    _adicionar_coluna(conn, 'cotacoes', 'chave_pdf', 'TEXT')
+
+
+def _m012_versao_kits(conn):
+    """Contador de alterações da composição dos kits (invalida o cache de utils/kits.py)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS versoes_tabelas (
+        tabela TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL DEFAULT 0
+    )''')
+    conn.execute("INSERT OR IGNORE INTO versoes_tabelas (tabela, valor) VALUES ('kit_items', 0)")
+    incremento = "UPDATE versoes_tabelas SET valor = valor + 1 WHERE tabela = 'kit_items';"
+    for evento in ("INSERT", "DELETE", "UPDATE"):
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS kit_items_versao_{evento.lower()}
+            AFTER {evento} ON kit_items BEGIN {incremento} END""")
+    # A composição exibida usa o nome e o tipo dos produtos
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS produtos_versao_kits
+        AFTER UPDATE OF nome, tipo ON produtos BEGIN {incremento} END""")
+
+
+# Tabelas lidas pelo cache de utils/referencias.py e quantas alterações manter no registro
+TABELAS_REFERENCIA = ('clientes', 'produtos', 'usuarios')
+LIMITE_ALTERACOES_REFERENCIA = 5000
+
+
+def _m013_alteracoes_referencia(conn):
+    """Registro das linhas alteradas em clientes/produtos/usuários (atualização incremental do cache)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS alteracoes_referencia (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        registro_id INTEGER NOT NULL
+    )''')
+    for tabela in TABELAS_REFERENCIA:
+        for evento, linha in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {tabela}_alteracao_{evento.lower()}
+                AFTER {evento} ON {tabela} BEGIN
+                    INSERT INTO alteracoes_referencia (tabela, registro_id) VALUES ('{tabela}', {linha}.id);
+                END""")
+    # Só as alterações recentes são mantidas; quem ficou para trás recarrega a tabela inteira
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS alteracoes_referencia_limite
+        AFTER INSERT ON alteracoes_referencia BEGIN
+            DELETE FROM alteracoes_referencia WHERE seq <= new.seq - {LIMITE_ALTERACOES_REFERENCIA};
+        END""")
+
+
+def _m014_sequencias(conn):
+    """Contadores da numeração de propostas e relatórios (ver db/sequencias.py)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS sequencias (
+        nome TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL DEFAULT 0
+    )''')
+    # Continuar a numeração PROP-NNNNNN existente (números de data/hora da duplicação antiga não contam)
+    conn.execute("""
+        INSERT OR IGNORE INTO sequencias (nome, valor)
+        SELECT 'cotacao', COALESCE(MAX(CAST(SUBSTR(numero_proposta, 6) AS INTEGER)), 0)
+        FROM cotacoes
+        WHERE numero_proposta GLOB 'PROP-[0-9]*' AND length(numero_proposta) <= 15
+    """)
+
+
+def _m015_versao_registros(conn):
+    """Versão de cada registro editado em formulário (conflitos entre estações, ver db/concorrencia.py)"""
+    for tabela in ('clientes', 'cotacoes', 'relatorios_tecnicos'):
+        _adicionar_coluna(conn, tabela, 'versao', 'INTEGER NOT NULL DEFAULT 1')
+    _adicionar_coluna(conn, 'usuarios', 'versao_permissoes', 'INTEGER NOT NULL DEFAULT 1')
+
+
+def _m016_sequencias_relatorios(conn):
+    """Continuar a numeração REL-aaaa-NNNN de cada ano a partir dos números já gravados"""
+    conn.execute("""
+        INSERT INTO sequencias (nome, valor)
+        SELECT 'relatorio/ano=' || substr(numero_relatorio, 5, 4),
+               MAX(CAST(substr(numero_relatorio, 10) AS INTEGER))
+        FROM relatorios_tecnicos
+        WHERE numero_relatorio GLOB 'REL-[0-9][0-9][0-9][0-9]-[0-9]*' AND length(numero_relatorio) <= 18
+        GROUP BY substr(numero_relatorio, 5, 4)
+        ON CONFLICT(nome) DO UPDATE SET valor = MAX(valor, excluded.valor)
+    """)
+
+
+
+def _m017_indices_cache_pdf(conn):
+    """Índices de chave_pdf e caminho_arquivo_pdf (ver db/indices.py)"""
+    sincronizar_indices(conn)
+
+
+MIGRACOES = [
+    Migracao(1, "Esquema inicial", _m001_esquema_inicial, False),
+    Migracao(2, "Contatos da estrutura antiga de clientes", _m002_contatos_legados, True),
+    Migracao(3, "Colunas adicionais", _m003_colunas_adicionais, False),
+    Migracao(4, "Usuários padrão", _m004_usuarios_padrao, False),
+    Migracao(5, "Perfis de usuário", _m005_perfis, False),
+    Migracao(6, "Índices das consultas frequentes", _m006_indices, False),
+    Migracao(7, "Busca textual (FTS5)", _m007_busca_textual, False),
+    Migracao(8, "Índices das listagens paginadas", _m008_indices_paginacao, False),
+    Migracao(9, "Fila de geração de PDFs", _m009_fila_pdf, False),
+    Migracao(10, "Caminho do PDF dos relatórios", _m010_caminho_pdf_relatorios, False),
+    Migracao(11, "Cache dos PDFs de cotação", _m011_chave_pdf_cotacoes, False),
+    Migracao(12, "Versão da composição dos kits", _m012_versao_kits, False),
+    Migracao(13, "Registro de alterações das tabelas de referência", _m013_alteracoes_referencia, False),
+    Migracao(14, "Numeração sequencial de propostas e relatórios", _m014_sequencias, False),
+    Migracao(15, "Versão dos registros para detectar alterações concorrentes", _m015_versao_registros, False),
+    Migracao(16, "Numeração dos relatórios a partir dos números existentes", _m016_sequencias_relatorios, False),
+    Migracao(17, "Índices do cache dos PDFs de cotação", _m017_indices_cache_pdf, False),
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1].versao
+
+
+def versao_atual(db_name=None):
+    """Versão do esquema gravada no banco"""
+    return get_connection(db_name).execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(db_name=None, progresso=progresso_console):
+    """
+    Aplicar as migrações pendentes. Retorna a quantidade aplicada.
+
+    Caminho rápido: quando user_version já é a última versão, apenas um
+    PRAGMA de leitura é executado.
+    """
+    conn = get_connection(db_name)
+    versao = versao_atual(db_name)
+    if versao >= VERSAO_ESQUEMA:
+        return 0
+
+    pendentes = [m for m in MIGRACOES if m.versao > versao]
+    print(f"Atualizando esquema do banco: versão {versao} -> {VERSAO_ESQUEMA}")
+
+    # Outra estação pode estar atualizando o mesmo banco: a versão é relida com o
+    # lock de escrita (BEGIN IMMEDIATE) e migrações já aplicadas por ela são puladas
+    aplicadas = 0
+    # Recriação de tabelas exige FKs desligadas (só pode ser alterado fora de transação)
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for migracao in pendentes:
+            if migracao.em_lotes:
+                # Controla as próprias transações (e é idempotente): só evita repetir a já concluída
+                if versao_atual(db_name) >= migracao.versao:
+                    continue
+                print(f" - Migração {migracao.versao}/{VERSAO_ESQUEMA}: {migracao.descricao}")
+                migracao.funcao(conn, progresso, db_name)
+                with transaction(db_name, immediate=True):
+                    if versao_atual(db_name) < migracao.versao:
+                        conn.execute(f"PRAGMA user_version = {migracao.versao}")
+            else:
+                with transaction(db_name, immediate=True):
+                    if versao_atual(db_name) >= migracao.versao:
+                        continue
+                    print(f" - Migração {migracao.versao}/{VERSAO_ESQUEMA}: {migracao.descricao}")
+                    migracao.funcao(conn)
+                    conn.execute(f"PRAGMA user_version = {migracao.versao}")
+            aplicadas += 1
+    except sqlite3.Error as e:
+        print(f"❌ Erro na migração do banco: {e}")
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+
+    return aplicadas
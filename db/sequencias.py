@@ -0,0 +1,77 @@
+"""
+Numeração sequencial de propostas e relatórios (tabela sequencias, migração 14).
+
+Cada número é reservado em uma transação curta BEGIN IMMEDIATE que
+incrementa o contador da sequência, então estações diferentes nunca
+recebem o mesmo número e não há leitura das cotações/relatórios existentes.
+Se o banco estiver bloqueado a transação é repetida (ver db/concorrencia.py).
+
+    numero = sequencias.reservar('cotacao', filial_id=2)    # 'PROP-000124'
+    sequencias.previsao('cotacao', filial_id=2)              # sem reservar
+
+A previsão serve para mostrar o número no formulário; a reserva só é feita
+ao salvar, para não consumir números de formulários abandonados.
+
+O formato de cada tipo define o modelo do número e o escopo da sequência:
+com 'ano' e/ou 'filial' no escopo, cada ano/filial tem a própria contagem
+(o modelo pode usar {ano} e {filial} como prefixo). Números já gravados na
+coluna do formato (ex.: digitados à mão) são pulados.
+"""
+from collections import namedtuple
+from datetime import date
+
+from utils import perf
+
+from . import concorrencia
+from .connection import get_connection
+
+# Modelo do número, escopo da contagem e coluna onde os números são gravados
+Formato = namedtuple('Formato', ['modelo', 'escopo', 'tabela', 'coluna'])
+
+FORMATOS = {
+    'cotacao': Formato("PROP-{numero:06d}", (), 'cotacoes', 'numero_proposta'),
+    'relatorio': Formato("REL-{ano}-{numero:04d}", ('ano',), 'relatorios_tecnicos', 'numero_relatorio'),
+}
+
+
+def _partes(tipo, filial_id, data):
+    formato = FORMATOS[tipo]
+    valores = {'ano': (data or date.today()).year, 'filial': filial_id or 0}
+    nome = tipo + "".join(f"/{chave}={valores[chave]}" for chave in formato.escopo)
+    return formato, nome, valores
+
+
+def _em_uso(conn, formato, numero):
+    return conn.execute(
+        f"SELECT 1 FROM {formato.tabela} WHERE {formato.coluna} = ?", (numero,)
+    ).fetchone() is not None
+
+
+def reservar(tipo, filial_id=None, data=None, db_name=None):
+    """Reservar e devolver o próximo número formatado do tipo ('cotacao' ou 'relatorio')"""
+    formato, nome, valores = _partes(tipo, filial_id, data)
+
+    def incrementar(conn):
+        while True:
+            conn.execute("""
+                INSERT INTO sequencias (nome, valor) VALUES (?, 1)
+                ON CONFLICT(nome) DO UPDATE SET valor = valor + 1
+            """, (nome,))
+            valor = conn.execute("SELECT valor FROM sequencias WHERE nome = ?", (nome,)).fetchone()[0]
+            numero = formato.modelo.format(numero=valor, **valores)
+            if not _em_uso(conn, formato, numero):
+                return numero
+            perf.incrementar("sequencias.numeros_em_uso")
+
+    return concorrencia.executar(incrementar, db_name)
+
+
+def previsao(tipo, filial_id=None, data=None, db_name=None):
+    """Número que a próxima reserva deve receber (pode mudar se outra estação reservar antes)"""
+    formato, nome, valores = _partes(tipo, filial_id, data)
+    conn = get_connection(db_name)
+    row = conn.execute("SELECT valor FROM sequencias WHERE nome = ?", (nome,)).fetchone()
+    valor = (row[0] if row else 0) + 1
+    while _em_uso(conn, formato, formato.modelo.format(numero=valor, **valores)):
+        valor += 1
+    return formato.modelo.format(numero=valor, **valores)
@@ -0,0 +1,147 @@
+"""
+Verificação dos planos de consulta.
+
+Percorre o código-fonte, extrai as instruções SQL escritas como literais e
+executa EXPLAIN QUERY PLAN de cada uma sobre um banco em memória com o
+esquema atual (todas as migrações aplicadas). Falha quando uma consulta
+filtrada (WHERE/JOIN) faz SCAN completo de uma tabela grande.
+
+Uso:
+    python -m db.verificar_consultas [--verbose] [diretórios...]
+"""
+import ast
+import os
+import re
+import sqlite3
+import sys
+
+from .connection import get_connection, close_connection
+from .migrations import aplicar_migracoes
+
+# Tabelas que crescem com o histórico de uso
+TABELAS_GRANDES = {
+    "itens_cotacao",
+    "cotacoes",
+    "contatos",
+    "eventos_campo",
+    "relatorios_tecnicos",
+    "clientes",
+    "kit_items",
+}
+
+# Consultas em que a leitura completa é intencional (início do SQL normalizado -> motivo)
+PERMITIDAS = {
+    "SELECT estado, COUNT(*) as total FROM clientes":
+        "agregação sobre todos os clientes",
+    "SELECT COALESCE(AVG(valor_total), 0) FROM cotacoes":
+        "agregação sobre todas as cotações",
+}
+
+DIRETORIOS_PADRAO = ("interface", "pdf_generators", "utils", "db")
+
+_INICIO_SQL = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_FILTRO = re.compile(r"\b(WHERE|ON)\b", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (\w+)")
+_BINDINGS = re.compile(r"uses (\d+)")
+
+
+def extrair_consultas(diretorios):
+    """Retornar [(arquivo, linha, sql)] dos literais SQL encontrados"""
+    consultas = []
+    for diretorio in diretorios:
+        for raiz, _, arquivos in os.walk(diretorio):
+            for nome in sorted(arquivos):
+                if not nome.endswith(".py"):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                with open(caminho, encoding="utf-8") as f:
+                    try:
+                        arvore = ast.parse(f.read(), caminho)
+                    except SyntaxError:
+                        continue
+                for no in ast.walk(arvore):
+                    if (isinstance(no, ast.Constant) and isinstance(no.value, str)
+                            and _INICIO_SQL.match(no.value)):
+                        consultas.append((caminho, no.lineno, no.value))
+    return consultas
+
+
+def plano(conn, sql):
+    """Linhas de EXPLAIN QUERY PLAN (parâmetros ligados como NULL)"""
+    parametros = ()
+    for _ in range(2):
+        try:
+            return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+        except sqlite3.ProgrammingError as e:
+            encontrado = _BINDINGS.search(str(e))
+            if not encontrado:
+                raise
+            parametros = (None,) * int(encontrado.group(1))
+    raise sqlite3.ProgrammingError(f"Parâmetros não resolvidos: {sql}")
+
+
+def varreduras_grandes(linhas_plano):
+    """Tabelas grandes lidas por SCAN completo no plano"""
+    tabelas = []
+    for linha in linhas_plano:
+        encontrado = _SCAN.match(linha)
+        if encontrado and encontrado.group(1) in TABELAS_GRANDES:
+            tabelas.append(encontrado.group(1))
+    return tabelas
+
+
+def _normalizar(sql):
+    return " ".join(sql.split())
+
+
+def permitida(sql):
+    """Verificar se a consulta está na lista de varreduras intencionais"""
+    normalizado = _normalizar(sql)
+    return any(normalizado.startswith(prefixo) for prefixo in PERMITIDAS)
+
+
+def verificar(diretorios=DIRETORIOS_PADRAO, verbose=False):
+    """Retornar a lista de problemas [(arquivo, linha, sql, tabelas)]"""
+    db_name = ":memory:"
+    aplicar_migracoes(db_name, progresso=None)
+    conn = get_connection(db_name)
+    problemas = []
+    ignoradas = 0
+    try:
+        for caminho, linha, sql in extrair_consultas(diretorios):
+            try:
+                linhas_plano = plano(conn, sql)
+            except sqlite3.Error:
+                # SQL montado dinamicamente ou de tabelas fora do esquema
+                ignoradas += 1
+                continue
+            tabelas = varreduras_grandes(linhas_plano)
+            if verbose:
+                print(f"{caminho}:{linha}: {' | '.join(linhas_plano)}")
+            if tabelas and _FILTRO.search(sql) and not permitida(sql):
+                problemas.append((caminho, linha, sql, tabelas))
+    finally:
+        close_connection(db_name)
+    if verbose:
+        print(f"{ignoradas} consultas ignoradas (não analisáveis isoladamente)")
+    return problemas
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    verbose = "--verbose" in argv
+    diretorios = [a for a in argv if not a.startswith("--")] or DIRETORIOS_PADRAO
+
+    problemas = verificar(diretorios, verbose)
+    for caminho, linha, sql, tabelas in problemas:
+        consulta = _normalizar(sql)
+        print(f"❌ {caminho}:{linha}: SCAN em {', '.join(tabelas)}\n   {consulta[:160]}")
+    if problemas:
+        print(f"\n{len(problemas)} consulta(s) filtrada(s) com varredura completa de tabela grande")
+        return 1
+    print("✅ Nenhuma varredura completa em consultas filtradas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
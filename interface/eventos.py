@@ -0,0 +1,195 @@
+"""
+Barramento de eventos entre os módulos da janela principal.
+
+    self.emit_event('cotacao_created', ids=[cotacao_id])
+
+Os eventos não são entregues na hora: os emitidos em sequência (um salvar
+que emite vários eventos, várias exclusões seguidas) são agrupados e
+entregues juntos ATRASO_MS depois do último, uma vez por tipo, com os ids
+de todas as emissões. Módulos de abas não visíveis só recebem os eventos
+quando a aba é mostrada, também agrupados.
+
+Os handlers continuam com a assinatura handle_event(event_type, data); data é
+um Evento. Recargas pedidas com agendar() durante a entrega rodam uma única
+vez por entrega, mesmo que vários eventos as peçam. O tempo de cada handler
+é registrado como span "evento.<handler>" (ver utils/perf.py).
+"""
+import logging
+import time
+from collections import namedtuple
+
+from utils import perf
+
+logger = logging.getLogger(__name__)
+
+# Espera após o último evento (um quadro) e espera máxima desde o primeiro
+ATRASO_MS = 16
+ESPERA_MAXIMA_MS = 100
+
+# Tipos de evento e o que os ids identificam
+TIPOS = {
+    'cliente_created': 'clientes',
+    'cliente_deleted': 'clientes',
+    'produto_created': 'produtos',
+    'tecnico_created': 'tecnicos',
+    'tecnico_deleted': 'tecnicos',
+    'cotacao_created': 'cotacoes',
+    'cotacao_updated': 'cotacoes',
+    'cotacao_deleted': 'cotacoes',
+    'relatorio_created': 'relatorios_tecnicos',
+    'relatorio_deleted': 'relatorios_tecnicos',
+    'pdf_gerado': 'pdf_jobs',
+    'refresh_dashboard': None,
+}
+
+# tipo; ids (frozenset) de todas as emissões agrupadas; dados da última emissão; número de emissões
+Evento = namedtuple('Evento', ['tipo', 'ids', 'dados', 'emissoes'])
+
+
+def _juntar(anterior, evento):
+    """Evento agrupado de anterior (ou None) com evento do mesmo tipo"""
+    if anterior is None:
+        return evento
+    dados = evento.dados if evento.dados is not None else anterior.dados
+    return Evento(evento.tipo, anterior.ids | evento.ids, dados, anterior.emissoes + evento.emissoes)
+
+
+def _nome(handler):
+    return getattr(handler, '__qualname__', None) or type(handler).__name__
+
+
+class Ouvinte:
+    """Handler registrado: aba (None = sempre visível), imediato e eventos guardados enquanto oculto"""
+
+    __slots__ = ('handler', 'aba', 'imediato', 'pendentes')
+
+    def __init__(self, handler, aba=None, imediato=False):
+        self.handler = handler
+        self.aba = aba
+        self.imediato = imediato
+        self.pendentes = {}
+
+
+class BarramentoEventos:
+    """
+    Barramento agrupado da janela principal. aba_visivel(aba) diz se a aba de
+    um ouvinte está sendo mostrada; sem root (uso isolado) a entrega é imediata.
+    """
+
+    def __init__(self, root=None, aba_visivel=None):
+        self.root = root
+        self.aba_visivel = aba_visivel or (lambda aba: True)
+        self.ouvintes = []
+        self._fila = {}
+        self._agendamento = None
+        self._primeira_emissao = None
+        self._recargas = None
+
+    def registrar(self, handler, aba=None, imediato=False):
+        """Registrar handler(event_type, evento); imediato recebe cada emissão na hora (ex.: invalidar caches)"""
+        self.ouvintes.append(Ouvinte(handler, None if aba is None else str(aba), imediato))
+
+    def emitir(self, tipo, dados=None, ids=()):
+        if tipo not in TIPOS:
+            logger.warning("Evento desconhecido: %s", tipo)
+        if ids is None:
+            ids = ()
+        elif isinstance(ids, int):
+            ids = (ids,)
+        perf.incrementar("eventos.emitidos")
+        evento = Evento(tipo, frozenset(ids), dados, 1)
+        for ouvinte in self.ouvintes:
+            if ouvinte.imediato:
+                self._chamar(ouvinte.handler, evento)
+        self._fila[tipo] = _juntar(self._fila.get(tipo), evento)
+
+        if self.root is None:
+            self.entregar()
+            return
+        agora = time.monotonic()
+        if self._agendamento is not None:
+            # Adiar a entrega até o fim da sequência, sem passar da espera máxima
+            if (agora - self._primeira_emissao) * 1000 >= ESPERA_MAXIMA_MS:
+                return
+            self.root.after_cancel(self._agendamento)
+        else:
+            self._primeira_emissao = agora
+        self._agendamento = self.root.after(ATRASO_MS, self.entregar)
+
+    def entregar(self):
+        """Entregar os eventos agrupados aos ouvintes visíveis e guardar os dos ocultos"""
+        self._agendamento = None
+        eventos, self._fila = self._fila, {}
+        if not eventos:
+            return
+        perf.incrementar("eventos.entregas")
+        with self._coletar_recargas():
+            for ouvinte in self.ouvintes:
+                if ouvinte.imediato:
+                    continue
+                if ouvinte.aba is not None and not self.aba_visivel(ouvinte.aba):
+                    for tipo, evento in eventos.items():
+                        ouvinte.pendentes[tipo] = _juntar(ouvinte.pendentes.get(tipo), evento)
+                    continue
+                for evento in eventos.values():
+                    self._chamar(ouvinte.handler, evento)
+
+    def aba_mostrada(self, aba):
+        """Entregar os eventos guardados para os ouvintes da aba que passou a ser mostrada"""
+        aba = str(aba)
+        with self._coletar_recargas():
+            for ouvinte in self.ouvintes:
+                if ouvinte.aba == aba and ouvinte.pendentes:
+                    eventos, ouvinte.pendentes = ouvinte.pendentes, {}
+                    for evento in eventos.values():
+                        self._chamar(ouvinte.handler, evento)
+
+    def agendar(self, funcao):
+        """
+        Rodar funcao ao fim da entrega atual, uma única vez mesmo se pedida por
+        vários eventos (fora de uma entrega, roda na hora)
+        """
+        if self._recargas is None:
+            with perf.span(f"evento.{_nome(funcao)}"):
+                funcao()
+        elif funcao not in self._recargas:
+            self._recargas.append(funcao)
+        else:
+            perf.incrementar("eventos.recargas_evitadas")
+
+    def _coletar_recargas(self):
+        return _Recargas(self)
+
+    def _chamar(self, handler, evento):
+        try:
+            with perf.span(f"evento.{_nome(handler)}", tipo=evento.tipo, ids=len(evento.ids)):
+                handler(evento.tipo, evento)
+        except Exception:
+            logger.exception("Erro ao processar evento %s", evento.tipo)
+
+
+class _Recargas:
+    """Contexto de uma entrega: acumula as recargas agendadas e as roda no fim"""
+
+    __slots__ = ('barramento', 'externo')
+
+    def __init__(self, barramento):
+        self.barramento = barramento
+
+    def __enter__(self):
+        self.externo = self.barramento._recargas is not None
+        if not self.externo:
+            self.barramento._recargas = []
+        return self
+
+    def __exit__(self, *_erro):
+        if self.externo:
+            return False
+        recargas, self.barramento._recargas = self.barramento._recargas, None
+        for funcao in recargas:
+            try:
+                with perf.span(f"evento.{_nome(funcao)}"):
+                    funcao()
+            except Exception:
+                logger.exception("Erro ao atualizar após eventos (%s)", _nome(funcao))
+        return False
@@ -3,9 +3,7 @@ from tkinter import ttk, messagebox
 import sqlite3
 import hashlib
 import os
-
-# Database configuration
-DB_NAME = "crm_database.db"
+from db import get_connection, aplicar_migracoes
 
 class LoginWindow:
     def __init__(self, root=None):
@@ -187,43 +185,14 @@ class LoginWindow:
         self.password_var.set("admin123")
         
     def init_database(self):
-        """Initialize database with default user if needed"""
+        """Ensure the database schema is up to date (no-op when already migrated)"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            
-            # Create users table if it doesn't exist
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    role TEXT NOT NULL DEFAULT 'user',
-                    nome_completo TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Check if admin user exists
-            c.execute("SELECT COUNT(*) FROM usuarios WHERE username = 'admin'")
-            if c.fetchone()[0] == 0:
-                # Create default admin user
-                admin_password = hashlib.sha256("admin123".encode()).hexdigest()
-                c.execute('''
-                    INSERT INTO usuarios (username, password, role, nome_completo)
-                    VALUES (?, ?, ?, ?)
-                ''', ("admin", admin_password, "admin", "Administrador"))
-                
-                print("Default admin user created: admin/admin123")
-            
-            conn.commit()
+            aplicar_migracoes()
             self.status_label.config(text="Database initialized successfully", fg='#10b981')
             
         except sqlite3.Error as e:
             self.status_label.config(text=f"Database error: {e}", fg='#ef4444')
             print(f"Database error: {e}")
-        finally:
-            conn.close()
             
     def login(self):
         """Handle login attempt"""
@@ -235,8 +204,7 @@ class LoginWindow:
             return
             
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            c = get_connection().cursor()
             
             password_hash = hashlib.sha256(password.encode()).hexdigest()
             c.execute(
@@ -275,9 +243,6 @@ class LoginWindow:
             messagebox.showerror("Erro", f"Erro inesperado: {e}")
             if hasattr(self, 'status_label') and self.status_label.winfo_exists():
                 self.status_label.config(text="❌ Erro inesperado", fg='#ef4444')
-        finally:
-            if 'conn' in locals():
-                conn.close()
             
     def open_main_window(self, user_id, role, nome_completo):
         """Open the main application window"""
@@ -1,6 +1,38 @@
+import logging
 import tkinter as tk
+from collections import namedtuple
 from tkinter import ttk, messagebox
-from interface.modules import CotacoesModule, RelatoriosTecnicosModule, ClientesModule, ProdutosModule, UsuariosModule, DashboardModule, PermissoesModule, EditorTemplatePDFModule, ConsultasModule
+from pdf_generators.fila import obter_fila, enfileirar, PENDENTE, CONCLUIDO, ERRO
+from utils import agregados, perfil, referencias
+from interface import modules
+from interface.eventos import BarramentoEventos
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de acompanhamento da fila de PDFs
+INTERVALO_FILA_PDF_MS = 500
+
+NOMES_PDF = {'cotacao': "Proposta", 'relatorio': "Relatório"}
+
+# Abas da janela principal, na ordem de exibição. Cada módulo é importado e criado na
+# primeira seleção da aba; pre_aquecer cria o módulo antes, quando a interface estiver
+# ociosa após o login. classe é o nome em interface.modules.
+AbaModulo = namedtuple('AbaModulo', ['atributo', 'titulo', 'classe', 'somente_admin', 'pre_aquecer'])
+ABAS = (
+    AbaModulo('dashboard_module', "📊 Dashboard", 'DashboardModule', False, True),
+    AbaModulo('clientes_module', "👥 Clientes", 'ClientesModule', False, True),
+    AbaModulo('produtos_module', "📦 Produtos", 'ProdutosModule', False, True),
+    AbaModulo('cotacoes_module', "💰 Cotações", 'CotacoesModule', False, True),
+    AbaModulo('relatorios_module', "📋 Relatórios Técnicos", 'RelatoriosTecnicosModule', False, True),
+    AbaModulo('consultas_module', "🔍 Consultas", 'ConsultasModule', False, True),
+    AbaModulo('usuarios_module', "👤 Usuários", 'UsuariosModule', True, False),
+    AbaModulo('permissoes_module', "🔐 Permissões", 'PermissoesModule', True, False),
+    AbaModulo('editor_avancado_module', "🎨 Editor Templates", 'EditorTemplatePDFModule', False, False),
+)
+
+# Criação dos módulos em segundo plano: espera após o login e intervalo entre módulos
+ATRASO_PRE_AQUECIMENTO_MS = 1500
+INTERVALO_PRE_AQUECIMENTO_MS = 200
 
 class MainWindow:
     def __init__(self, root, user_id, role, nome_completo):
@@ -9,8 +41,24 @@ class MainWindow:
         self.role = role
         self.nome_completo = nome_completo
         
-        # Sistema de eventos para comunicação entre módulos
-        self.event_listeners = []
+        # Sistema de eventos para comunicação entre módulos (agrupados; ver interface/eventos.py)
+        self.eventos = BarramentoEventos(root, self.aba_visivel)
+        # Indicadores em cache são invalidados na emissão, antes de qualquer módulo recarregar
+        self.register_listener(agregados.ao_evento, imediato=True)
+        self.register_listener(referencias.ao_evento, imediato=True)
+        
+        # Abas já abertas (a primeira abertura é uma fase do modo de perfil) e captura manual (F12)
+        self.abas_abertas = set()
+        self.captura_perfil = None
+        
+        # Fila de geração de PDFs (jobs interrompidos no último encerramento voltam à fila)
+        self.fila_pdf = obter_fila()
+        try:
+            retomados = self.fila_pdf.retomar()
+            if retomados:
+                logger.info("%s PDF(s) interrompido(s) voltaram à fila", retomados)
+        except Exception:
+            logger.exception("Erro ao retomar fila de PDFs")
         
         self.setup_main_window()
         self.create_main_ui()
@@ -36,28 +84,35 @@ class MainWindow:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
         
-    def register_listener(self, listener_func):
-        """Registrar um listener para eventos do sistema"""
-        self.event_listeners.append(listener_func)
+    def register_listener(self, listener_func, aba=None, imediato=False):
+        """Registrar um listener para eventos do sistema (aba: só recebe quando ela estiver visível)"""
+        self.eventos.registrar(listener_func, aba, imediato)
         
-    def emit_event(self, event_type, data=None):
-        """Emitir um evento para todos os listeners"""
-        for listener in self.event_listeners:
-            try:
-                listener(event_type, data)
-            except Exception as e:
-                print(f"Erro ao processar evento {event_type}: {e}")
+    def emit_event(self, event_type, data=None, ids=()):
+        """Emitir um evento; a entrega aos listeners é agrupada e feita no próximo quadro"""
+        self.eventos.emitir(event_type, data, ids)
+    
+    def aba_visivel(self, aba):
+        """Indica se a aba (frame no notebook) está selecionada; frames fora do notebook contam como visíveis"""
+        notebook = getattr(self, 'notebook', None)
+        if notebook is None or aba not in getattr(self, 'abas', {}):
+            return True
+        return str(notebook.select()) == aba
         
     def create_main_ui(self):
         # Frame superior com menu
         self.create_header()
         
+        # Barra de status (fila de PDFs)
+        self.create_status_bar()
+        
         # Notebook para abas
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         
         # Criar módulos
-        self.create_modules()
+        with perfil.fase("create_modules"):
+            self.create_modules()
         
     def create_header(self):
         """Criar cabeçalho com informações do usuário e botões"""
@@ -97,74 +152,160 @@ class MainWindow:
                               command=self.logout)
         logout_btn.pack(anchor="e", pady=(5, 0))
         
+    def create_status_bar(self):
+        """Criar barra de status com o andamento da fila de PDFs"""
+        status_frame = tk.Frame(self.root, bg='#e2e8f0', height=24)
+        status_frame.pack(side="bottom", fill="x")
+        status_frame.pack_propagate(False)
+        
+        self.status_label = tk.Label(status_frame,
+                                     text="",
+                                     font=('Arial', 9),
+                                     bg='#e2e8f0',
+                                     fg='#334155',
+                                     anchor="w")
+        self.status_label.pack(side="left", fill="x", padx=10)
+        
+        # F12: capturar o perfil de uma ação (ver utils/perfil.py)
+        self.root.bind("<F12>", self.alternar_captura_perfil)
+        
+        self.root.after(INTERVALO_FILA_PDF_MS, self.acompanhar_fila_pdf)
+        
+    def alternar_captura_perfil(self, event=None):
+        """Iniciar ou parar a captura de perfil em torno de uma ação"""
+        if self.captura_perfil is None:
+            captura = perfil.Captura("captura")
+            if not captura.iniciar():
+                self.status_label.config(text="⏱️ Já existe uma captura de perfil em andamento")
+                return
+            self.captura_perfil = captura
+            self.status_label.config(text="⏺ Capturando perfil — execute a ação e pressione F12 para parar")
+            return
+        
+        captura, self.captura_perfil = self.captura_perfil, None
+        try:
+            arquivo_prof, _arquivo_pilhas, segundos = captura.parar()
+        except OSError as e:
+            self.status_label.config(text="❌ Falha ao gravar o perfil")
+            messagebox.showerror("Erro", f"Erro ao gravar o perfil: {e}")
+            return
+        self.status_label.config(text=f"⏹ Perfil de {segundos:.1f} s salvo em {arquivo_prof}")
+        
+    def enfileirar_pdf(self, tipo, registro_id, usuario=None):
+        """Colocar um PDF na fila de geração e devolver o id do job"""
+        job_id = enfileirar(tipo, registro_id, usuario, self.user_id, self.fila_pdf.db_name)
+        self.status_label.config(text=f"📄 Na fila de PDFs: {NOMES_PDF[tipo]} {registro_id}")
+        # Enviar imediatamente, sem esperar o próximo ciclo
+        self.acompanhar_fila_pdf(reagendar=False)
+        return job_id
+        
+    def acompanhar_fila_pdf(self, reagendar=True):
+        """Enviar PDFs pendentes ao pool e mostrar o andamento na barra de status"""
+        if not self.status_label.winfo_exists():
+            return
+        try:
+            jobs = self.fila_pdf.processar()
+        except Exception:
+            logger.exception("Erro ao acompanhar fila de PDFs")
+            jobs = []
+        
+        ativos = []
+        for job in jobs:
+            nome = f"{NOMES_PDF.get(job['tipo'], 'PDF')} {job['registro_id']}"
+            if job['status'] == CONCLUIDO:
+                self.status_label.config(text=f"✅ {nome} gerado: {job['caminho']}")
+                self.emit_event('pdf_gerado', job)
+            elif job['status'] == ERRO:
+                self.status_label.config(text=f"❌ Falha ao gerar {nome}")
+                messagebox.showerror("Erro", f"Erro ao gerar PDF ({nome}): {job['erro']}")
+            else:
+                ativos.append((job, nome))
+        
+        if ativos:
+            job, nome = next(((j, n) for j, n in ativos if j['status'] != PENDENTE), ativos[0])
+            texto = f"📄 PDFs na fila: {len(ativos)}"
+            if job['status'] != PENDENTE:
+                texto += f" — {nome}: página {job['paginas']}"
+            self.status_label.config(text=texto)
+        
+        if reagendar:
+            self.root.after(INTERVALO_FILA_PDF_MS, self.acompanhar_fila_pdf)
+        
     def create_modules(self):
-        """Criar todos os módulos do sistema"""
-        
-        # Dashboard
-        dashboard_frame = tk.Frame(self.notebook)
-        self.notebook.add(dashboard_frame, text="📊 Dashboard")
-        self.dashboard_module = DashboardModule(dashboard_frame, self.user_id, self.role, self)
-        
-        # Clientes
-        clientes_frame = tk.Frame(self.notebook)
-        self.notebook.add(clientes_frame, text="👥 Clientes")
-        self.clientes_module = ClientesModule(clientes_frame, self.user_id, self.role, self)
-        
-        # Produtos
-        produtos_frame = tk.Frame(self.notebook)
-        self.notebook.add(produtos_frame, text="📦 Produtos")
-        self.produtos_module = ProdutosModule(produtos_frame, self.user_id, self.role, self)
-        
-        # Cotações
-        cotacoes_frame = tk.Frame(self.notebook)
-        self.notebook.add(cotacoes_frame, text="💰 Cotações")
-        self.cotacoes_module = CotacoesModule(cotacoes_frame, self.user_id, self.role, self)
-        
-        # Relatórios Técnicos
-        relatorios_frame = tk.Frame(self.notebook)
-        self.notebook.add(relatorios_frame, text="📋 Relatórios Técnicos")
-        self.relatorios_module = RelatoriosTecnicosModule(relatorios_frame, self.user_id, self.role, self)
-        
-        # Consultas (antigo Relatórios Gerais)
-        consultas_frame = tk.Frame(self.notebook)
-        self.notebook.add(consultas_frame, text="🔍 Consultas")
-        self.consultas_module = ConsultasModule(consultas_frame, self.user_id, self.role, self)
-        
-        # Usuários (apenas para admins)
-        if self.role == 'admin':
-            usuarios_frame = tk.Frame(self.notebook)
-            self.notebook.add(usuarios_frame, text="👤 Usuários")
-            self.usuarios_module = UsuariosModule(usuarios_frame, self.user_id, self.role, self)
-            
-            # Permissões (apenas para admins)
-            permissoes_frame = tk.Frame(self.notebook)
-            self.notebook.add(permissoes_frame, text="🔐 Permissões")
-            self.permissoes_module = PermissoesModule(permissoes_frame, self.user_id, self.role, self)
-            
-
+        """
+        Registrar as abas de ABAS. O módulo da aba inicial é criado agora; os
+        demais na primeira vez que a aba é selecionada ou, se pre_aquecer,
+        em segundo plano quando a interface estiver ociosa. Módulos ainda não
+        criados não recebem eventos: ao serem criados já leem o estado atual.
+        """
+        self.abas = {}  # aba (caminho do frame no notebook) -> (AbaModulo, frame)
+        self.abas_com_erro = set()
+        for aba in ABAS:
+            if aba.somente_admin and self.role.lower() != 'admin':
+                continue
+            frame = tk.Frame(self.notebook)
+            self.notebook.add(frame, text=aba.titulo)
+            setattr(self, aba.atributo, None)
+            self.abas[str(frame)] = (aba, frame)
+        
+        inicial = str(self.notebook.select())
+        self.abas_abertas.add(inicial)
+        self.carregar_aba(inicial)
         
-        # Editor de PDF Avançado (carregamento sob demanda)
-        editor_avancado_frame = tk.Frame(self.notebook)
-        self.notebook.add(editor_avancado_frame, text="🎨 Editor Templates")
-        self.editor_avancado_module = None  # Será carregado quando necessário
-        self.editor_avancado_frame = editor_avancado_frame
+        # Criar os módulos das demais abas quando a interface estiver ociosa
+        self.root.after(ATRASO_PRE_AQUECIMENTO_MS, self.pre_aquecer_abas)
         
-        # Configurar evento para carregar o editor quando a aba for selecionada
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
     
+    def carregar_aba(self, aba_id):
+        """Criar o módulo da aba, se ainda não foi criado, e devolvê-lo (None se falhou)"""
+        registro = self.abas.get(str(aba_id))
+        if registro is None or str(aba_id) in self.abas_com_erro:
+            return None
+        aba, frame = registro
+        modulo = getattr(self, aba.atributo)
+        if modulo is not None:
+            return modulo
+        
+        try:
+            modulo = getattr(modules, aba.classe)(frame, self.user_id, self.role, self)
+        except Exception as e:
+            logger.exception("Erro ao carregar %s", aba.titulo)
+            self.abas_com_erro.add(str(aba_id))
+            # Criar interface simples de erro
+            tk.Label(frame, text=f"Erro ao carregar módulo: {e}", fg="red").pack(pady=20)
+            return None
+        setattr(self, aba.atributo, modulo)
+        return modulo
+    
+    def pre_aquecer_abas(self):
+        """Criar um módulo pendente por vez, sempre após a interface processar os eventos"""
+        if not self.notebook.winfo_exists() or self.root.state() == "withdrawn":
+            return
+        for aba_id, (aba, _frame) in self.abas.items():
+            if aba.pre_aquecer and getattr(self, aba.atributo) is None and aba_id not in self.abas_com_erro:
+                self.carregar_aba(aba_id)
+                self.root.after(INTERVALO_PRE_AQUECIMENTO_MS,
+                                lambda: self.root.after_idle(self.pre_aquecer_abas))
+                return
+    
     def on_tab_changed(self, event):
-        """Callback para quando uma aba é alterada"""
+        """Callback para quando uma aba é alterada: criar o módulo na primeira seleção"""
         try:
-            selected_tab = self.notebook.select()
+            selected_tab = str(self.notebook.select())
+            if selected_tab in self.abas_abertas:
+                # Eventos recebidos enquanto a aba estava oculta
+                self.eventos.aba_mostrada(selected_tab)
+                return
+            
+            # Primeira abertura da aba: incluir o desenho pendente na fase do perfil
+            self.abas_abertas.add(selected_tab)
             tab_text = self.notebook.tab(selected_tab, "text")
-
-            # Se a aba do Editor Templates foi selecionada e ainda não foi carregada
-            if "Editor Templates" in tab_text and self.editor_avancado_module is None:
-                self.load_pdf_editor()
-            # Se a aba já foi carregada
-            elif "Editor Templates" in tab_text and self.editor_avancado_module is not None:
-                # Editor já carregado, nada mais a fazer
-                pass
+            with perfil.fase(f"aba_{tab_text}"):
+                self.carregar_aba(selected_tab)
+                # Módulo pré-aquecido: eventos guardados desde a criação
+                self.eventos.aba_mostrada(selected_tab)
+                self.root.update_idletasks()
         except Exception as e:
             print(f"Erro ao trocar de aba: {e}")
     
@@ -176,27 +317,6 @@ class MainWindow:
         except Exception as e:
             print(f"Erro ao abrir visualizador automaticamente: {e}")
     
-    def load_pdf_editor(self):
-        """Carregar o editor PDF sob demanda"""
-        try:
-            print("Carregando Editor de Templates PDF...")
-            self.editor_avancado_module = EditorTemplatePDFModule(
-                self.editor_avancado_frame, 
-                self.user_id, 
-                self.role, 
-                self
-            )
-            print("Editor de Templates PDF carregado com sucesso!")
-        except Exception as e:
-            print(f"Erro ao carregar editor PDF: {e}")
-            # Criar interface simples de erro
-            error_label = tk.Label(
-                self.editor_avancado_frame,
-                text=f"Erro ao carregar editor: {e}",
-                fg="red"
-            )
-            error_label.pack(pady=20)
-
     def logout(self):
         """Fazer logout e voltar para tela de login"""
         if messagebox.askyesno("Logout", "Tem certeza que deseja sair?"):
@@ -1,24 +1,37 @@
-from .dashboard import DashboardModule
-from .clientes import ClientesModule
-from .produtos import ProdutosModule
-from .tecnicos import TecnicosModule
-from .cotacoes import CotacoesModule
-from .relatorios_tecnicos import RelatoriosTecnicosModule
-from .usuarios import UsuariosModule
-from .permissoes import PermissoesModule
-from .consultas import ConsultasModule
+"""
+Módulos (abas) da janela principal.
 
-from .editor_template_pdf import EditorTemplatePDFModule
+As classes são importadas sob demanda: `from interface.modules import CotacoesModule`
+importa só interface/modules/cotacoes.py. Assim a abertura do programa não
+carrega o código das abas que ainda não foram abertas (ex.: o editor de templates).
+"""
+import importlib
 
-__all__ = [
-    'DashboardModule',
-    'ClientesModule',
-    'ProdutosModule',
-    'TecnicosModule',
-    'CotacoesModule',
-    'RelatoriosTecnicosModule',
-    'UsuariosModule',
-    'PermissoesModule',
-    'ConsultasModule',
-    'EditorTemplatePDFModule'
-]
\ No newline at end of file
+# Classe -> submódulo que a define
+_SUBMODULOS = {
+    'DashboardModule': 'dashboard',
+    'ClientesModule': 'clientes',
+    'ProdutosModule': 'produtos',
+    'TecnicosModule': 'tecnicos',
+    'CotacoesModule': 'cotacoes',
+    'RelatoriosTecnicosModule': 'relatorios_tecnicos',
+    'UsuariosModule': 'usuarios',
+    'PermissoesModule': 'permissoes',
+    'ConsultasModule': 'consultas',
+    'EditorTemplatePDFModule': 'editor_template_pdf',
+}
+
+__all__ = list(_SUBMODULOS)
+
+
+def __getattr__(nome):
+    submodulo = _SUBMODULOS.get(nome)
+    if submodulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    classe = getattr(importlib.import_module(f".{submodulo}", __name__), nome)
+    globals()[nome] = classe
+    return classe
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,5 +1,596 @@
+import logging
+import sqlite3
+import threading
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
+from db import get_connection
+from utils import perf
+from utils.busca import IndicePrefixo
+
+logger = logging.getLogger(__name__)
+
+# Linhas por página nas listagens e fração da rolagem que dispara a próxima página
+TAMANHO_PAGINA = 200
+LIMIAR_ROLAGEM = 0.9
+
+# Lista virtual: linhas por bloco lido do banco, blocos mantidos em cache e passo da roda do mouse
+TAMANHO_BLOCO = 100
+MAX_BLOCOS = 20
+PASSO_RODA = 3
+
+# Combos com busca: sugestões mostradas e espera após a última tecla
+SUGESTOES_COMBO = 50
+ATRASO_BUSCA_COMBO_MS = 150
+
+# Consultas em segundo plano: threads de leitura e intervalo de entrega dos resultados à interface
+TRABALHADORES_LEITURA = 4
+INTERVALO_RESULTADOS_MS = 30
+
+_pool_leitura = None
+_pool_lock = threading.Lock()
+
+
+def pool_leitura():
+    """Pool de threads compartilhado para consultas de leitura (cada thread tem sua conexão)"""
+    global _pool_leitura
+    with _pool_lock:
+        if _pool_leitura is None:
+            _pool_leitura = ThreadPoolExecutor(max_workers=TRABALHADORES_LEITURA,
+                                               thread_name_prefix="crm-leitura")
+        return _pool_leitura
+
+
+def _executar_consulta(consulta, args):
+    return consulta(get_connection(), *args)
+
+
+class PaginadorKeyset:
+    """
+    Carregar uma Treeview em páginas usando paginação por chave (keyset).
+
+    Em vez de OFFSET, cada página continua a partir dos valores de ordenação
+    da última linha carregada: WHERE (k1, k2) > (?, ?) ORDER BY k1, k2.
+    A última chave de `ordem` deve ser única (normalmente o id) e as colunas
+    de ordenação não podem ser NULL. Novas páginas são buscadas quando a
+    rolagem se aproxima do fim da lista.
+    """
+
+    def __init__(self, tree, colunas, origem, ordem, formatar, decrescente=False,
+                 where=None, params=(), tamanho_pagina=TAMANHO_PAGINA, ao_erro=None):
+        self.tree = tree
+        self.colunas = colunas
+        self.origem = origem
+        self.formatar = formatar
+        self.tamanho_pagina = tamanho_pagina
+        self.ao_erro = ao_erro
+        self._definir_consulta(ordem, decrescente, where, params)
+        self._reiniciar_cursor()
+        self._instalar_rolagem()
+
+    def _definir_consulta(self, ordem, decrescente, where, params):
+        self.ordem = tuple(ordem)
+        self.decrescente = decrescente
+        self.where = where
+        self.params = tuple(params)
+
+    def _reiniciar_cursor(self):
+        self.ultima_chave = None
+        self.esgotado = False
+        self.carregando = False
+
+    def _instalar_rolagem(self):
+        """Encadear a verificação de fim de lista ao yscrollcommand existente"""
+        original = self.tree.cget("yscrollcommand")
+
+        def rolagem(primeiro, ultimo):
+            if original:
+                self.tree.tk.call(*self.tree.tk.splitlist(original), primeiro, ultimo)
+            if float(ultimo) >= LIMIAR_ROLAGEM and not self.esgotado:
+                self.tree.after_idle(self.carregar_mais)
+
+        self.tree.configure(yscrollcommand=rolagem)
+
+    def _sql(self):
+        chaves = ", ".join(self.ordem)
+        direcao = "DESC" if self.decrescente else "ASC"
+        condicoes = []
+        params = list(self.params)
+        if self.where:
+            condicoes.append(f"({self.where})")
+        if self.ultima_chave is not None:
+            operador = "<" if self.decrescente else ">"
+            condicoes.append(f"({chaves}) {operador} ({', '.join('?' * len(self.ordem))})")
+            params.extend(self.ultima_chave)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        ordem = ", ".join(f"{chave} {direcao}" for chave in self.ordem)
+        params.append(self.tamanho_pagina)
+        sql = f"SELECT {self.colunas}, {chaves} FROM {self.origem} {where} ORDER BY {ordem} LIMIT ?"
+        return sql, params
+
+    def reiniciar(self, where=None, params=(), ordem=None, decrescente=None):
+        """Limpar a lista e carregar a primeira página (novo filtro/ordenação)"""
+        self._definir_consulta(
+            ordem if ordem is not None else self.ordem,
+            decrescente if decrescente is not None else self.decrescente,
+            where, params
+        )
+        self._reiniciar_cursor()
+        self.tree.delete(*self.tree.get_children())
+        self.carregar_mais()
+
+    def interromper(self):
+        """Parar de buscar páginas (a lista passou a exibir outro conteúdo, ex.: resultado de busca)"""
+        self.esgotado = True
+
+    def carregar_mais(self):
+        """Carregar a próxima página, se houver"""
+        if self.esgotado or self.carregando:
+            return
+        self.carregando = True
+        try:
+            sql, params = self._sql()
+            rows = get_connection().execute(sql, params).fetchall()
+            n_chaves = len(self.ordem)
+            for row in rows:
+                values, tags = self.formatar(row[:-n_chaves])
+                self.tree.insert("", "end", values=values, tags=tags)
+            if rows:
+                self.ultima_chave = rows[-1][-n_chaves:]
+            self.esgotado = len(rows) < self.tamanho_pagina
+        except sqlite3.Error as e:
+            self.esgotado = True
+            if self.ao_erro:
+                self.ao_erro(e)
+        finally:
+            self.carregando = False
+
+
+def _chave_ordenacao(indice):
+    """Chave de ordenação em Python equivalente ao ORDER BY do SQLite (NULL primeiro)"""
+    return lambda linha: (linha[indice] is not None, linha[indice])
+
+
+class FonteLista:
+    """
+    Fonte de linhas em memória para a ListaVirtual (ex.: resultado de busca).
+
+    `linhas` são as linhas cruas com o id na primeira coluna; `formatar`
+    converte uma linha em (values, tags) apenas quando ela fica visível.
+    """
+
+    def __init__(self, linhas, formatar):
+        self._linhas = list(linhas)
+        self.formatar = formatar
+
+    def total(self):
+        return len(self._linhas)
+
+    def linhas(self, inicio, quantidade):
+        return [(linha[0],) + tuple(self.formatar(linha)) for linha in self._linhas[inicio:inicio + quantidade]]
+
+    def posicao(self, id_):
+        for i, linha in enumerate(self._linhas):
+            if linha[0] == id_:
+                return i
+        return None
+
+    def ordenar(self, indice, decrescente=False):
+        self._linhas.sort(key=_chave_ordenacao(indice), reverse=decrescente)
+
+
+class FonteConsulta:
+    """
+    Fonte de linhas lidas do banco sob demanda para a ListaVirtual.
+
+    As linhas são lidas em blocos de TAMANHO_BLOCO mantidos em um cache LRU.
+    Um bloco cujo anterior está no cache continua a partir da última chave
+    dele (keyset, como o PaginadorKeyset); saltos da barra de rolagem usam
+    OFFSET. `colunas` é a sequência de expressões do SELECT, com o id
+    primeiro; a última chave de `ordem` deve ser o id.
+    """
+
+    def __init__(self, colunas, origem, ordem, formatar, decrescente=False,
+                 where=None, params=(), db_name=None):
+        self.colunas = tuple(colunas)
+        self.origem = origem
+        self.ordem = tuple(ordem)
+        self.formatar = formatar
+        self.decrescente = decrescente
+        self.where = where
+        self.params = tuple(params)
+        self.db_name = db_name
+        self._limpar_cache()
+
+    def _limpar_cache(self):
+        self._total = None
+        self._blocos = OrderedDict()
+
+    def _condicoes(self, extras=(), params_extras=()):
+        condicoes = [f"({self.where})"] if self.where else []
+        condicoes.extend(extras)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return where, list(self.params) + list(params_extras)
+
+    def _comparacao_chave(self, chave, antes=False):
+        """
+        Condição para linhas depois (ou antes) da chave na ordem atual.
+        (k1, k2) > (?, ?) nunca é verdadeiro para NULL, então a comparação é
+        expandida coluna a coluna com NULL antes de qualquer valor, como no
+        ORDER BY do SQLite: k1 > ? OR (k1 IS ? AND k2 > ?).
+        """
+        maiores = self.decrescente == antes
+        alternativas = []
+        params = []
+        for i, (coluna, valor) in enumerate(zip(self.ordem, chave)):
+            condicoes = [f"{anterior} IS ?" for anterior in self.ordem[:i]]
+            if valor is None:
+                if not maiores:
+                    continue  # nada é menor que NULL
+                condicoes.append(f"{coluna} IS NOT NULL")
+                valores = chave[:i]
+            elif maiores:
+                condicoes.append(f"{coluna} > ?")
+                valores = chave[:i + 1]
+            else:
+                condicoes.append(f"({coluna} < ? OR {coluna} IS NULL)")
+                valores = chave[:i + 1]
+            alternativas.append(f"({' AND '.join(condicoes)})")
+            params.extend(valores)
+        return f"({' OR '.join(alternativas) or '0'})", params
+
+    def total(self):
+        if self._total is None:
+            where, params = self._condicoes()
+            self._total = get_connection(self.db_name).execute(
+                f"SELECT COUNT(*) FROM {self.origem} {where}", params).fetchone()[0]
+        return self._total
+
+    def _bloco(self, numero):
+        if numero in self._blocos:
+            self._blocos.move_to_end(numero)
+            return self._blocos[numero]
+
+        anterior = self._blocos.get(numero - 1)
+        if anterior and anterior["chave"]:
+            condicao, chave = self._comparacao_chave(anterior["chave"])
+            where, params = self._condicoes([condicao], chave)
+            deslocamento = 0
+        else:
+            where, params = self._condicoes()
+            deslocamento = numero * TAMANHO_BLOCO
+
+        direcao = "DESC" if self.decrescente else "ASC"
+        ordem = ", ".join(f"{chave} {direcao}" for chave in self.ordem)
+        rows = get_connection(self.db_name).execute(
+            f"SELECT {', '.join(self.colunas)}, {', '.join(self.ordem)} FROM {self.origem} "
+            f"{where} ORDER BY {ordem} LIMIT ? OFFSET ?",
+            params + [TAMANHO_BLOCO, deslocamento]
+        ).fetchall()
+
+        n_chaves = len(self.ordem)
+        bloco = {
+            "linhas": [row[:-n_chaves] for row in rows],
+            "chave": tuple(rows[-1][-n_chaves:]) if len(rows) == TAMANHO_BLOCO else None,
+        }
+        self._blocos[numero] = bloco
+        while len(self._blocos) > MAX_BLOCOS:
+            self._blocos.popitem(last=False)
+        return bloco
+
+    def linhas(self, inicio, quantidade):
+        resultado = []
+        numero = inicio // TAMANHO_BLOCO
+        while len(resultado) < quantidade:
+            bloco = self._bloco(numero)["linhas"]
+            resultado.extend(bloco[max(0, inicio - numero * TAMANHO_BLOCO):])
+            if len(bloco) < TAMANHO_BLOCO:
+                break
+            numero += 1
+        return [(linha[0],) + tuple(self.formatar(linha)) for linha in resultado[:quantidade]]
+
+    def posicao(self, id_):
+        """Índice da linha com o id na ordem atual (None se não estiver na fonte)"""
+        conn = get_connection(self.db_name)
+        where, params = self._condicoes([f"{self.colunas[0]} = ?"], [id_])
+        chave = conn.execute(f"SELECT {', '.join(self.ordem)} FROM {self.origem} {where}", params).fetchone()
+        if chave is None:
+            return None
+        condicao, chave = self._comparacao_chave(chave, antes=True)
+        where, params = self._condicoes([condicao], chave)
+        return conn.execute(f"SELECT COUNT(*) FROM {self.origem} {where}", params).fetchone()[0]
+
+    def ordenar(self, indice, decrescente=False):
+        """Ordenar pela coluna `indice` de `colunas` (desempate pelo id)"""
+        id_ = self.colunas[0]
+        self.ordem = (id_,) if indice == 0 else (self.colunas[indice], id_)
+        self.decrescente = decrescente
+        self._limpar_cache()
+
+
+class ListaVirtual(tk.Frame):
+    """
+    Treeview virtual para listas muito grandes.
+
+    Só as linhas visíveis existem como itens da Treeview; a barra de rolagem
+    é mapeada para uma posição na fonte (FonteLista ou FonteConsulta), que
+    mantém as linhas vizinhas em cache. Memória e tempo de redesenho não
+    dependem do tamanho da lista.
+
+    O iid de cada item é o id da linha, então a seleção é guardada por id e
+    sobrevive à rolagem. `colunas` é uma sequência de (nome, título, largura);
+    `ordenaveis` mapeia o nome da coluna para o índice da coluna na fonte.
+    """
+
+    def __init__(self, parent, colunas, altura=15, ordenaveis=None, ao_erro=None, **kwargs):
+        kwargs.setdefault('bg', 'white')
+        super().__init__(parent, **kwargs)
+        self.ordenaveis = ordenaveis or {}
+        self.ao_erro = ao_erro
+        self.fonte = None
+        self.inicio = 0
+        self.visiveis = altura
+        self._ids = {}
+        self._selecionado = None
+        self._ao_selecionar = []
+        self._ordem = None
+        self._redesenho_pendente = False
+
+        nomes = [nome for nome, _, _ in colunas]
+        self.tree = ttk.Treeview(self, columns=nomes, show="headings", height=altura, selectmode="browse")
+        self._titulos = {}
+        for nome, titulo, largura in colunas:
+            self._titulos[nome] = titulo
+            comando = (lambda n=nome: self._ordenar(n)) if nome in self.ordenaveis else ""
+            self.tree.heading(nome, text=titulo, command=comando)
+            self.tree.column(nome, width=largura)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._rolar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind('<Configure>', self._ao_redimensionar)
+        self.tree.bind('<Map>', self._ao_redimensionar)
+        self.tree.bind('<<TreeviewSelect>>', self._ao_mudar_selecao)
+        self.tree.bind('<MouseWheel>', self._roda)
+        self.tree.bind('<Button-4>', lambda e: self._rolar_linhas(-PASSO_RODA))
+        self.tree.bind('<Button-5>', lambda e: self._rolar_linhas(PASSO_RODA))
+        self.tree.bind('<Up>', lambda e: self._mover_selecao(-1))
+        self.tree.bind('<Down>', lambda e: self._mover_selecao(1))
+        self.tree.bind('<Prior>', lambda e: self._mover_selecao(-self.visiveis))
+        self.tree.bind('<Next>', lambda e: self._mover_selecao(self.visiveis))
+        self.tree.bind('<Home>', lambda e: self._mover_selecao(-self.total()))
+        self.tree.bind('<End>', lambda e: self._mover_selecao(self.total()))
+
+    def definir_fonte(self, fonte):
+        """Exibir uma nova fonte a partir do topo, mantendo o id selecionado se ele continuar nela"""
+        self.fonte = fonte
+        self.inicio = 0
+        self._ordem = None
+        for nome, titulo in self._titulos.items():
+            self.tree.heading(nome, text=titulo)
+        if self._selecionado is not None and self._executar(fonte.posicao, self._selecionado) is None:
+            self._selecionado = None
+        self.redesenhar()
+
+    def ao_selecionar(self, callback):
+        """Registrar callback(id) chamado quando o usuário seleciona outra linha"""
+        self._ao_selecionar.append(callback)
+
+    def id_selecionado(self):
+        return self._selecionado
+
+    def selecionar_id(self, id_):
+        """Selecionar a linha com o id, rolando até ela; devolve False se não estiver na fonte"""
+        posicao = self._executar(self.fonte.posicao, id_) if self.fonte else None
+        if posicao is None:
+            return False
+        self._selecionado = id_
+        if not self.inicio <= posicao < self.inicio + self.visiveis:
+            self.inicio = self._limitar(posicao - self.visiveis // 2)
+        self.redesenhar()
+        return True
+
+    def total(self):
+        return (self._executar(self.fonte.total) or 0) if self.fonte else 0
+
+    def _executar(self, funcao, *args):
+        """Chamar a fonte tratando erros de banco (a lista fica vazia)"""
+        try:
+            return funcao(*args)
+        except sqlite3.Error as e:
+            self.fonte = None
+            if self.ao_erro:
+                self.ao_erro(e)
+            return None
+
+    def _limitar(self, inicio):
+        return max(0, min(inicio, self.total() - self.visiveis))
+
+    def redesenhar(self):
+        """Trocar os itens da Treeview pelas linhas da janela visível"""
+        self._redesenho_pendente = False
+        linhas = (self._executar(self.fonte.linhas, self.inicio, self.visiveis) or []) if self.fonte else []
+
+        self._ids = {str(id_): id_ for id_, _, _ in linhas}
+        saindo = [iid for iid in self.tree.get_children() if iid not in self._ids]
+        if saindo:
+            self.tree.delete(*saindo)
+        for posicao, (id_, values, tags) in enumerate(linhas):
+            iid = str(id_)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values, tags=tags)
+                self.tree.move(iid, "", posicao)
+            else:
+                self.tree.insert("", posicao, iid=iid, values=values, tags=tags)
+        self.tree.yview_moveto(0)
+
+        iid = str(self._selecionado)
+        if iid in self._ids and self.tree.selection() != (iid,):
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+
+        total = self.total()
+        if total:
+            self.scrollbar.set(self.inicio / total, (self.inicio + len(linhas)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+        if linhas and self.tree.winfo_ismapped():
+            # A altura da linha só pode ser medida com uma linha desenhada
+            self._ao_redimensionar()
+
+    def _agendar_redesenho(self):
+        """Agrupar vários eventos de rolagem em um único redesenho"""
+        if not self._redesenho_pendente:
+            self._redesenho_pendente = True
+            self.after_idle(self.redesenhar)
+
+    def ir_para(self, inicio):
+        inicio = self._limitar(inicio)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._agendar_redesenho()
+
+    def _rolar(self, acao, quantidade, unidade=None):
+        """Comando da barra de rolagem (moveto/scroll)"""
+        if acao == "moveto":
+            self.ir_para(int(float(quantidade) * self.total()))
+        elif acao == "scroll":
+            passo = self.visiveis if unidade == "pages" else 1
+            self.ir_para(self.inicio + int(quantidade) * passo)
+
+    def _rolar_linhas(self, linhas):
+        self.ir_para(self.inicio + linhas)
+        return "break"
+
+    def _roda(self, event):
+        return self._rolar_linhas(-PASSO_RODA if event.delta > 0 else PASSO_RODA)
+
+    def _ao_redimensionar(self, event=None):
+        """Recalcular quantas linhas inteiras cabem na altura atual da Treeview"""
+        filhos = self.tree.get_children()
+        caixa = self.tree.bbox(filhos[0]) if filhos else None
+        if not caixa:
+            return
+        _, y, _, altura_linha = caixa
+        visiveis = max(1, (self.tree.winfo_height() - y) // altura_linha)
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self.inicio = self._limitar(self.inicio)
+            self._agendar_redesenho()
+
+    def _mover_selecao(self, passo):
+        """Mover a seleção pelo teclado, rolando quando ela sai da janela visível"""
+        total = self.total()
+        if not total:
+            return "break"
+        atual = self.tree.selection()
+        filhos = self.tree.get_children()
+        if atual and atual[0] in filhos:
+            alvo = self.inicio + filhos.index(atual[0]) + passo
+        else:
+            alvo = self.inicio
+        alvo = max(0, min(alvo, total - 1))
+
+        if alvo < self.inicio:
+            self.inicio = alvo
+        elif alvo >= self.inicio + self.visiveis:
+            self.inicio = self._limitar(alvo - self.visiveis + 1)
+        self.redesenhar()
+
+        filhos = self.tree.get_children()
+        if 0 <= alvo - self.inicio < len(filhos):
+            iid = filhos[alvo - self.inicio]
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        return "break"
+
+    def _ao_mudar_selecao(self, event=None):
+        selecao = self.tree.selection()
+        if not selecao or selecao[0] not in self._ids:
+            # Item selecionado saiu da janela visível: a seleção continua guardada pelo id
+            return
+        id_ = self._ids[selecao[0]]
+        if id_ != self._selecionado:
+            self._selecionado = id_
+            for callback in self._ao_selecionar:
+                callback(id_)
+
+    def _ordenar(self, coluna):
+        """Clique no cabeçalho: ordenar pela coluna, alternando a direção"""
+        if self.fonte is None:
+            return
+        decrescente = self._ordem == (coluna, False)
+        self.fonte.ordenar(self.ordenaveis[coluna], decrescente)
+        self._ordem = (coluna, decrescente)
+        for nome, titulo in self._titulos.items():
+            seta = (" ▼" if decrescente else " ▲") if nome == coluna else ""
+            self.tree.heading(nome, text=titulo + seta)
+        self.inicio = 0
+        self.redesenhar()
+
+
+class ComboBusca(ttk.Combobox):
+    """
+    Combobox com busca enquanto se digita, para catálogos grandes (clientes,
+    produtos, cotações).
+
+    A lista do combo nunca recebe o catálogo inteiro: só as SUGESTOES_COMBO
+    melhores sugestões para o texto digitado (ver utils.busca.IndicePrefixo),
+    atualizadas ATRASO_BUSCA_COMBO_MS após a última tecla. `fonte` é uma
+    função que devolve os rótulos; ela só é chamada (e o índice montado) na
+    primeira vez que o combo recebe o foco ou é aberto.
+    """
+
+    # Teclas que não alteram o texto
+    _NAVEGACAO = {'Up', 'Down', 'Left', 'Right', 'Return', 'KP_Enter', 'Escape', 'Tab',
+                  'Home', 'End', 'Prior', 'Next', 'Shift_L', 'Shift_R', 'Control_L', 'Control_R',
+                  'Alt_L', 'Alt_R'}
+
+    def __init__(self, parent, fonte=None, limite=SUGESTOES_COMBO, **kwargs):
+        kwargs.setdefault('postcommand', self._ao_abrir)
+        super().__init__(parent, **kwargs)
+        self.limite = limite
+        self._fonte = fonte
+        self._indice = None
+        self._agendamento = None
+        self.bind('<KeyRelease>', self._ao_digitar, add='+')
+        self.bind('<FocusIn>', lambda e: self._sugerir(), add='+')
+
+    def definir_fonte(self, fonte):
+        """Trocar os rótulos (função sem argumentos); o índice é remontado no próximo uso"""
+        self._fonte = fonte
+        self._indice = None
+        self['values'] = ()
+        if str(self.tk.call('focus')) == str(self):
+            self._sugerir()
+
+    def indice(self):
+        if self._indice is None:
+            with perf.span("combo.indice"):
+                self._indice = IndicePrefixo(self._fonte() if self._fonte else ())
+        return self._indice
+
+    def _ao_digitar(self, event):
+        if event.keysym in self._NAVEGACAO:
+            return
+        if self._agendamento is not None:
+            self.after_cancel(self._agendamento)
+        self._agendamento = self.after(ATRASO_BUSCA_COMBO_MS, self._sugerir)
+
+    def _ao_abrir(self):
+        # Abrir a lista logo após digitar não espera o atraso
+        self._sugerir()
+
+    def _sugerir(self):
+        """Preencher a lista com as melhores sugestões para o texto atual"""
+        if self._agendamento is not None:
+            self.after_cancel(self._agendamento)
+            self._agendamento = None
+        self['values'] = self.indice().buscar(self.get(), self.limite)
+
 
 class BaseModule:
     """Classe base para todos os módulos do sistema"""
@@ -10,29 +601,65 @@ class BaseModule:
         self.role = role
         self.main_window = main_window
         
-        # Registrar para receber eventos
+        # Consultas em segundo plano aguardando entrega: chave -> (futuro, ao_concluir, ao_erro)
+        self._consultas = {}
+        self._entrega_agendada = False
+        
+        # Registrar para receber eventos (entregues quando a aba do módulo estiver visível)
         if hasattr(main_window, 'register_listener'):
-            main_window.register_listener(self.handle_event)
+            main_window.register_listener(self.handle_event, parent)
         
         # Frame principal do módulo
         self.frame = tk.Frame(parent, bg='#f8fafc')
         self.frame.pack(fill="both", expand=True)
         
         # Configurar UI específica do módulo
-        self.setup_ui()
+        with perf.span(f"modulo.{type(self).__name__}.setup_ui"):
+            self.setup_ui()
         
     def setup_ui(self):
         """Método a ser implementado pelos módulos filhos"""
         pass
         
     def handle_event(self, event_type, data=None):
-        """Manipular eventos recebidos do sistema"""
+        """Manipular eventos recebidos do sistema (data é um interface.eventos.Evento)"""
         pass
         
-    def emit_event(self, event_type, data=None):
-        """Emitir evento para outros módulos"""
+    def emit_event(self, event_type, data=None, ids=()):
+        """Emitir evento para outros módulos; ids: registros afetados"""
         if hasattr(self.main_window, 'emit_event'):
-            self.main_window.emit_event(event_type, data)
+            self.main_window.emit_event(event_type, data, ids)
+    
+    def atualizar_apos_eventos(self, funcao):
+        """
+        Pedir uma recarga a partir de handle_event: roda uma vez ao fim da
+        entrega, mesmo que vários eventos a peçam
+        """
+        eventos = getattr(self.main_window, 'eventos', None)
+        if eventos is None:
+            funcao()
+        else:
+            eventos.agendar(funcao)
+    
+    def enfileirar_pdf(self, tipo, registro_id, usuario=None):
+        """
+        Enviar a geração do PDF para a fila (processada fora da interface).
+        Sem janela principal (uso isolado do módulo), gera na hora e mostra o resultado.
+        """
+        if hasattr(self.main_window, 'enfileirar_pdf'):
+            try:
+                self.main_window.enfileirar_pdf(tipo, registro_id, usuario)
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao colocar PDF na fila: {e}")
+            return
+        
+        from database import DB_NAME
+        from pdf_generators.fila import gerar
+        sucesso, resultado = gerar(tipo, registro_id, DB_NAME, usuario)
+        if sucesso:
+            self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
+        else:
+            self.show_error(f"Erro ao gerar PDF: {resultado}")
     
     def create_section_frame(self, parent, title, padx=15, pady=15):
         """Criar frame de seção com título"""
@@ -78,6 +705,93 @@ class BaseModule:
         
         return search_frame, search_var
     
+    def criar_paginador(self, tree, mensagem_erro="Erro ao carregar lista", **kwargs):
+        """Criar paginador keyset para uma Treeview do módulo (ver PaginadorKeyset)"""
+        return PaginadorKeyset(tree, ao_erro=lambda e: self.show_error(f"{mensagem_erro}: {e}"), **kwargs)
+
+    def criar_lista_virtual(self, parent, colunas, mensagem_erro="Erro ao carregar lista", **kwargs):
+        """Criar lista virtual para listas grandes (ver ListaVirtual)"""
+        return ListaVirtual(parent, colunas, ao_erro=lambda e: self.show_error(f"{mensagem_erro}: {e}"), **kwargs)
+        
+    def consultar_em_segundo_plano(self, chave, consulta, ao_concluir, *args, ao_erro=None):
+        """
+        Executar consulta(conn, *args) em uma thread de leitura.
+
+        ao_concluir(resultado) é chamado na thread da interface via after().
+        Uma nova consulta com a mesma chave substitui a anterior: se ela
+        ainda não começou é cancelada, senão seu resultado é descartado.
+        A consulta não pode tocar em widgets, só no banco.
+        """
+        anterior = self._consultas.pop(chave, None)
+        if anterior:
+            anterior[0].cancel()
+        futuro = pool_leitura().submit(_executar_consulta, consulta, args)
+        self._consultas[chave] = (futuro, ao_concluir, ao_erro)
+        self._agendar_entrega()
+        return futuro
+    
+    def cancelar_consultas(self, chave=None):
+        """Descartar consultas pendentes (todas ou só a da chave)"""
+        chaves = [chave] if chave is not None else list(self._consultas)
+        for c in chaves:
+            pendente = self._consultas.pop(c, None)
+            if pendente:
+                pendente[0].cancel()
+    
+    def _agendar_entrega(self):
+        if not self._entrega_agendada:
+            self._entrega_agendada = True
+            self.frame.after(INTERVALO_RESULTADOS_MS, self._entregar_resultados)
+    
+    def _entregar_resultados(self):
+        """Repassar à interface os resultados das consultas concluídas"""
+        self._entrega_agendada = False
+        try:
+            ativo = self.frame.winfo_exists()
+        except tk.TclError:
+            ativo = False
+        if not ativo:
+            self.cancelar_consultas()
+            return
+        
+        for chave, (futuro, ao_concluir, ao_erro) in list(self._consultas.items()):
+            if not futuro.done():
+                continue
+            del self._consultas[chave]
+            try:
+                self._entregar(futuro, ao_concluir, ao_erro)
+            except Exception:
+                # Um erro ao exibir um resultado não pode impedir a entrega dos demais
+                logger.exception("Erro ao exibir o resultado da consulta %s", chave)
+        
+        if self._consultas:
+            self._agendar_entrega()
+    
+    def _entregar(self, futuro, ao_concluir, ao_erro):
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            if not isinstance(e, sqlite3.Error):
+                logger.exception("Erro na consulta em segundo plano")
+            if ao_erro:
+                ao_erro(e)
+            else:
+                self.show_error(f"Erro ao carregar dados: {e}")
+            return
+        ao_concluir(resultado)
+    
+    def mostrar_carregando(self, *frames):
+        """Placeholder 'Carregando...' nos frames enquanto a consulta roda"""
+        for frame in frames:
+            tk.Label(frame, text="Carregando...", font=('Arial', 10, 'italic'),
+                     bg=frame.cget('bg'), fg='#94a3b8').pack(pady=10)
+    
+    def limpar_frame(self, *frames):
+        """Remover o conteúdo dos frames (ex.: placeholders)"""
+        for frame in frames:
+            for filho in frame.winfo_children():
+                filho.destroy()
+        
     def show_success(self, message):
         """Mostrar mensagem de sucesso"""
         from tkinter import messagebox
@@ -96,4 +810,18 @@ class BaseModule:
     def show_info(self, title, message):
         """Mostrar mensagem informativa"""
         from tkinter import messagebox
-        messagebox.showinfo(title, message)
\ No newline at end of file
+        messagebox.showinfo(title, message)
+
+    def avisar_conflito(self, descricao, conflito, recarregar):
+        """Outra estação salvou o registro aberto (ConflitoVersao): oferecer recarregar o formulário"""
+        from tkinter import messagebox
+        if conflito.versao_atual is None:
+            self.show_error(f"Outro usuário excluiu {descricao} depois que este formulário foi aberto.")
+            return
+        if messagebox.askyesno(
+            "Registro alterado",
+            f"Outro usuário salvou {descricao} depois que este formulário foi aberto; "
+            "as alterações feitas aqui não foram gravadas.\n\n"
+            "Recarregar agora? As alterações deste formulário serão perdidas."
+        ):
+            recarregar()
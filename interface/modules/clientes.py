@@ -1,13 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from .base_module import BaseModule
-from database import DB_NAME
+from .base_module import BaseModule, FonteConsulta, FonteLista
+from db import concorrencia, get_connection, transaction
 from utils.formatters import format_cnpj, format_phone, validate_cnpj, validate_email
+from utils.busca import buscar, marcadores, ordenar_por_relevancia
 
 class ClientesModule(BaseModule):
     def setup_ui(self):
-        self.ensure_responsavel_id_column()
         # Container principal
         container = tk.Frame(self.frame, bg='#f8fafc')
         container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -27,25 +27,12 @@ class ClientesModule(BaseModule):
         
         # Inicializar variáveis
         self.current_cliente_id = None
+        self.versao_cliente = None
         self.contatos_data = []
         
         # Carregar dados
         self.carregar_clientes()
         
-    def ensure_responsavel_id_column(self):
-        import sqlite3
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("PRAGMA table_info(clientes)")
-        columns = [row[1] for row in c.fetchall()]
-        if 'responsavel_id' not in columns:
-            try:
-                c.execute("ALTER TABLE clientes ADD COLUMN responsavel_id INTEGER")
-                conn.commit()
-            except Exception as e:
-                print(f"Erro ao adicionar coluna responsavel_id: {e}")
-        conn.close()
-
     def create_header(self, parent):
         header_frame = tk.Frame(parent, bg='#f8fafc')
         header_frame.pack(fill="x", pady=(0, 20))
@@ -519,31 +506,20 @@ class ClientesModule(BaseModule):
         search_frame, self.search_var = self.create_search_frame(container, command=self.buscar_clientes)
         search_frame.pack(fill="x", pady=(0, 15))
         
-        # Treeview para lista
-        columns = ("nome", "cnpj", "cidade", "telefone", "email")
-        self.clientes_tree = ttk.Treeview(container, columns=columns, show="headings", height=15)
-        
-        # Cabeçalhos
-        self.clientes_tree.heading("nome", text="Nome/Razão Social")
-        self.clientes_tree.heading("cnpj", text="CNPJ")
-        self.clientes_tree.heading("cidade", text="Cidade")
-        self.clientes_tree.heading("telefone", text="Telefone")
-        self.clientes_tree.heading("email", text="Email")
-        
-        # Larguras
-        self.clientes_tree.column("nome", width=250)
-        self.clientes_tree.column("cnpj", width=150)
-        self.clientes_tree.column("cidade", width=120)
-        self.clientes_tree.column("telefone", width=120)
-        self.clientes_tree.column("email", width=200)
-        
-        # Scrollbar
-        lista_scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.clientes_tree.yview)
-        self.clientes_tree.configure(yscrollcommand=lista_scrollbar.set)
-        
-        # Pack
-        self.clientes_tree.pack(side="left", fill="both", expand=True)
-        lista_scrollbar.pack(side="right", fill="y")
+        # Lista virtual (só as linhas visíveis viram itens da Treeview)
+        self.clientes_lista = self.criar_lista_virtual(
+            container,
+            colunas=(
+                ("nome", "Nome/Razão Social", 250),
+                ("cnpj", "CNPJ", 150),
+                ("cidade", "Cidade", 120),
+                ("telefone", "Telefone", 120),
+                ("email", "Email", 200),
+            ),
+            ordenaveis={"nome": 1, "cnpj": 2, "cidade": 3, "telefone": 4, "email": 5},
+            mensagem_erro="Erro ao carregar clientes"
+        )
+        self.clientes_lista.pack(fill="both", expand=True)
         
         # Botões da lista
         lista_buttons = tk.Frame(container, bg='white')
@@ -577,6 +553,7 @@ class ClientesModule(BaseModule):
     def novo_cliente(self):
         """Limpar formulário para novo cliente"""
         self.current_cliente_id = None
+        self.versao_cliente = None
         
         # Limpar todos os campos
         self.nome_var.set("")
@@ -613,7 +590,7 @@ class ClientesModule(BaseModule):
             
         # Verificar duplicidade de CNPJ
         if cnpj:
-            conn_check = sqlite3.connect(DB_NAME)
+            conn_check = get_connection()
             c_check = conn_check.cursor()
             try:
                 if self.current_cliente_id:
@@ -625,47 +602,43 @@ class ClientesModule(BaseModule):
                 
                 if c_check.fetchone():
                     self.show_error("CNPJ já cadastrado no sistema. Não é possível salvar um cliente com CNPJ duplicado.")
-                    conn_check.close()
                     return
             except sqlite3.Error as e:
                 self.show_error(f"Erro ao verificar CNPJ: {e}")
-                conn_check.close()
                 return
-            finally:
-                conn_check.close()
             
         email = self.email_var.get().strip()
         if email and not validate_email(email):
             self.show_warning("Email inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        # Preparar dados
+        dados = (
+            nome,
+            self.nome_fantasia_var.get().strip(),
+            cnpj if cnpj else None,
+            self.inscricao_estadual_var.get().strip(),
+            self.inscricao_municipal_var.get().strip(),
+            self.endereco_var.get().strip(),
+            self.numero_var.get().strip(),
+            self.complemento_var.get().strip(),
+            self.bairro_var.get().strip(),
+            self.cidade_var.get().strip(),
+            self.estado_var.get().strip(),
+            self.cep_var.get().strip(),
+            self.telefone_var.get().strip(),
+            email if email else None,
+            self.site_var.get().strip(),
+            self.prazo_pagamento_var.get().strip(),
+            self.user_id
+        )
+        cliente_id, versao_lida = self.current_cliente_id, self.versao_cliente
         
-        try:
-            # Preparar dados
-            dados = (
-                nome,
-                self.nome_fantasia_var.get().strip(),
-                cnpj if cnpj else None,
-                self.inscricao_estadual_var.get().strip(),
-                self.inscricao_municipal_var.get().strip(),
-                self.endereco_var.get().strip(),
-                self.numero_var.get().strip(),
-                self.complemento_var.get().strip(),
-                self.bairro_var.get().strip(),
-                self.cidade_var.get().strip(),
-                self.estado_var.get().strip(),
-                self.cep_var.get().strip(),
-                self.telefone_var.get().strip(),
-                email if email else None,
-                self.site_var.get().strip(),
-                self.prazo_pagamento_var.get().strip(),
-                self.user_id
-            )
-            
-            if self.current_cliente_id:
-                # Atualizar cliente existente
+        def gravar(conn):
+            c = conn.cursor()
+            if cliente_id:
+                # Atualizar cliente existente (se ninguém o salvou depois de aberto)
+                versao = concorrencia.reivindicar(conn, 'cliente', cliente_id, versao_lida)
                 c.execute("""
                     UPDATE clientes SET
                         nome = ?, nome_fantasia = ?, cnpj = ?, inscricao_estadual = ?,
@@ -673,28 +646,32 @@ class ClientesModule(BaseModule):
                         bairro = ?, cidade = ?, estado = ?, cep = ?, telefone = ?, email = ?,
                         site = ?, prazo_pagamento = ?, responsavel_id = ?, updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
-                """, dados + (self.current_cliente_id,))
-            else:
-                # Inserir novo cliente
-                c.execute("""
-                    INSERT INTO clientes (nome, nome_fantasia, cnpj, inscricao_estadual,
-                                        inscricao_municipal, endereco, numero, complemento,
-                                        bairro, cidade, estado, cep, telefone, email,
-                                        site, prazo_pagamento, responsavel_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, dados)
-                
-                self.current_cliente_id = c.lastrowid
+                """, dados + (cliente_id,))
+                return cliente_id, versao
+            
+            # Inserir novo cliente
+            c.execute("""
+                INSERT INTO clientes (nome, nome_fantasia, cnpj, inscricao_estadual,
+                                    inscricao_municipal, endereco, numero, complemento,
+                                    bairro, cidade, estado, cep, telefone, email,
+                                    site, prazo_pagamento, responsavel_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, dados)
+            return c.lastrowid, 1
+            
+        try:
+            self.current_cliente_id, self.versao_cliente = concorrencia.executar(gravar)
             
-            conn.commit()
             self.show_success("Cliente salvo com sucesso!")
             
             # Emitir evento para atualizar outros módulos
-            self.emit_event('cliente_created')
+            self.emit_event('cliente_created', ids=self.current_cliente_id)
             
             # Recarregar lista
             self.carregar_clientes()
             
+        except concorrencia.ConflitoVersao as e:
+            self.avisar_conflito("este cliente", e, lambda: self.carregar_cliente_para_edicao(cliente_id))
         except sqlite3.IntegrityError as e:
             if "cnpj" in str(e).lower():
                 self.show_error("CNPJ já cadastrado no sistema.")
@@ -702,94 +679,59 @@ class ClientesModule(BaseModule):
                 self.show_error(f"Erro de integridade: {e}")
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar cliente: {e}")
-        finally:
-            conn.close()
             
     def carregar_clientes(self):
-        """Carregar lista de clientes"""
-        # Limpar lista atual
-        for item in self.clientes_tree.get_children():
-            self.clientes_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT id, nome, cnpj, cidade, telefone, email
-                FROM clientes
-                ORDER BY nome
-            """)
-            
-            for row in c.fetchall():
-                cliente_id, nome, cnpj, cidade, telefone, email = row
-                self.clientes_tree.insert("", "end", values=(
-                    nome,
-                    format_cnpj(cnpj) if cnpj else "",
-                    cidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(cliente_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar clientes: {e}")
-        finally:
-            conn.close()
+        """Carregar lista de clientes (lida do banco conforme a rolagem)"""
+        self.clientes_lista.definir_fonte(FonteConsulta(
+            colunas=("id", "nome", "cnpj", "cidade", "telefone", "email"),
+            origem="clientes",
+            ordem=("nome", "id"),
+            formatar=self._linha_cliente
+        ))
+        
+    def _linha_cliente(self, row):
+        """Valores e tags de um cliente na lista"""
+        cliente_id, nome, cnpj, cidade, telefone, email = row
+        return (
+            nome,
+            format_cnpj(cnpj) if cnpj else "",
+            cidade or "",
+            format_phone(telefone) if telefone else "",
+            email or ""
+        ), (cliente_id,)
             
     def buscar_clientes(self):
         """Buscar clientes com filtro"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_clientes()
+            return
         
-        # Limpar lista atual
-        for item in self.clientes_tree.get_children():
-            self.clientes_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
-            if termo:
-                c.execute("""
-                    SELECT id, nome, cnpj, cidade, telefone, email
-                    FROM clientes
-                    WHERE nome LIKE ? OR cnpj LIKE ? OR cidade LIKE ?
-                    ORDER BY nome
-                """, (f"%{termo}%", f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, nome, cnpj, cidade, telefone, email
-                    FROM clientes
-                    ORDER BY nome
-                """)
+            # Busca textual ordenada por relevância (ignora acentos)
+            ids = buscar("clientes", termo)
+            c.execute(f"""
+                SELECT id, nome, cnpj, cidade, telefone, email
+                FROM clientes
+                WHERE id IN ({marcadores(len(ids))})
+            """, ids)
             
-            for row in c.fetchall():
-                cliente_id, nome, cnpj, cidade, telefone, email = row
-                self.clientes_tree.insert("", "end", values=(
-                    nome,
-                    format_cnpj(cnpj) if cnpj else "",
-                    cidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(cliente_id,))
+            self.clientes_lista.definir_fonte(
+                FonteLista(ordenar_por_relevancia(c.fetchall(), ids), self._linha_cliente))
                 
         except sqlite3.Error as e:
             self.show_error(f"Erro ao buscar clientes: {e}")
-        finally:
-            conn.close()
             
     def editar_cliente(self):
         """Editar cliente selecionado"""
-        selected = self.clientes_tree.selection()
-        if not selected:
+        cliente_id = self.clientes_lista.id_selecionado()
+        if cliente_id is None:
             self.show_warning("Selecione um cliente para editar.")
             return
             
-        # Obter ID do cliente
-        tags = self.clientes_tree.item(selected[0])['tags']
-        if not tags:
-            return
-            
-        cliente_id = tags[0]
         self.carregar_cliente_para_edicao(cliente_id)
         
         # Mudar para aba de novo cliente
@@ -797,10 +739,13 @@ class ClientesModule(BaseModule):
         
     def carregar_cliente_para_edicao(self, cliente_id):
         """Carregar dados do cliente para edição"""
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
+            # Versão lida antes dos dados (ver db/concorrencia.py)
+            versao = concorrencia.versao('cliente', cliente_id, conn)
+            
             # Buscar dados do cliente
             c.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,))
             cliente = c.fetchone()
@@ -811,6 +756,7 @@ class ClientesModule(BaseModule):
                 
             # Preencher campos
             self.current_cliente_id = cliente_id
+            self.versao_cliente = versao
             self.nome_var.set(cliente[1] or "")  # nome
             self.nome_fantasia_var.set(cliente[2] or "")  # nome_fantasia
             self.cnpj_var.set(format_cnpj(cliente[3]) if cliente[3] else "")  # cnpj
@@ -851,13 +797,11 @@ class ClientesModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar cliente: {e}")
-        finally:
-            conn.close()
             
     def excluir_cliente(self):
         """Excluir cliente selecionado"""
-        selected = self.clientes_tree.selection()
-        if not selected:
+        cliente_id = self.clientes_lista.id_selecionado()
+        if cliente_id is None:
             self.show_warning("Selecione um cliente para excluir.")
             return
             
@@ -866,37 +810,44 @@ class ClientesModule(BaseModule):
                                    "Tem certeza que deseja excluir este cliente?\n"
                                    "Esta ação não pode ser desfeita."):
             return
-            
-        # Obter ID do cliente
-        tags = self.clientes_tree.item(selected[0])['tags']
-        if not tags:
-            return
-            
-        cliente_id = tags[0]
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         
         try:
-            # Excluir contatos primeiro
-            c.execute("DELETE FROM contatos WHERE cliente_id = ?", (cliente_id,))
+            c = get_connection().cursor()
+            
+            # Verificar se o cliente tem cotações ou relatórios
+            c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ?", (cliente_id,))
+            cotacoes_count = c.fetchone()[0]
+            
+            c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE cliente_id = ?", (cliente_id,))
+            relatorios_count = c.fetchone()[0]
+            
+            if cotacoes_count > 0 or relatorios_count > 0:
+                self.show_warning(f"Este cliente possui {cotacoes_count} cotações e {relatorios_count} relatórios.\n"
+                                 "Não é possível excluir.")
+                return
             
-            # Excluir cliente
-            c.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
-            conn.commit()
+            with transaction() as conn:
+                c = conn.cursor()
+                # Excluir contatos primeiro
+                c.execute("DELETE FROM contatos WHERE cliente_id = ?", (cliente_id,))
+            
+                # Excluir cliente
+                c.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
             
             self.show_success("Cliente excluído com sucesso!")
             
             # Emitir evento para atualizar outros módulos
-            self.emit_event('cliente_deleted')
+            self.emit_event('cliente_deleted', ids=cliente_id)
             
             # Recarregar lista
             self.carregar_clientes()
             
+        except sqlite3.IntegrityError:
+            # Chaves estrangeiras ativas (db/connection.py): algum registro ainda aponta para o cliente
+            self.show_warning("Este cliente ainda está vinculado a outros registros do sistema.\n"
+                             "Não é possível excluir.")
         except sqlite3.Error as e:
             self.show_error(f"Erro ao excluir cliente: {e}")
-        finally:
-            conn.close()
 
     def adicionar_contato(self):
         """Adicionar novo contato ao cliente"""
@@ -917,24 +868,22 @@ class ClientesModule(BaseModule):
             self.show_warning("O contato deve ter pelo menos um telefone ou email.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            dados_contato = (
-                self.current_cliente_id,
-                nome,
-                self.contato_cargo_var.get().strip(),
-                telefone,
-                email,
-                self.contato_observacoes_var.get().strip()
-            )
+            with transaction() as conn:
+                c = conn.cursor()
+                dados_contato = (
+                    self.current_cliente_id,
+                    nome,
+                    self.contato_cargo_var.get().strip(),
+                    telefone,
+                    email,
+                    self.contato_observacoes_var.get().strip()
+                )
             
-            c.execute("""
-                INSERT INTO contatos (cliente_id, nome, cargo, telefone, email, observacoes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, dados_contato)
-            conn.commit()
+                c.execute("""
+                    INSERT INTO contatos (cliente_id, nome, cargo, telefone, email, observacoes)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, dados_contato)
             
             self.show_success("Contato adicionado com sucesso!")
             self.limpar_contato() # Limpar campos do novo contato
@@ -942,8 +891,6 @@ class ClientesModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao adicionar contato: {e}")
-        finally:
-            conn.close()
             
     def limpar_contato(self):
         """Limpar campos do novo contato"""
@@ -1001,20 +948,16 @@ class ClientesModule(BaseModule):
             
         contato_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            c.execute("DELETE FROM contatos WHERE id = ?", (contato_id,))
-            conn.commit()
+            with transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM contatos WHERE id = ?", (contato_id,))
             
             self.show_success("Contato excluído com sucesso!")
             self.carregar_cliente_para_edicao(self.current_cliente_id) # Recarregar cliente sem o contato excluído
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao excluir contato: {e}")
-        finally:
-            conn.close()
 
     def format_contato_telefone(self, event=None):
         """Formatar telefone do contato automaticamente"""
@@ -1114,7 +1057,7 @@ class ClientesModule(BaseModule):
         if not cliente_id:
             return
             
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
@@ -1161,8 +1104,6 @@ class ClientesModule(BaseModule):
                     
         except sqlite3.Error as e:
             print(f"Erro ao atualizar dashboard: {e}")
-        finally:
-            conn.close()
 
     def create_clientes_estado_indicadores(self, parent):
         """Criar indicadores para a aba de clientes"""
@@ -1178,21 +1119,32 @@ class ClientesModule(BaseModule):
         total_frame = tk.LabelFrame(parent, text="Total de Clientes", bg='#f8fafc', font=('Arial', 12, 'bold'))
         total_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM clientes")
-        total = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(total_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
-                bg='#f8fafc', fg='#1e40af').pack(pady=10)
-        
         # Clientes por estado
         estado_frame = tk.LabelFrame(parent, text="Clientes por Estado", bg='#f8fafc', font=('Arial', 12, 'bold'))
         estado_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        # Clientes com mais cotações
+        cotacoes_frame = tk.LabelFrame(parent, text="Clientes com Mais Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        cotacoes_frame.pack(fill="x", padx=10, pady=5)
+        
+        # Clientes que compram vs não compram
+        compras_frame = tk.LabelFrame(parent, text="Status de Compras", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        compras_frame.pack(fill="x", padx=10, pady=5)
+        
+        frames = (total_frame, estado_frame, cotacoes_frame, compras_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_admin,
+            lambda dados: self._preencher_indicadores_admin(dados, *frames)
+        )
+    
+    def _consultar_indicadores_admin(self, conn):
+        """Consultas dos indicadores gerais (executada fora da thread da interface)"""
         c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM clientes")
+        total = c.fetchone()[0]
+        
         c.execute("""
             SELECT estado, COUNT(*) as total
             FROM clientes 
@@ -1202,18 +1154,7 @@ class ClientesModule(BaseModule):
             LIMIT 10
         """)
         estados = c.fetchall()
-        conn.close()
-        
-        for estado, total in estados:
-            tk.Label(estado_frame, text=f"{estado}: {total}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
-        
-        # Clientes com mais cotações
-        cotacoes_frame = tk.LabelFrame(parent, text="Clientes com Mais Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        cotacoes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         c.execute("""
             SELECT c.nome, COUNT(co.id) as total_cotacoes
             FROM clientes c
@@ -1224,18 +1165,7 @@ class ClientesModule(BaseModule):
             LIMIT 5
         """)
         clientes_cotacoes = c.fetchall()
-        conn.close()
-        
-        for nome, total in clientes_cotacoes:
-            tk.Label(cotacoes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
-        # Clientes que compram vs não compram
-        compras_frame = tk.LabelFrame(parent, text="Status de Compras", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        compras_frame.pack(fill="x", padx=10, pady=5)
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         c.execute("""
             SELECT 
                 COUNT(DISTINCT c.id) as total_clientes,
@@ -1245,7 +1175,22 @@ class ClientesModule(BaseModule):
             LEFT JOIN cotacoes co ON c.id = co.cliente_id
         """)
         stats = c.fetchone()
-        conn.close()
+        return total, estados, clientes_cotacoes, stats
+    
+    def _preencher_indicadores_admin(self, dados, total_frame, estado_frame, cotacoes_frame, compras_frame):
+        total, estados, clientes_cotacoes, stats = dados
+        self.limpar_frame(total_frame, estado_frame, cotacoes_frame, compras_frame)
+        
+        tk.Label(total_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
+                bg='#f8fafc', fg='#1e40af').pack(pady=10)
+        
+        for estado, total in estados:
+            tk.Label(estado_frame, text=f"{estado}: {total}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
+        
+        for nome, total in clientes_cotacoes:
+            tk.Label(cotacoes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
         if stats:
             total_clientes, compradores, nao_compradores = stats
@@ -1262,21 +1207,28 @@ class ClientesModule(BaseModule):
         meus_frame = tk.LabelFrame(parent, text="Meus Clientes", bg='#f8fafc', font=('Arial', 12, 'bold'))
         meus_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM clientes WHERE responsavel_id = ?", (self.user_id,))
-        total = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(meus_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
-                bg='#f8fafc', fg='#059669').pack(pady=10)
-        
         # Meus clientes por estado
         estado_frame = tk.LabelFrame(parent, text="Meus Clientes por Estado", bg='#f8fafc', font=('Arial', 12, 'bold'))
         estado_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        # Meus clientes com mais cotações
+        cotacoes_frame = tk.LabelFrame(parent, text="Meus Clientes com Mais Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        cotacoes_frame.pack(fill="x", padx=10, pady=5)
+        
+        frames = (meus_frame, estado_frame, cotacoes_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_usuario,
+            lambda dados: self._preencher_indicadores_usuario(dados, *frames)
+        )
+    
+    def _consultar_indicadores_usuario(self, conn):
+        """Consultas dos indicadores do usuário (executada fora da thread da interface)"""
         c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM clientes WHERE responsavel_id = ?", (self.user_id,))
+        total = c.fetchone()[0]
+        
         c.execute("""
             SELECT estado, COUNT(*) as total
             FROM clientes 
@@ -1286,18 +1238,7 @@ class ClientesModule(BaseModule):
             LIMIT 5
         """, (self.user_id,))
         estados = c.fetchall()
-        conn.close()
-        
-        for estado, total in estados:
-            tk.Label(estado_frame, text=f"{estado}: {total}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
-        
-        # Meus clientes com mais cotações
-        cotacoes_frame = tk.LabelFrame(parent, text="Meus Clientes com Mais Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        cotacoes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         c.execute("""
             SELECT c.nome, COUNT(co.id) as total_cotacoes
             FROM clientes c
@@ -1309,7 +1250,18 @@ class ClientesModule(BaseModule):
             LIMIT 5
         """, (self.user_id,))
         clientes_cotacoes = c.fetchall()
-        conn.close()
+        return total, estados, clientes_cotacoes
+    
+    def _preencher_indicadores_usuario(self, dados, meus_frame, estado_frame, cotacoes_frame):
+        total, estados, clientes_cotacoes = dados
+        self.limpar_frame(meus_frame, estado_frame, cotacoes_frame)
+        
+        tk.Label(meus_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
+                bg='#f8fafc', fg='#059669').pack(pady=10)
+        
+        for estado, total in estados:
+            tk.Label(estado_frame, text=f"{estado}: {total}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
         for nome, total in clientes_cotacoes:
             tk.Label(cotacoes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
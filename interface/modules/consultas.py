@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
 from .base_module import BaseModule
+from db import get_connection
 
 class ConsultasModule(BaseModule):
     def setup_ui(self):
@@ -40,7 +41,6 @@ class ConsultasModule(BaseModule):
         # Adicione opções de tipo de consulta
 
     def create_resultados_section(self, parent):
-        import sqlite3
         if self.resultados_tree:
             self.resultados_tree.destroy()
         section_frame = tk.LabelFrame(parent, text="Resultados", bg='white', font=('Arial', 12, 'bold'))
@@ -50,10 +50,9 @@ class ConsultasModule(BaseModule):
         tree.heading("col1", text="Status")
         tree.heading("col2", text="Quantidade")
         tree.pack(fill="both", expand=True)
-        conn = sqlite3.connect('crm_compressores.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute("SELECT status, COUNT(*) FROM cotacoes GROUP BY status")
         for row in c.fetchall():
             tree.insert("", "end", values=row)
-        conn.close()
         self.resultados_tree = tree
\ No newline at end of file
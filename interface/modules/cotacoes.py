@@ -1,16 +1,20 @@
+import logging
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sqlite3
 from datetime import datetime
-from .base_module import BaseModule
-from database import DB_NAME
+from .base_module import BaseModule, ComboBusca, FonteConsulta, FonteLista
+from db import concorrencia, get_connection, sequencias, transaction
 from utils.formatters import format_currency, format_date, clean_number
-from pdf_generators.cotacao_nova import gerar_pdf_cotacao_nova
+from utils.busca import buscar, marcadores, ordenar_por_relevancia
+from utils.agregados import indicadores_cotacoes
+from utils import referencias
 from collections import Counter
 
+logger = logging.getLogger(__name__)
+
 class CotacoesModule(BaseModule):
     def setup_ui(self):
-        self.ensure_responsavel_id_column()
         # Container principal
         container = tk.Frame(self.frame, bg='#f8fafc')
         container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -30,6 +34,8 @@ class CotacoesModule(BaseModule):
         
         # Inicializar variáveis
         self.current_cotacao_id = None
+        self.versao_cotacao = None
+        self.numero_sugerido = None
         self.current_cotacao_itens = []
         
         # Carregar dados iniciais
@@ -38,20 +44,6 @@ class CotacoesModule(BaseModule):
         # Verificar cotações vencidas automaticamente
         self.verificar_cotacoes_vencidas()
         
-    def ensure_responsavel_id_column(self):
-        import sqlite3
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("PRAGMA table_info(cotacoes)")
-        columns = [row[1] for row in c.fetchall()]
-        if 'responsavel_id' not in columns:
-            try:
-                c.execute("ALTER TABLE cotacoes ADD COLUMN responsavel_id INTEGER")
-                conn.commit()
-            except Exception as e:
-                print(f"Erro ao adicionar coluna responsavel_id em cotacoes: {e}")
-        conn.close()
-        
     def create_header(self, parent):
         header_frame = tk.Frame(parent, bg='#f8fafc')
         header_frame.pack(fill="x", pady=(0, 20))
@@ -152,7 +144,7 @@ class CotacoesModule(BaseModule):
         cliente_frame = tk.Frame(fields_frame, bg='white')
         cliente_frame.grid(row=row, column=1, sticky="ew", padx=(10, 0), pady=5)
         
-        self.cliente_combo = ttk.Combobox(cliente_frame, textvariable=self.cliente_var, width=25)
+        self.cliente_combo = ComboBusca(cliente_frame, textvariable=self.cliente_var, width=25)
         self.cliente_combo.pack(side="left", fill="x", expand=True)
         self.cliente_combo.bind('<<ComboboxSelected>>', self.on_cliente_selected)
         
@@ -272,7 +264,7 @@ class CotacoesModule(BaseModule):
         nome_frame = tk.Frame(fields_grid, bg='white')
         nome_frame.grid(row=0, column=3, padx=5, sticky="ew")
         
-        self.item_nome_combo = ttk.Combobox(nome_frame, textvariable=self.item_nome_var, width=20)
+        self.item_nome_combo = ComboBusca(nome_frame, textvariable=self.item_nome_var, width=20)
         self.item_nome_combo.pack(side="left", fill="x", expand=True)
         self.item_nome_combo.bind("<<ComboboxSelected>>", self.on_item_selected)
         
@@ -338,35 +330,25 @@ class CotacoesModule(BaseModule):
         """Atualizar combo de produtos baseado no tipo selecionado"""
         tipo = self.item_tipo_var.get()
         if not tipo:
-            self.item_nome_combo['values'] = []
+            self.item_nome_combo.definir_fonte(None)
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            c.execute("SELECT nome FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome", (tipo,))
-            produtos = [row[0] for row in c.fetchall()]
-            self.item_nome_combo['values'] = produtos
+            self.item_nome_combo.definir_fonte(lambda: [p.nome for p in referencias.produtos(tipo)])
             self.item_nome_var.set("")  # Limpar seleção
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar produtos: {e}")
-        finally:
-            conn.close()
             
     def on_cliente_selected(self, event=None):
         """Quando um cliente é selecionado, preencher automaticamente o prazo de pagamento"""
         selected = self.cliente_var.get()
         if selected:
-            # Buscar o prazo de pagamento do cliente no banco
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-            cursor.execute("SELECT prazo_pagamento FROM clientes WHERE nome = ?", (selected,))
-            result = cursor.fetchone()
-            conn.close()
+            # O combo mostra "nome (ID: n)"
+            cliente_id = self.clientes_dict.get(selected)
+            cliente = referencias.cliente(cliente_id) if cliente_id else referencias.cliente_por_nome(selected)
             
-            if result and result[0]:
-                self.condicao_pagamento_var.set(result[0])
+            if cliente and cliente.prazo_pagamento:
+                self.condicao_pagamento_var.set(cliente.prazo_pagamento)
     
     def on_item_selected(self, event=None):
         """Callback quando um produto é selecionado"""
@@ -376,21 +358,14 @@ class CotacoesModule(BaseModule):
         if not nome or not tipo:
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            c.execute("SELECT valor_unitario, descricao FROM produtos WHERE nome = ? AND tipo = ?", (nome, tipo))
-            result = c.fetchone()
-            if result:
-                valor, descricao = result
-                self.item_valor_var.set(f"{valor:.2f}")
-                if descricao:
-                    self.item_desc_var.set(descricao)
+            produto = referencias.produto_por_nome(tipo, nome)
+            if produto:
+                self.item_valor_var.set(f"{produto.valor_unitario or 0:.2f}")
+                if produto.descricao:
+                    self.item_desc_var.set(produto.descricao)
         except sqlite3.Error as e:
             self.show_error(f"Erro ao buscar dados do produto: {e}")
-        finally:
-            conn.close()
             
     def create_itens_list(self, parent):
         # Frame para lista
@@ -475,30 +450,20 @@ class CotacoesModule(BaseModule):
         
     def refresh_clientes(self):
         """Atualizar lista de clientes"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            c.execute("SELECT id, nome FROM clientes ORDER BY nome")
-            clientes = c.fetchall()
+            self.clientes_dict = {f"{cliente.nome} (ID: {cliente.id})": cliente.id for cliente in referencias.clientes()}
+            self.cliente_combo.definir_fonte(lambda: list(self.clientes_dict))
             
-            self.clientes_dict = {f"{nome} (ID: {id})": id for id, nome in clientes}
-            cliente_values = list(self.clientes_dict.keys())
-            
-            self.cliente_combo['values'] = cliente_values
-            
-            print(f"Clientes carregados: {len(cliente_values)}")  # Debug
+            logger.debug("Clientes carregados: %d", len(self.clientes_dict))
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar clientes: {e}")
-        finally:
-            conn.close()
             
     def refresh_produtos(self):
         """Atualizar lista de produtos"""
         # Atualizar combo baseado no tipo selecionado
         self.update_produtos_combo()
-        print("Produtos atualizados")  # Debug
+        logger.debug("Produtos atualizados")
         
     def adicionar_item(self):
         tipo = self.item_tipo_var.get()
@@ -584,6 +549,7 @@ class CotacoesModule(BaseModule):
     def nova_cotacao(self):
         """Limpar formulário para nova cotação"""
         self.current_cotacao_id = None
+        self.versao_cotacao = None
         
         # Limpar campos
         self.numero_var.set("")
@@ -609,50 +575,18 @@ class CotacoesModule(BaseModule):
         self.numero_var.set(numero)
     
     def gerar_numero_sequencial(self):
-        """Gerar número sequencial para cotação"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
+        """Número previsto para a nova cotação (reservado só ao salvar, ver db/sequencias.py)"""
         try:
-            # Buscar o maior número sequencial existente
-            c.execute("""
-                SELECT numero_proposta 
-                FROM cotacoes 
-                WHERE numero_proposta LIKE 'PROP-%' 
-                ORDER BY CAST(SUBSTR(numero_proposta, 6) AS INTEGER) DESC 
-                LIMIT 1
-            """)
-            
-            resultado = c.fetchone()
-            
-            if resultado:
-                # Extrair o número da última cotação
-                ultimo_numero = resultado[0]
-                if ultimo_numero.startswith('PROP-'):
-                    try:
-                        numero_atual = int(ultimo_numero[5:])  # Remove 'PROP-' e converte para int
-                        proximo_numero = numero_atual + 1
-                    except ValueError:
-                        # Se não conseguir converter, usar timestamp
-                        proximo_numero = int(datetime.now().strftime('%Y%m%d%H%M%S'))
-                else:
-                    proximo_numero = 1
-            else:
-                # Primeira cotação
-                proximo_numero = 1
-            
-            # Formatar o número com zeros à esquerda (6 dígitos)
-            numero_formatado = f"PROP-{proximo_numero:06d}"
-            
-            return numero_formatado
-            
-        except Exception as e:
+            self.numero_sugerido = sequencias.previsao('cotacao', self._filial_id())
+        except (sqlite3.Error, ValueError) as e:
             print(f"Erro ao gerar número sequencial: {e}")
-            # Fallback para timestamp
-            return f"PROP-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        finally:
-            conn.close()
-        
+            self.numero_sugerido = ""
+        return self.numero_sugerido
+    
+    def _filial_id(self):
+        filial_str = self.filial_var.get()
+        return int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str)
+    
     def salvar_cotacao(self):
         """Salvar cotação no banco de dados"""
         # Validações
@@ -678,10 +612,13 @@ class CotacoesModule(BaseModule):
             self.show_warning("Adicione pelo menos um item à cotação.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
+            # Número sugerido pelo formulário: reservar agora (outra estação pode ter usado o previsto)
+            if not self.current_cotacao_id and numero == self.numero_sugerido:
+                numero = sequencias.reservar('cotacao', self._filial_id())
+                self.numero_var.set(numero)
+                self.numero_sugerido = None
+            
             # Calcular valor total
             valor_total = 0
             for item in self.itens_tree.get_children():
@@ -694,82 +631,77 @@ class CotacoesModule(BaseModule):
                         pass
             
             # Obter ID da filial
-            filial_str = self.filial_var.get()
-            filial_id = int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str)
+            filial_id = self._filial_id()
             
             # Dados da cotação
-            if self.current_cotacao_id:
-                # Atualizar cotação existente
-                c.execute("""
-                    UPDATE cotacoes SET
-                        numero_proposta = ?, modelo_compressor = ?, numero_serie_compressor = ?,
-                        observacoes = ?, valor_total = ?, status = ?, data_validade = ?,
-                        condicao_pagamento = ?, prazo_entrega = ?, filial_id = ?,
-                        esboco_servico = ?, relacao_pecas_substituir = ?, responsavel_id = ?
-                    WHERE id = ?
-                """, (numero, self.modelo_var.get(), self.serie_var.get(),
-                     self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
-                     self.status_var.get(), self.data_validade_var.get(),
-                     self.condicao_pagamento_var.get(), self.prazo_entrega_var.get(),
-                     filial_id, self.esboco_servico_text.get("1.0", tk.END).strip(),
-                     self.relacao_pecas_text.get("1.0", tk.END).strip(), self.user_id, self.current_cotacao_id))
-                
-                # Remover itens antigos
-                c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (self.current_cotacao_id,))
-                cotacao_id = self.current_cotacao_id
-            else:
-                # Inserir nova cotação
-                c.execute("""
-                    INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao,
-                                        modelo_compressor, numero_serie_compressor, observacoes,
-                                        valor_total, status, data_validade, condicao_pagamento,
-                                        prazo_entrega, filial_id, esboco_servico, relacao_pecas_substituir)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d'),
-                     self.modelo_var.get(), self.serie_var.get(),
-                     self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
-                     self.status_var.get(), self.data_validade_var.get(),
-                     self.condicao_pagamento_var.get(), self.prazo_entrega_var.get(),
-                     filial_id, self.esboco_servico_text.get("1.0", tk.END).strip(),
-                     self.relacao_pecas_text.get("1.0", tk.END).strip()))
-                     
-                cotacao_id = c.lastrowid
-                self.current_cotacao_id = cotacao_id
-            
-            # Inserir itens
+            campos = (self.modelo_var.get(), self.serie_var.get(),
+                      self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
+                      self.status_var.get(), self.data_validade_var.get(),
+                      self.condicao_pagamento_var.get(), self.prazo_entrega_var.get(),
+                      filial_id, self.esboco_servico_text.get("1.0", tk.END).strip(),
+                      self.relacao_pecas_text.get("1.0", tk.END).strip())
+            
+            # Itens
+            itens = []
             for item in self.itens_tree.get_children():
                 values = self.itens_tree.item(item)['values']
                 tipo, nome, qtd, tipo_transacao, valor_unit, mao_obra, desloc, estadia, total, desc = values
+                itens.append((tipo, nome, float(qtd), clean_number(valor_unit), clean_number(total), desc,
+                              clean_number(mao_obra), clean_number(desloc), clean_number(estadia), tipo_transacao))
+            
+            cotacao_id, versao_lida = self.current_cotacao_id, self.versao_cotacao
+            
+            def gravar(conn):
+                c = conn.cursor()
+                if cotacao_id:
+                    # Atualizar cotação existente (se ninguém a salvou depois de aberta)
+                    versao = concorrencia.reivindicar(conn, 'cotacao', cotacao_id, versao_lida)
+                    c.execute("""
+                        UPDATE cotacoes SET
+                            numero_proposta = ?, modelo_compressor = ?, numero_serie_compressor = ?,
+                            observacoes = ?, valor_total = ?, status = ?, data_validade = ?,
+                            condicao_pagamento = ?, prazo_entrega = ?, filial_id = ?,
+                            esboco_servico = ?, relacao_pecas_substituir = ?, responsavel_id = ?
+                        WHERE id = ?
+                    """, (numero,) + campos + (self.user_id, cotacao_id))
+                    
+                    # Remover itens antigos
+                    c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (cotacao_id,))
+                    id_gravado = cotacao_id
+                else:
+                    # Inserir nova cotação
+                    c.execute("""
+                        INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao,
+                                            modelo_compressor, numero_serie_compressor, observacoes,
+                                            valor_total, status, data_validade, condicao_pagamento,
+                                            prazo_entrega, filial_id, esboco_servico, relacao_pecas_substituir)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d')) + campos)
+                    id_gravado, versao = c.lastrowid, 1
                 
-                # Converter valores
-                quantidade = float(qtd)
-                valor_unitario = clean_number(valor_unit)
-                valor_mao_obra = clean_number(mao_obra)
-                valor_desloc = clean_number(desloc)
-                valor_estadia = clean_number(estadia)
-                valor_total_item = clean_number(total)
-                
-                c.execute("""
+                # Inserir itens
+                c.executemany("""
                     INSERT INTO itens_cotacao (cotacao_id, tipo, item_nome, quantidade,
                                              valor_unitario, valor_total_item, descricao,
                                              mao_obra, deslocamento, estadia, tipo_transacao)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (cotacao_id, tipo, nome, quantidade, valor_unitario,
-                     valor_total_item, desc, valor_mao_obra, valor_desloc, valor_estadia, tipo_transacao))
+                """, [(id_gravado,) + item for item in itens])
+                return id_gravado, versao
+            
+            self.current_cotacao_id, self.versao_cotacao = concorrencia.executar(gravar)
             
-            conn.commit()
             self.show_success("Cotação salva com sucesso!")
             
             # Emitir evento para atualizar outros módulos
-            self.emit_event('cotacao_created')
+            self.emit_event('cotacao_created', ids=self.current_cotacao_id)
             
             # Recarregar lista
             self.carregar_cotacoes()
             
+        except concorrencia.ConflitoVersao as e:
+            self.avisar_conflito("esta cotação", e, lambda: self.carregar_cotacao_para_edicao(cotacao_id))
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar cotação: {e}")
-        finally:
-            conn.close()
             
     def gerar_pdf(self):
         """Gerar PDF da cotação atual"""
@@ -780,126 +712,79 @@ class CotacoesModule(BaseModule):
         # Obter username do usuário atual para template personalizado
         current_username = self._get_current_username()
         
-        sucesso, resultado = gerar_pdf_cotacao_nova(self.current_cotacao_id, DB_NAME, current_username)
-        
-        if sucesso:
-            self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-        else:
-            self.show_error(f"Erro ao gerar PDF: {resultado}")
+        self.enfileirar_pdf('cotacao', self.current_cotacao_id, current_username)
             
     def _get_current_username(self):
         """Obter o username do usuário atual"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            c.execute("SELECT username FROM usuarios WHERE id = ?", (self.user_id,))
-            result = c.fetchone()
-            return result[0] if result else None
+            usuario = referencias.usuario(self.user_id)
+            return usuario.username if usuario else None
         except:
             return None
-        finally:
-            if 'conn' in locals():
-                conn.close()
             
     def carregar_cotacoes(self):
-        """Carregar lista de cotações com filtro por status"""
-        # Limpar lista atual
-        for item in self.cotacoes_tree.get_children():
-            self.cotacoes_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            # Aplicar filtro por status se definido
-            status_filter = getattr(self, 'status_filter_var', None)
-            if status_filter and status_filter.get() != "Todos":
-                c.execute("""
-                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-                    FROM cotacoes c
-                    JOIN clientes cl ON c.cliente_id = cl.id
-                    WHERE c.status = ?
-                    ORDER BY c.created_at DESC
-                """, (status_filter.get(),))
-            else:
-                c.execute("""
-                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-                    FROM cotacoes c
-                    JOIN clientes cl ON c.cliente_id = cl.id
-                    ORDER BY c.created_at DESC
-                """)
+        """Carregar lista de cotações com filtro por status (lida do banco conforme a rolagem)"""
+        where, params = None, ()
+        
+        # Aplicar filtro por status se definido
+        status_filter = getattr(self, 'status_filter_var', None)
+        if status_filter and status_filter.get() != "Todos":
+            where, params = "c.status = ?", (status_filter.get(),)
+            
+        self.cotacoes_lista.definir_fonte(FonteConsulta(
+            colunas=("c.id", "c.numero_proposta", "cl.nome", "c.data_criacao", "c.valor_total", "c.status"),
+            origem="cotacoes c JOIN clientes cl ON c.cliente_id = cl.id",
+            ordem=("c.created_at", "c.id"),
+            decrescente=True,
+            where=where,
+            params=params,
+            formatar=self._linha_cotacao
+        ))
             
-            for row in c.fetchall():
-                cotacao_id, numero, cliente, data, valor, status = row
-                self.cotacoes_tree.insert("", "end", values=(
-                    numero,
-                    cliente,
-                    format_date(data),
-                    format_currency(valor) if valor else "R$ 0,00",
-                    status
-                ), tags=(cotacao_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar cotações: {e}")
-        finally:
-            conn.close()
+    def _linha_cotacao(self, row):
+        """Valores e tags de uma cotação na lista"""
+        cotacao_id, numero, cliente, data, valor, status = row
+        return (
+            numero,
+            cliente,
+            format_date(data),
+            format_currency(valor) if valor else "R$ 0,00",
+            status
+        ), (cotacao_id,)
             
     def buscar_cotacoes(self):
         """Buscar cotações com filtro"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_cotacoes()
+            return
         
-        # Limpar lista atual
-        for item in self.cotacoes_tree.get_children():
-            self.cotacoes_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
-            if termo:
-                c.execute("""
-                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-                    FROM cotacoes c
-                    JOIN clientes cl ON c.cliente_id = cl.id
-                    WHERE c.numero_proposta LIKE ? OR cl.nome LIKE ?
-                    ORDER BY c.created_at DESC
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-                    FROM cotacoes c
-                    JOIN clientes cl ON c.cliente_id = cl.id
-                    ORDER BY c.created_at DESC
-                """)
+            # Busca textual (número, modelo, série ou cliente) ordenada por relevância
+            ids = buscar("cotacoes", termo)
+            c.execute(f"""
+                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+                FROM cotacoes c
+                JOIN clientes cl ON c.cliente_id = cl.id
+                WHERE c.id IN ({marcadores(len(ids))})
+            """, ids)
             
-            for row in c.fetchall():
-                cotacao_id, numero, cliente, data, valor, status = row
-                self.cotacoes_tree.insert("", "end", values=(
-                    numero,
-                    cliente,
-                    format_date(data),
-                    format_currency(valor) if valor else "R$ 0,00",
-                    status
-                ), tags=(cotacao_id,))
+            self.cotacoes_lista.definir_fonte(
+                FonteLista(ordenar_por_relevancia(c.fetchall(), ids), self._linha_cotacao))
                 
         except sqlite3.Error as e:
             self.show_error(f"Erro ao buscar cotações: {e}")
-        finally:
-            conn.close()
             
     def editar_cotacao_selecionada(self):
         """Editar cotação selecionada"""
-        selected = self.cotacoes_tree.selection()
-        if not selected:
+        cotacao_id = self.cotacoes_lista.id_selecionado()
+        if cotacao_id is None:
             self.show_warning("Selecione uma cotação para editar.")
             return
             
-        # Obter ID da cotação
-        tags = self.cotacoes_tree.item(selected[0])['tags']
-        if not tags:
-            return
-            
-        cotacao_id = tags[0]
         self.carregar_cotacao_para_edicao(cotacao_id)
         
         # Mudar para aba de nova cotação
@@ -907,10 +792,13 @@ class CotacoesModule(BaseModule):
         
     def carregar_cotacao_para_edicao(self, cotacao_id):
         """Carregar dados da cotação para edição"""
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
+            # Versão lida antes dos dados (ver db/concorrencia.py)
+            versao = concorrencia.versao('cotacao', cotacao_id, conn)
+            
             # Carregar dados da cotação
             c.execute("""
                 SELECT c.*, cl.nome
@@ -926,6 +814,7 @@ class CotacoesModule(BaseModule):
                 
             # Preencher campos
             self.current_cotacao_id = cotacao_id
+            self.versao_cotacao = versao
             self.numero_var.set(cotacao[1])  # numero_proposta
             
             # Encontrar cliente no combo
@@ -962,8 +851,6 @@ class CotacoesModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar cotação: {e}")
-        finally:
-            conn.close()
             
     def carregar_itens_cotacao(self, cotacao_id):
         """Carregar itens da cotação"""
@@ -971,7 +858,7 @@ class CotacoesModule(BaseModule):
         for item in self.itens_tree.get_children():
             self.itens_tree.delete(item)
             
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
@@ -1002,62 +889,41 @@ class CotacoesModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar itens: {e}")
-        finally:
-            conn.close()
             
     def duplicar_cotacao(self):
         """Duplicar cotação selecionada"""
-        selected = self.cotacoes_tree.selection()
-        if not selected:
+        cotacao_id = self.cotacoes_lista.id_selecionado()
+        if cotacao_id is None:
             self.show_warning("Selecione uma cotação para duplicar.")
             return
             
-        # Obter ID da cotação
-        tags = self.cotacoes_tree.item(selected[0])['tags']
-        if not tags:
-            return
-            
-        cotacao_id = tags[0]
         self.carregar_cotacao_para_edicao(cotacao_id)
         
         # Limpar ID e gerar novo número
         self.current_cotacao_id = None
-        numero = f"PROP-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        self.numero_var.set(numero)
+        self.versao_cotacao = None
+        self.numero_var.set(self.gerar_numero_sequencial())
         
         # Mudar para aba de nova cotação
         self.notebook.select(0)
         
     def gerar_pdf_selecionado(self):
         """Gerar PDF da cotação selecionada"""
-        selected = self.cotacoes_tree.selection()
-        if not selected:
+        cotacao_id = self.cotacoes_lista.id_selecionado()
+        if cotacao_id is None:
             self.show_warning("Selecione uma cotação para gerar PDF.")
             return
             
-        # Obter ID da cotação
-        tags = self.cotacoes_tree.item(selected[0])['tags']
-        if not tags:
-            return
-            
-        cotacao_id = tags[0]
         # Obter username do usuário atual para template personalizado
         current_username = self._get_current_username()
-        sucesso, resultado = gerar_pdf_cotacao_nova(cotacao_id, DB_NAME, current_username)
-        
-        if sucesso:
-            self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-        else:
-            self.show_error(f"Erro ao gerar PDF: {resultado}")
+        self.enfileirar_pdf('cotacao', cotacao_id, current_username)
             
     def handle_event(self, event_type, data=None):
         """Manipular eventos do sistema"""
-        if event_type == 'cliente_created':
-            self.refresh_clientes()
-            print("Lista de clientes atualizada automaticamente!")
+        if event_type in ('cliente_created', 'cliente_deleted'):
+            self.atualizar_apos_eventos(self.refresh_clientes)
         elif event_type == 'produto_created':
-            self.refresh_produtos()
-            print("Lista de produtos atualizada automaticamente!")
+            self.atualizar_apos_eventos(self.refresh_produtos)
 
     def create_cotacao_dashboard_section(self, parent):
         """Criar dashboard específico da cotação"""
@@ -1152,30 +1018,28 @@ class CotacoesModule(BaseModule):
 
     def verificar_cotacoes_vencidas(self):
         """Verificar e atualizar automaticamente cotações vencidas"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         
         try:
-            # Buscar cotações em aberto com data de validade vencida
-            c.execute("""
-                UPDATE cotacoes 
-                SET status = 'Rejeitada' 
-                WHERE status = 'Em Aberto' 
-                AND data_validade IS NOT NULL 
-                AND data_validade != ''
-                AND date(data_validade) < date('now')
-            """)
+            with transaction() as conn:
+                c = conn.cursor()
+                # Buscar cotações em aberto com data de validade vencida
+                c.execute("""
+                    UPDATE cotacoes 
+                    SET status = 'Rejeitada', versao = versao + 1
+                    WHERE status = 'Em Aberto' 
+                    AND data_validade IS NOT NULL 
+                    AND data_validade != ''
+                    AND date(data_validade) < date('now')
+                """)
             
-            rows_affected = c.rowcount
-            conn.commit()
+                rows_affected = c.rowcount
             
             if rows_affected > 0:
                 print(f"✅ {rows_affected} cotação(ões) vencida(s) atualizada(s) automaticamente para 'Rejeitada'")
+                self.emit_event('cotacao_updated')
                 
         except sqlite3.Error as e:
             print(f"Erro ao verificar cotações vencidas: {e}")
-        finally:
-            conn.close()
 
     def create_lista_cotacoes_tab(self):
         # Frame da aba
@@ -1214,31 +1078,20 @@ class CotacoesModule(BaseModule):
         
     def create_lista_cotacoes_treeview(self, parent):
         """Criar treeview para lista de cotações"""
-        # Treeview para lista
-        columns = ("numero", "cliente", "data", "valor", "status")
-        self.cotacoes_tree = ttk.Treeview(parent, columns=columns, show="headings", height=15)
-        
-        # Cabeçalhos
-        self.cotacoes_tree.heading("numero", text="Número")
-        self.cotacoes_tree.heading("cliente", text="Cliente")
-        self.cotacoes_tree.heading("data", text="Data")
-        self.cotacoes_tree.heading("valor", text="Valor")
-        self.cotacoes_tree.heading("status", text="Status")
-        
-        # Larguras
-        self.cotacoes_tree.column("numero", width=150)
-        self.cotacoes_tree.column("cliente", width=250)
-        self.cotacoes_tree.column("data", width=100)
-        self.cotacoes_tree.column("valor", width=120)
-        self.cotacoes_tree.column("status", width=100)
-        
-        # Scrollbar
-        lista_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.cotacoes_tree.yview)
-        self.cotacoes_tree.configure(yscrollcommand=lista_scrollbar.set)
-        
-        # Pack
-        self.cotacoes_tree.pack(side="left", fill="both", expand=True)
-        lista_scrollbar.pack(side="right", fill="y")
+        # Lista virtual (só as linhas visíveis viram itens da Treeview)
+        self.cotacoes_lista = self.criar_lista_virtual(
+            parent,
+            colunas=(
+                ("numero", "Número", 150),
+                ("cliente", "Cliente", 250),
+                ("data", "Data", 100),
+                ("valor", "Valor", 120),
+                ("status", "Status", 100),
+            ),
+            ordenaveis={"numero": 1, "cliente": 2, "data": 3, "valor": 4, "status": 5},
+            mensagem_erro="Erro ao carregar cotações"
+        )
+        self.cotacoes_lista.pack(fill="both", expand=True)
         
     def create_lista_cotacoes_buttons(self, parent):
         """Criar botões para lista de cotações"""
@@ -1261,8 +1114,7 @@ class CotacoesModule(BaseModule):
         
     def verificar_cotacoes_vencidas_manual(self):
         """Verificar cotações vencidas manualmente e mostrar resultado"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        c = get_connection().cursor()
         
         try:
             # Primeiro verificar quantas cotações serão afetadas
@@ -1287,24 +1139,22 @@ class CotacoesModule(BaseModule):
                 return
             
             # Atualizar cotações vencidas
-            c.execute("""
-                UPDATE cotacoes 
-                SET status = 'Rejeitada' 
-                WHERE status = 'Em Aberto' 
-                AND data_validade IS NOT NULL 
-                AND data_validade != ''
-                AND date(data_validade) < date('now')
-            """)
-            
-            conn.commit()
+            with transaction() as conn:
+                conn.execute("""
+                    UPDATE cotacoes 
+                    SET status = 'Rejeitada', versao = versao + 1
+                    WHERE status = 'Em Aberto' 
+                    AND data_validade IS NOT NULL 
+                    AND data_validade != ''
+                    AND date(data_validade) < date('now')
+                """)
             
             self.show_success(f"{count_before} cotação(ões) vencida(s) atualizada(s) para 'Rejeitada'!")
+            self.emit_event('cotacao_updated')
             self.carregar_cotacoes()  # Recarregar lista
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao verificar cotações vencidas: {e}")
-        finally:
-            conn.close()
 
     def create_cotacoes_indicadores(self, parent):
         """Criar indicadores para a aba de cotações"""
@@ -1320,20 +1170,33 @@ class CotacoesModule(BaseModule):
         faturamento_frame = tk.LabelFrame(parent, text="Faturamento Total", bg='#f8fafc', font=('Arial', 12, 'bold'))
         faturamento_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COALESCE(SUM(valor_total), 0) FROM cotacoes WHERE status = 'Aprovada'")
-        faturamento = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(faturamento_frame, text=f"R$ {format_currency(faturamento)}", font=('Arial', 20, 'bold'), 
-                bg='#f8fafc', fg='#059669').pack(pady=10)
-        
         # Total de itens vendidos
         itens_frame = tk.LabelFrame(parent, text="Total de Itens Vendidos", bg='#f8fafc', font=('Arial', 12, 'bold'))
         itens_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        # Estados que mais compram
+        estados_frame = tk.LabelFrame(parent, text="Estados que Mais Compram", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        estados_frame.pack(fill="x", padx=10, pady=5)
+        
+        # Cotações declinadas
+        declinadas_frame = tk.LabelFrame(parent, text="Cotações Declinadas", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        declinadas_frame.pack(fill="x", padx=10, pady=5)
+        
+        # Status das cotações
+        status_frame = tk.LabelFrame(parent, text="Status das Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        status_frame.pack(fill="x", padx=10, pady=5)
+        
+        frames = (faturamento_frame, itens_frame, estados_frame, declinadas_frame, status_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_admin,
+            lambda dados: self._preencher_indicadores_admin(dados, *frames)
+        )
+    
+    def _consultar_indicadores_admin(self, conn):
+        """Consultas dos indicadores gerais (executada fora da thread da interface)"""
+        indicadores = indicadores_cotacoes(conn=conn)
         c = conn.cursor()
         c.execute("""
             SELECT COALESCE(SUM(ci.quantidade), 0)
@@ -1342,17 +1205,7 @@ class CotacoesModule(BaseModule):
             WHERE c.status = 'Aprovada'
         """)
         itens_vendidos = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(itens_frame, text=f"{itens_vendidos}", font=('Arial', 20, 'bold'), 
-                bg='#f8fafc', fg='#1e40af').pack(pady=10)
         
-        # Estados que mais compram
-        estados_frame = tk.LabelFrame(parent, text="Estados que Mais Compram", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        estados_frame.pack(fill="x", padx=10, pady=5)
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         c.execute("""
             SELECT cl.estado, COUNT(c.id) as total_cotacoes
             FROM cotacoes c
@@ -1363,40 +1216,27 @@ class CotacoesModule(BaseModule):
             LIMIT 5
         """)
         estados = c.fetchall()
-        conn.close()
+        return (indicadores['faturamento'], itens_vendidos, estados,
+                indicadores['rejeitadas'], indicadores['por_status'])
+    
+    def _preencher_indicadores_admin(self, dados, faturamento_frame, itens_frame, estados_frame,
+                                     declinadas_frame, status_frame):
+        faturamento, itens_vendidos, estados, declinadas, status_list = dados
+        self.limpar_frame(faturamento_frame, itens_frame, estados_frame, declinadas_frame, status_frame)
+        
+        tk.Label(faturamento_frame, text=f"R$ {format_currency(faturamento)}", font=('Arial', 20, 'bold'), 
+                bg='#f8fafc', fg='#059669').pack(pady=10)
+        
+        tk.Label(itens_frame, text=f"{itens_vendidos}", font=('Arial', 20, 'bold'), 
+                bg='#f8fafc', fg='#1e40af').pack(pady=10)
         
         for estado, total in estados:
             tk.Label(estados_frame, text=f"{estado}: {total}", font=('Arial', 10), 
                     bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
-        # Cotações declinadas
-        declinadas_frame = tk.LabelFrame(parent, text="Cotações Declinadas", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        declinadas_frame.pack(fill="x", padx=10, pady=5)
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM cotacoes WHERE status = 'Rejeitada'")
-        declinadas = c.fetchone()[0]
-        conn.close()
-        
         tk.Label(declinadas_frame, text=f"{declinadas}", font=('Arial', 20, 'bold'), 
                 bg='#f8fafc', fg='#dc2626').pack(pady=10)
         
-        # Status das cotações
-        status_frame = tk.LabelFrame(parent, text="Status das Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        status_frame.pack(fill="x", padx=10, pady=5)
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("""
-            SELECT status, COUNT(*) as total
-            FROM cotacoes
-            GROUP BY status
-            ORDER BY total DESC
-        """)
-        status_list = c.fetchall()
-        conn.close()
-        
         for status, total in status_list:
             color = '#059669' if status == 'Aprovada' else '#dc2626' if status == 'Rejeitada' else '#f59e0b'
             tk.Label(status_frame, text=f"{status}: {total}", font=('Arial', 10), 
@@ -1408,54 +1248,29 @@ class CotacoesModule(BaseModule):
         minhas_frame = tk.LabelFrame(parent, text="Minhas Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
         minhas_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (self.user_id,))
-        total = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(minhas_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
-                bg='#f8fafc', fg='#059669').pack(pady=10)
-        
         # Meu faturamento
         faturamento_frame = tk.LabelFrame(parent, text="Meu Faturamento", bg='#f8fafc', font=('Arial', 12, 'bold'))
         faturamento_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COALESCE(SUM(valor_total), 0) FROM cotacoes WHERE responsavel_id = ? AND status = 'Aprovada'", (self.user_id,))
-        faturamento = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(faturamento_frame, text=f"R$ {format_currency(faturamento)}", font=('Arial', 16, 'bold'), 
-                bg='#f8fafc', fg='#059669').pack(pady=10)
-        
         # Meus status
         status_frame = tk.LabelFrame(parent, text="Status das Minhas Cotações", bg='#f8fafc', font=('Arial', 12, 'bold'))
         status_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("""
-            SELECT status, COUNT(*) as total
-            FROM cotacoes
-            WHERE responsavel_id = ?
-            GROUP BY status
-            ORDER BY total DESC
-        """, (self.user_id,))
-        status_list = c.fetchall()
-        conn.close()
-        
-        for status, total in status_list:
-            color = '#059669' if status == 'Aprovada' else '#dc2626' if status == 'Rejeitada' else '#f59e0b'
-            tk.Label(status_frame, text=f"{status}: {total}", font=('Arial', 10), 
-                    bg='#f8fafc', fg=color).pack(anchor="w", padx=10, pady=2)
-        
         # Meus clientes mais frequentes
         clientes_frame = tk.LabelFrame(parent, text="Meus Clientes Mais Frequentes", bg='#f8fafc', font=('Arial', 12, 'bold'))
         clientes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        frames = (minhas_frame, faturamento_frame, status_frame, clientes_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_usuario,
+            lambda dados: self._preencher_indicadores_usuario(dados, *frames)
+        )
+    
+    def _consultar_indicadores_usuario(self, conn):
+        """Consultas dos indicadores do usuário (executada fora da thread da interface)"""
+        indicadores = indicadores_cotacoes(self.user_id, conn)
         c = conn.cursor()
         c.execute("""
             SELECT cl.nome, COUNT(c.id) as total_cotacoes
@@ -1467,7 +1282,22 @@ class CotacoesModule(BaseModule):
             LIMIT 5
         """, (self.user_id,))
         clientes = c.fetchall()
-        conn.close()
+        return indicadores['total'], indicadores['faturamento'], indicadores['por_status'], clientes
+    
+    def _preencher_indicadores_usuario(self, dados, minhas_frame, faturamento_frame, status_frame, clientes_frame):
+        total, faturamento, status_list, clientes = dados
+        self.limpar_frame(minhas_frame, faturamento_frame, status_frame, clientes_frame)
+        
+        tk.Label(minhas_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
+                bg='#f8fafc', fg='#059669').pack(pady=10)
+        
+        tk.Label(faturamento_frame, text=f"R$ {format_currency(faturamento)}", font=('Arial', 16, 'bold'), 
+                bg='#f8fafc', fg='#059669').pack(pady=10)
+        
+        for status, total in status_list:
+            color = '#059669' if status == 'Aprovada' else '#dc2626' if status == 'Rejeitada' else '#f59e0b'
+            tk.Label(status_frame, text=f"{status}: {total}", font=('Arial', 10), 
+                    bg='#f8fafc', fg=color).pack(anchor="w", padx=10, pady=2)
         
         for nome, total in clientes:
             tk.Label(clientes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
@@ -1,10 +1,10 @@
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
 from datetime import datetime, timedelta
 from .base_module import BaseModule
-from database import DB_NAME
+from db import get_connection
 from utils.formatters import format_currency
+from utils.agregados import EVENTOS_INVALIDACAO, indicadores_cotacoes, indicadores_relatorios
 
 class DashboardModule(BaseModule):
     def setup_ui(self):
@@ -264,7 +264,7 @@ class DashboardModule(BaseModule):
     def load_dashboard_data(self):
         """Carregar dados do dashboard baseado no usuário"""
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Obter informações do usuário atual
@@ -288,92 +288,60 @@ class DashboardModule(BaseModule):
             # Carregar performance
             self.load_performance_data(cursor, user_role)
             
-            conn.close()
-            
         except Exception as e:
             print(f"Erro ao carregar dashboard: {e}")
     
     def load_master_stats(self, cursor):
         """Carregar estatísticas para usuário master"""
-        # Total de cotações
-        cursor.execute("SELECT COUNT(*) FROM cotacoes")
-        total_quotes = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM cotacoes WHERE status = 'Em Aberto'")
-        open_quotes = cursor.fetchone()[0]
-        
-        # Valor total
-        cursor.execute("SELECT COALESCE(SUM(valor_total), 0) FROM cotacoes")
-        total_value = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COALESCE(AVG(valor_total), 0) FROM cotacoes WHERE valor_total > 0")
-        avg_value = cursor.fetchone()[0]
-        
-        # Relatórios
-        cursor.execute("SELECT COUNT(*) FROM relatorios")
-        total_reports = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM relatorios WHERE created_at >= date('now', 'start of month')")
-        month_reports = cursor.fetchone()[0]
-        
-        # Performance
-        cursor.execute("SELECT COUNT(*) FROM cotacoes WHERE status = 'Aprovada'")
-        approved_quotes = cursor.fetchone()[0]
-        
-        approval_rate = (approved_quotes / total_quotes * 100) if total_quotes > 0 else 0
-        
-        # Atualizar cards
-        self.quotes_card.value_label.config(text=str(total_quotes))
-        self.quotes_card.subtitle_label.config(text=f"Em Aberto: {open_quotes}")
-        
-        self.value_card.value_label.config(text=format_currency(total_value))
-        self.value_card.subtitle_label.config(text=f"Média: {format_currency(avg_value)}")
-        
-        self.reports_card.value_label.config(text=str(total_reports))
-        self.reports_card.subtitle_label.config(text=f"Este mês: {month_reports}")
-        
-        self.performance_card.value_label.config(text=f"{approval_rate:.1f}%")
+        self.atualizar_cards(indicadores_cotacoes(), indicadores_relatorios())
         
     def load_user_stats(self, cursor, user_id):
         """Carregar estatísticas para usuário específico"""
-        # Total de cotações do usuário
-        cursor.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (user_id,))
-        total_quotes = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ? AND status = 'Em Aberto'", (user_id,))
-        open_quotes = cursor.fetchone()[0]
-        
-        # Valor total do usuário
-        cursor.execute("SELECT COALESCE(SUM(valor_total), 0) FROM cotacoes WHERE responsavel_id = ?", (user_id,))
-        total_value = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COALESCE(AVG(valor_total), 0) FROM cotacoes WHERE responsavel_id = ? AND valor_total > 0", (user_id,))
-        avg_value = cursor.fetchone()[0]
-        
-        # Relatórios do usuário
-        cursor.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (user_id,))
-        total_reports = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ? AND created_at >= date('now', 'start of month')", (user_id,))
-        month_reports = cursor.fetchone()[0]
-        
-        # Performance do usuário
-        cursor.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ? AND status = 'Aprovada'", (user_id,))
-        approved_quotes = cursor.fetchone()[0]
-        
-        approval_rate = (approved_quotes / total_quotes * 100) if total_quotes > 0 else 0
+        self.atualizar_cards(indicadores_cotacoes(user_id), indicadores_relatorios(user_id))
+    
+    def atualizar_cards(self, cotacoes, relatorios):
+        """Atualizar os textos dos cards (os widgets são mantidos)"""
+        total_quotes = cotacoes['total']
+        approval_rate = (cotacoes['aprovadas'] / total_quotes * 100) if total_quotes > 0 else 0
         
-        # Atualizar cards
         self.quotes_card.value_label.config(text=str(total_quotes))
-        self.quotes_card.subtitle_label.config(text=f"Em Aberto: {open_quotes}")
+        self.quotes_card.subtitle_label.config(text=f"Em Aberto: {cotacoes['em_aberto']}")
         
-        self.value_card.value_label.config(text=format_currency(total_value))
-        self.value_card.subtitle_label.config(text=f"Média: {format_currency(avg_value)}")
+        self.value_card.value_label.config(text=format_currency(cotacoes['valor_total']))
+        self.value_card.subtitle_label.config(text=f"Média: {format_currency(cotacoes['valor_medio'])}")
         
-        self.reports_card.value_label.config(text=str(total_reports))
-        self.reports_card.subtitle_label.config(text=f"Este mês: {month_reports}")
+        self.reports_card.value_label.config(text=str(relatorios['total']))
+        self.reports_card.subtitle_label.config(text=f"Este mês: {relatorios['este_mes']}")
         
         self.performance_card.value_label.config(text=f"{approval_rate:.1f}%")
+        
+        # Status das cotações (mesma consulta dos cards)
+        self.atualizar_linhas(self.status_list, cotacoes['por_status'])
+    
+    def atualizar_linhas(self, container, linhas):
+        """
+        Mostrar pares (texto, valor) no container reaproveitando as linhas já
+        criadas: só linhas a mais são criadas ou removidas.
+        """
+        existentes = getattr(container, 'linhas', [])
+        for i, (texto, valor) in enumerate(linhas):
+            if i < len(existentes):
+                _frame, texto_label, valor_label = existentes[i]
+                texto_label.config(text=texto)
+                valor_label.config(text=str(valor))
+                continue
+            linha_frame = tk.Frame(container, bg='white')
+            linha_frame.pack(fill="x", pady=2)
+            
+            texto_label = tk.Label(linha_frame, text=texto, font=('Arial', 10), bg='white')
+            texto_label.pack(side="left")
+            valor_label = tk.Label(linha_frame, text=str(valor), font=('Arial', 10, 'bold'), bg='white')
+            valor_label.pack(side="right")
+            existentes.append((linha_frame, texto_label, valor_label))
+        
+        for linha_frame, _texto, _valor in existentes[len(linhas):]:
+            linha_frame.destroy()
+        container.linhas = existentes[:len(linhas)]
     
     def load_recent_quotes(self, cursor, role):
         """Carregar cotações recentes"""
@@ -416,27 +384,16 @@ class DashboardModule(BaseModule):
             self.reports_tree.delete(item)
         
         # Query baseada no perfil
+        query = """
+            SELECT rt.created_at, cl.nome, u.nome_completo, 'Concluído' as status
+            FROM relatorios_tecnicos rt
+            LEFT JOIN clientes cl ON rt.cliente_id = cl.id
+            LEFT JOIN usuarios u ON rt.responsavel_id = u.id
+        """
         if role == 'master':
-            query = """
-                SELECT r.created_at, cl.nome, t.nome, r.status
-                FROM relatorios r
-                LEFT JOIN clientes cl ON r.cliente_id = cl.id
-                LEFT JOIN tecnicos t ON r.tecnico_id = t.id
-                ORDER BY r.created_at DESC
-                LIMIT 10
-            """
-            cursor.execute(query)
+            cursor.execute(query + " ORDER BY rt.created_at DESC LIMIT 10")
         else:
-            query = """
-                SELECT rt.created_at, cl.nome, u.nome_completo, 'Concluído' as status
-                FROM relatorios_tecnicos rt
-                LEFT JOIN clientes cl ON rt.cliente_id = cl.id
-                LEFT JOIN usuarios u ON rt.responsavel_id = u.id
-                WHERE rt.responsavel_id = ?
-                ORDER BY rt.created_at DESC
-                LIMIT 10
-            """
-            cursor.execute(query, (self.user_id,))
+            cursor.execute(query + " WHERE rt.responsavel_id = ? ORDER BY rt.created_at DESC LIMIT 10", (self.user_id,))
         
         for row in cursor.fetchall():
             data, cliente, tecnico, status = row
@@ -445,44 +402,13 @@ class DashboardModule(BaseModule):
             self.reports_tree.insert('', 'end', values=(data_str, cliente, tecnico, status))
     
     def load_performance_data(self, cursor, role):
-        """Carregar dados de performance"""
-        # Limpar listas
-        for widget in self.status_list.winfo_children():
-            widget.destroy()
-        
-        for widget in self.products_list.winfo_children():
-            widget.destroy()
-        
-        # Status das cotações
-        if role == 'master':
-            cursor.execute("""
-                SELECT status, COUNT(*) 
-                FROM cotacoes 
-                GROUP BY status 
-                ORDER BY COUNT(*) DESC
-            """)
-        else:
-            cursor.execute("""
-                SELECT status, COUNT(*) 
-                FROM cotacoes 
-                WHERE responsavel_id = ?
-                GROUP BY status 
-                ORDER BY COUNT(*) DESC
-            """, (self.user_id,))
-        
-        for status, count in cursor.fetchall():
-            status_frame = tk.Frame(self.status_list, bg='white')
-            status_frame.pack(fill="x", pady=2)
-            
-            tk.Label(status_frame, text=status, font=('Arial', 10), bg='white').pack(side="left")
-            tk.Label(status_frame, text=str(count), font=('Arial', 10, 'bold'), bg='white').pack(side="right")
-        
+        """Carregar dados de performance (o status das cotações vem com os cards)"""
         # Top produtos
         if role == 'master':
             cursor.execute("""
                 SELECT p.nome, COUNT(*) 
-                FROM cotacao_itens ci
-                JOIN produtos p ON ci.produto_id = p.id
+                FROM itens_cotacao ic
+                JOIN produtos p ON ic.produto_id = p.id
                 GROUP BY p.id, p.nome
                 ORDER BY COUNT(*) DESC
                 LIMIT 5
@@ -499,21 +425,15 @@ class DashboardModule(BaseModule):
                 LIMIT 5
             """, (self.user_id,))
         
-        for produto, count in cursor.fetchall():
-            prod_frame = tk.Frame(self.products_list, bg='white')
-            prod_frame.pack(fill="x", pady=2)
-            
-            tk.Label(prod_frame, text=produto, font=('Arial', 10), bg='white').pack(side="left")
-            tk.Label(prod_frame, text=str(count), font=('Arial', 10, 'bold'), bg='white').pack(side="right")
+        self.atualizar_linhas(self.products_list, cursor.fetchall())
     
     def _get_current_username(self):
         """Obter nome do usuário atual"""
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT username FROM usuarios WHERE id = (SELECT MAX(id) FROM usuarios)")
             result = cursor.fetchone()
-            conn.close()
             return result[0] if result else "Usuário"
         except:
             return "Usuário"
@@ -521,11 +441,10 @@ class DashboardModule(BaseModule):
     def _get_user_role(self, username):
         """Obter perfil do usuário"""
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT role FROM usuarios WHERE username = ?", (username,))
             result = cursor.fetchone()
-            conn.close()
             return result[0] if result else "operador"
         except:
             return "operador"
@@ -537,5 +456,6 @@ class DashboardModule(BaseModule):
     
     def handle_event(self, event_type, data=None):
         """Manipular eventos do sistema"""
-        if event_type == "refresh_dashboard":
-            self.load_dashboard_data()
\ No newline at end of file
+        # Cotações/relatórios alterados: os indicadores já foram invalidados (ver utils.agregados)
+        if event_type in EVENTOS_INVALIDACAO:
+            self.atualizar_apos_eventos(self.load_dashboard_data)
\ No newline at end of file
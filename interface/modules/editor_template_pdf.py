@@ -1,6 +1,5 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog, colorchooser
-import sqlite3
 import json
 import os
 from datetime import datetime
@@ -8,6 +7,8 @@ import re
 
 # Importar módulo base
 from .base_module import BaseModule
+from db import get_connection, transaction
+from utils import perf
 
 class EditorTemplatePDFModule(BaseModule):
     def __init__(self, parent, user_id, role, main_window):
@@ -48,9 +49,6 @@ class EditorTemplatePDFModule(BaseModule):
             self.selected_element = None
             self.drag_data = {}
             
-            # Inicializar banco de templates
-            self.init_template_database()
-            
             # Carregar template padrão
             self.load_default_template()
             
@@ -351,55 +349,6 @@ class EditorTemplatePDFModule(BaseModule):
         # Desenhar página inicial
         self.draw_page()
     
-    def init_template_database(self):
-        """Inicializar banco de dados para templates"""
-        try:
-            conn = sqlite3.connect(self.db_name)
-            c = conn.cursor()
-            
-            # Tabela de templates
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS pdf_templates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    description TEXT,
-                    template_data TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES usuarios (id)
-                )
-            """)
-            
-            # Tabela de elementos dos templates
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS pdf_template_elements (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    template_id INTEGER,
-                    page_number INTEGER,
-                    element_type TEXT,
-                    element_data TEXT,
-                    position_x REAL,
-                    position_y REAL,
-                    width REAL,
-                    height REAL,
-                    font_family TEXT DEFAULT 'Arial',
-                    font_size INTEGER DEFAULT 11,
-                    font_style TEXT DEFAULT 'normal',
-                    color TEXT DEFAULT '#000000',
-                    z_index INTEGER DEFAULT 0,
-                    FOREIGN KEY (template_id) REFERENCES pdf_templates (id)
-                )
-            """)
-            
-            conn.commit()
-            
-        except Exception as e:
-            print(f"Erro ao inicializar banco de templates: {e}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
-    
     def load_default_template(self):
         """Carregar template padrão baseado no PDF atual com proporções A4 corretas"""
         try:
@@ -1351,6 +1300,7 @@ class EditorTemplatePDFModule(BaseModule):
                 
                 self.element_listbox.insert(tk.END, display_text)
     
+    @perf.medido("editor.draw_page")
     def draw_page(self):
         """Desenhar página no canvas"""
         if self.canvas is None:
@@ -2478,7 +2428,7 @@ class EditorTemplatePDFModule(BaseModule):
     def load_template_list(self):
         """Carregar lista de templates"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            conn = get_connection(self.db_name)
             c = conn.cursor()
             
             c.execute("SELECT name FROM pdf_templates ORDER BY name")
@@ -2489,9 +2439,6 @@ class EditorTemplatePDFModule(BaseModule):
             
         except Exception as e:
             print(f"Erro ao carregar templates: {e}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
     def on_template_selected(self, event):
         """Quando template é selecionado"""
@@ -2504,7 +2451,7 @@ class EditorTemplatePDFModule(BaseModule):
     def load_template(self, template_name):
         """Carregar template do banco"""
         try:
-            conn = sqlite3.connect(self.db_name)
+            conn = get_connection(self.db_name)
             c = conn.cursor()
             
             c.execute("SELECT template_data FROM pdf_templates WHERE name = ?", 
@@ -2519,9 +2466,6 @@ class EditorTemplatePDFModule(BaseModule):
         except Exception as e:
             print(f"Erro ao carregar template: {e}")
             messagebox.showerror("Erro", f"Erro ao carregar template: {e}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
     def create_new_template(self):
         """Criar novo template"""
@@ -2538,18 +2482,15 @@ class EditorTemplatePDFModule(BaseModule):
             return
         
         try:
-            conn = sqlite3.connect(self.db_name)
-            c = conn.cursor()
-            
-            template_json = json.dumps(self.template_data, indent=2)
-            
-            # Inserir ou atualizar
-            c.execute("""
-                INSERT OR REPLACE INTO pdf_templates (name, template_data, created_by)
-                VALUES (?, ?, ?)
-            """, (self.template_data["name"], template_json, self.user_id))
+            with transaction(self.db_name) as conn:
+                c = conn.cursor()
+                template_json = json.dumps(self.template_data, indent=2)
             
-            conn.commit()
+                # Inserir ou atualizar
+                c.execute("""
+                    INSERT OR REPLACE INTO pdf_templates (name, template_data, created_by)
+                    VALUES (?, ?, ?)
+                """, (self.template_data["name"], template_json, self.user_id))
             
             messagebox.showinfo("Sucesso", "Template salvo com sucesso!")
             self.load_template_list()
@@ -2557,9 +2498,6 @@ class EditorTemplatePDFModule(BaseModule):
         except Exception as e:
             print(f"Erro ao salvar template: {e}")
             messagebox.showerror("Erro", f"Erro ao salvar template: {e}")
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
     def delete_template(self):
         """Excluir template (com proteção do template original)"""
@@ -2578,11 +2516,14 @@ class EditorTemplatePDFModule(BaseModule):
                               f"Tem certeza que deseja excluir o template '{template_name}'?\n\n"
                               f"Esta ação não pode ser desfeita."):
             try:
-                conn = sqlite3.connect(self.db_name)
-                c = conn.cursor()
-                
-                c.execute("DELETE FROM pdf_templates WHERE name = ?", (template_name,))
-                conn.commit()
+                with transaction(self.db_name) as conn:
+                    c = conn.cursor()
+                    # Elementos do template primeiro (chaves estrangeiras ativas)
+                    c.execute("""
+                        DELETE FROM pdf_template_elements
+                        WHERE template_id IN (SELECT id FROM pdf_templates WHERE name = ?)
+                    """, (template_name,))
+                    c.execute("DELETE FROM pdf_templates WHERE name = ?", (template_name,))
                 
                 messagebox.showinfo("Sucesso", f"Template '{template_name}' excluído com sucesso!")
                 self.load_template_list()
@@ -2591,9 +2532,6 @@ class EditorTemplatePDFModule(BaseModule):
             except Exception as e:
                 print(f"Erro ao excluir template: {e}")
                 messagebox.showerror("Erro", f"Erro ao excluir template: {e}")
-            finally:
-                if 'conn' in locals():
-                    conn.close()
     
     def zoom_in(self):
         """Aumentar zoom"""
@@ -2800,6 +2738,7 @@ E-mail: contato@worldcompressores.com.br | Fone: (11) 4543-6893 / 4543-6857"""
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao destacar elementos: {e}")
     
+    @perf.medido("editor.preview_pdf")
     def preview_pdf_realtime(self):
         """Gerar preview do PDF em tempo real"""
         try:
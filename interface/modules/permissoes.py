@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 from .base_module import BaseModule
-from database import DB_NAME
+from db import concorrencia, get_connection
 
 class PermissoesModule(BaseModule):
     def setup_ui(self):
@@ -26,6 +26,7 @@ class PermissoesModule(BaseModule):
         self.create_buttons(main_frame)
         
         # Inicializar dados
+        self.versao_permissoes = None
         self.carregar_usuarios()
         
     def create_header(self, parent):
@@ -158,7 +159,7 @@ class PermissoesModule(BaseModule):
     def carregar_usuarios(self):
         """Carregar lista de usuários"""
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             c = conn.cursor()
             
             c.execute("SELECT id, username, nome_completo, role FROM usuarios ORDER BY nome_completo")
@@ -176,8 +177,6 @@ class PermissoesModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar usuários: {e}")
-        finally:
-            conn.close()
             
     def on_usuario_changed(self, event=None):
         """Carregar permissões do usuário selecionado"""
@@ -190,9 +189,12 @@ class PermissoesModule(BaseModule):
             return
             
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             c = conn.cursor()
             
+            # Versão lida antes das permissões (ver db/concorrencia.py)
+            self.versao_permissoes = concorrencia.versao('permissoes', usuario_id, conn)
+            
             # Buscar permissões existentes
             c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
                      (usuario_id,))
@@ -207,8 +209,6 @@ class PermissoesModule(BaseModule):
                     
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar permissões: {e}")
-        finally:
-            conn.close()
             
     def salvar_permissoes(self):
         """Salvar permissões do usuário"""
@@ -222,29 +222,34 @@ class PermissoesModule(BaseModule):
             self.show_warning("Usuário selecionado inválido.")
             return
             
-        try:
-            conn = sqlite3.connect(DB_NAME)
+        niveis = {modulo_key: var.get() for modulo_key, var in self.permission_vars.items()}
+        versao_lida = self.versao_permissoes
+        
+        def gravar(conn):
             c = conn.cursor()
+            # Só grava se ninguém alterou as permissões do usuário depois de carregadas
+            versao = concorrencia.reivindicar(conn, 'permissoes', usuario_id, versao_lida)
             
             # Remover permissões existentes
             c.execute("DELETE FROM permissoes_usuarios WHERE usuario_id = ?", (usuario_id,))
             
             # Inserir novas permissões
-            for modulo_key, var in self.permission_vars.items():
-                nivel_acesso = var.get()
-                if nivel_acesso != "sem_acesso":
-                    c.execute("""
-                        INSERT INTO permissoes_usuarios (usuario_id, modulo, nivel_acesso)
-                        VALUES (?, ?, ?)
-                    """, (usuario_id, modulo_key, nivel_acesso))
+            c.executemany("""
+                INSERT INTO permissoes_usuarios (usuario_id, modulo, nivel_acesso)
+                VALUES (?, ?, ?)
+            """, [(usuario_id, modulo_key, nivel_acesso) for modulo_key, nivel_acesso in niveis.items()
+                  if nivel_acesso != "sem_acesso"])
+            return versao
+            
+        try:
+            self.versao_permissoes = concorrencia.executar(gravar)
             
-            conn.commit()
             self.show_success("Permissões salvas com sucesso!")
             
+        except concorrencia.ConflitoVersao as e:
+            self.avisar_conflito("as permissões deste usuário", e, self.on_usuario_changed)
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar permissões: {e}")
-        finally:
-            conn.close()
             
     def limpar_permissoes(self):
         """Limpar todas as permissões"""
@@ -289,7 +294,7 @@ class PermissoesModule(BaseModule):
     def get_user_permissions(self, user_id):
         """Obter permissões de um usuário específico"""
         try:
-            conn = sqlite3.connect(DB_NAME)
+            conn = get_connection()
             c = conn.cursor()
             
             c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
@@ -298,8 +303,6 @@ class PermissoesModule(BaseModule):
             
         except sqlite3.Error:
             return {}
-        finally:
-            conn.close()
             
     def user_has_permission(self, user_id, module, required_level='consulta'):
         """Verificar se usuário tem permissão específica"""
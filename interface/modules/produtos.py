@@ -1,9 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from .base_module import BaseModule
-from database import DB_NAME
+from .base_module import BaseModule, FonteConsulta, FonteLista
+from db import get_connection, transaction
 from utils.formatters import format_currency, clean_number
+from utils.busca import buscar, marcadores, ordenar_por_relevancia
+from utils import referencias
 
 class ProdutosModule(BaseModule):
     def setup_ui(self):
@@ -349,6 +351,7 @@ class ProdutosModule(BaseModule):
         self.produtos_notebook.pack(fill="both", expand=True)
         
         # Criar abas para cada tipo
+        self.produtos_listas = {}
         self.create_produtos_tab("Produtos", "Produto")
         self.create_produtos_tab("Serviços", "Serviço")
         self.create_produtos_tab("Kits", "Kit")
@@ -368,27 +371,22 @@ class ProdutosModule(BaseModule):
         tab_frame = tk.Frame(self.produtos_notebook, bg='white')
         self.produtos_notebook.add(tab_frame, text=tab_name)
         
-        # Treeview para o tipo
-        columns = ("nome", "valor", "ativo")
-        tree = ttk.Treeview(tab_frame, columns=columns, show="headings", height=12)
-        
-        tree.heading("nome", text="Nome")
-        tree.heading("valor", text="Valor")
-        tree.heading("ativo", text="Ativo")
-        
-        tree.column("nome", width=400)
-        tree.column("valor", width=150)
-        tree.column("ativo", width=100)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tab_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Armazenar referência da tree
-        setattr(self, f"{tipo.lower()}_tree", tree)
+        # Lista virtual para o tipo
+        lista = self.criar_lista_virtual(
+            tab_frame,
+            colunas=(
+                ("nome", "Nome", 400),
+                ("valor", "Valor", 150),
+                ("ativo", "Ativo", 100),
+            ),
+            altura=12,
+            ordenaveis={"nome": 1, "valor": 2, "ativo": 3},
+            mensagem_erro="Erro ao carregar produtos"
+        )
+        lista.pack(fill="both", expand=True)
+        
+        # Armazenar referência da lista
+        self.produtos_listas[tipo] = lista
         
     def filtrar_por_tipo(self, event=None):
         """Filtrar produtos por tipo selecionado"""
@@ -433,12 +431,8 @@ class ProdutosModule(BaseModule):
     def carregar_produtos_para_kit(self):
         """Carregar produtos e serviços disponíveis para o kit"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            
             # Buscar apenas produtos e serviços (não kits)
-            c.execute("SELECT id, nome, tipo FROM produtos WHERE tipo IN ('Produto', 'Serviço') AND ativo = 1 ORDER BY nome")
-            produtos = c.fetchall()
+            produtos = referencias.produtos(('Produto', 'Serviço'))
             
             # Limpar e popular combobox
             if hasattr(self, 'produto_kit_combo'):
@@ -451,8 +445,6 @@ class ProdutosModule(BaseModule):
                 
         except sqlite3.Error as e:
             messagebox.showerror("Erro", f"Erro ao carregar produtos: {e}")
-        finally:
-            conn.close()
     
     def adicionar_item_kit(self):
         """Adicionar item à composição do kit"""
@@ -567,175 +559,116 @@ class ProdutosModule(BaseModule):
             self.show_warning("Valor inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            dados = (
-                nome, tipo, self.ncm_var.get().strip(),
-                valor, self.descricao_var.get().strip(),
-                1 if self.ativo_var.get() else 0
-            )
-            
-            if self.current_produto_id:
-                # Atualizar produto
-                c.execute("""
-                    UPDATE produtos SET nome = ?, tipo = ?, ncm = ?, valor_unitario = ?,
-                                      descricao = ?, ativo = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, dados + (self.current_produto_id,))
+            with transaction() as conn:
+                c = conn.cursor()
+                dados = (
+                    nome, tipo, self.ncm_var.get().strip(),
+                    valor, self.descricao_var.get().strip(),
+                    1 if self.ativo_var.get() else 0
+                )
+            
+                if self.current_produto_id:
+                    # Atualizar produto
+                    c.execute("""
+                        UPDATE produtos SET nome = ?, tipo = ?, ncm = ?, valor_unitario = ?,
+                                          descricao = ?, ativo = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """, dados + (self.current_produto_id,))
                 
-                # Se for kit, limpar itens existentes
-                if tipo == "Kit":
-                    c.execute("DELETE FROM kit_items WHERE kit_id = ?", (self.current_produto_id,))
-            else:
-                # Inserir novo produto
-                c.execute("""
-                    INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao, ativo)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, dados)
-                self.current_produto_id = c.lastrowid
-            
-            # Se for kit, salvar itens
-            if tipo == "Kit":
-                for item in self.kit_items:
+                    # Se for kit, limpar itens existentes
+                    if tipo == "Kit":
+                        c.execute("DELETE FROM kit_items WHERE kit_id = ?", (self.current_produto_id,))
+                else:
+                    # Inserir novo produto
                     c.execute("""
-                        INSERT INTO kit_items (kit_id, produto_id, quantidade)
-                        VALUES (?, ?, ?)
-                    """, (self.current_produto_id, item['produto_id'], item['quantidade']))
+                        INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao, ativo)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, dados)
+                    self.current_produto_id = c.lastrowid
+            
+                # Se for kit, salvar itens
+                if tipo == "Kit":
+                    for item in self.kit_items:
+                        c.execute("""
+                            INSERT INTO kit_items (kit_id, produto_id, quantidade)
+                            VALUES (?, ?, ?)
+                        """, (self.current_produto_id, item['produto_id'], item['quantidade']))
             
-            conn.commit()
             
             tipo_nome = "Kit" if tipo == "Kit" else "Produto"
             self.show_success(f"{tipo_nome} salvo com sucesso!")
             
             # Emitir evento
-            self.emit_event('produto_created')
+            self.emit_event('produto_created', ids=self.current_produto_id)
             
             self.carregar_produtos()
             self.carregar_produtos_para_kit()  # Atualizar lista para kits
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar {tipo.lower()}: {e}")
-        finally:
-            conn.close()
             
     def carregar_produtos(self):
-        """Carregar lista de produtos organizados por tipo"""
-        # Limpar todas as trees
-        for tipo in ["produto", "serviço", "kit"]:
-            tree_name = f"{tipo.lower()}_tree"
-            if hasattr(self, tree_name):
-                tree = getattr(self, tree_name)
-                for item in tree.get_children():
-                    tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT id, nome, tipo, valor_unitario, ativo
-                FROM produtos
-                ORDER BY tipo, nome
-            """)
+        """Carregar lista de produtos organizados por tipo (lida do banco conforme a rolagem)"""
+        for tipo, lista in self.produtos_listas.items():
+            lista.definir_fonte(FonteConsulta(
+                colunas=("id", "nome", "valor_unitario", "ativo"),
+                origem="produtos",
+                ordem=("nome", "id"),
+                where="tipo = ?",
+                params=(tipo,),
+                formatar=self._linha_produto
+            ))
             
-            for row in c.fetchall():
-                produto_id, nome, tipo, valor, ativo = row
-                
-                # Determinar qual tree usar baseado no tipo
-                if tipo == "Produto":
-                    tree = self.produto_tree
-                elif tipo == "Serviço":
-                    tree = self.serviço_tree
-                elif tipo == "Kit":
-                    tree = self.kit_tree
-                else:
-                    continue
-                
-                tree.insert("", "end", values=(
-                    nome,
-                    format_currency(valor),
-                    "Sim" if ativo else "Não"
-                ), tags=(produto_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar produtos: {e}")
-        finally:
-            conn.close()
+    def _linha_produto(self, row):
+        """Valores e tags de um produto na lista"""
+        produto_id, nome, valor, ativo = row
+        return (
+            nome,
+            format_currency(valor),
+            "Sim" if ativo else "Não"
+        ), (produto_id,)
             
     def buscar_produtos(self):
         """Buscar produtos com filtro"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_produtos()
+            return
         
-        # Limpar todas as trees
-        for tipo in ["produto", "serviço", "kit"]:
-            tree_name = f"{tipo.lower()}_tree"
-            if hasattr(self, tree_name):
-                tree = getattr(self, tree_name)
-                for item in tree.get_children():
-                    tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
-            if termo:
-                c.execute("""
-                    SELECT id, nome, tipo, valor_unitario, ativo
-                    FROM produtos
-                    WHERE nome LIKE ? OR tipo LIKE ? OR descricao LIKE ?
-                    ORDER BY tipo, nome
-                """, (f"%{termo}%", f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, nome, tipo, valor_unitario, ativo
-                    FROM produtos
-                    ORDER BY tipo, nome
-                """)
-            
-            for row in c.fetchall():
-                produto_id, nome, tipo, valor, ativo = row
-                
-                # Determinar qual tree usar baseado no tipo
-                if tipo == "Produto":
-                    tree = self.produto_tree
-                elif tipo == "Serviço":
-                    tree = self.serviço_tree
-                elif tipo == "Kit":
-                    tree = self.kit_tree
-                else:
-                    continue
-                
-                tree.insert("", "end", values=(
-                    nome,
-                    format_currency(valor),
-                    "Sim" if ativo else "Não"
-                ), tags=(produto_id,))
+            # Busca textual ordenada por relevância (ignora acentos)
+            ids = buscar("produtos", termo)
+            c.execute(f"""
+                SELECT id, nome, valor_unitario, ativo, tipo
+                FROM produtos
+                WHERE id IN ({marcadores(len(ids))})
+            """, ids)
+            
+            # Separar os resultados pela lista do tipo, mantendo a relevância
+            por_tipo = {tipo: [] for tipo in self.produtos_listas}
+            for row in ordenar_por_relevancia(c.fetchall(), ids):
+                if row[-1] in por_tipo:
+                    por_tipo[row[-1]].append(row[:-1])
+                    
+            for tipo, linhas in por_tipo.items():
+                self.produtos_listas[tipo].definir_fonte(FonteLista(linhas, self._linha_produto))
                 
         except sqlite3.Error as e:
             self.show_error(f"Erro ao buscar produtos: {e}")
-        finally:
-            conn.close()
+            
+    def _produto_selecionado(self):
+        """Id selecionado na lista da aba de tipo visível"""
+        aba = self.produtos_notebook.index("current")
+        return list(self.produtos_listas.values())[aba].id_selecionado()
             
     def editar_produto(self):
         """Editar produto selecionado"""
-        # Verificar qual tree tem seleção
-        selected = None
-        produto_id = None
-        
-        for tipo in ["produto", "serviço", "kit"]:
-            tree_name = f"{tipo.lower()}_tree"
-            if hasattr(self, tree_name):
-                tree = getattr(self, tree_name)
-                if tree.selection():
-                    selected = tree.selection()[0]
-                    tags = tree.item(selected)['tags']
-                    if tags:
-                        produto_id = tags[0]
-                    break
-        
-        if not selected or not produto_id:
+        produto_id = self._produto_selecionado()
+        if produto_id is None:
             self.show_warning("Selecione um produto para editar.")
             return
             
@@ -743,7 +676,7 @@ class ProdutosModule(BaseModule):
         
     def carregar_produto_para_edicao(self, produto_id):
         """Carregar dados do produto para edição"""
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
@@ -803,45 +736,25 @@ class ProdutosModule(BaseModule):
                 
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar produto: {e}")
-        finally:
-            conn.close()
             
     def toggle_ativo(self):
         """Ativar/desativar produto selecionado"""
-        # Verificar qual tree tem seleção
-        selected = None
-        produto_id = None
-        
-        for tipo in ["produto", "serviço", "kit"]:
-            tree_name = f"{tipo.lower()}_tree"
-            if hasattr(self, tree_name):
-                tree = getattr(self, tree_name)
-                if tree.selection():
-                    selected = tree.selection()[0]
-                    tags = tree.item(selected)['tags']
-                    if tags:
-                        produto_id = tags[0]
-                    break
-        
-        if not selected or not produto_id:
+        produto_id = self._produto_selecionado()
+        if produto_id is None:
             self.show_warning("Selecione um produto para ativar/desativar.")
             return
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            # Inverter status ativo
-            c.execute("UPDATE produtos SET ativo = NOT ativo WHERE id = ?", (produto_id,))
-            conn.commit()
+            with transaction() as conn:
+                c = conn.cursor()
+                # Inverter status ativo
+                c.execute("UPDATE produtos SET ativo = NOT ativo WHERE id = ?", (produto_id,))
             
             self.show_success("Status do produto alterado com sucesso!")
             self.carregar_produtos()
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao alterar status: {e}")
-        finally:
-            conn.close()
 
     def atualizar_combo_items(self):
         """Atualizar combo com produtos e serviços disponíveis"""
@@ -851,12 +764,8 @@ class ProdutosModule(BaseModule):
         """Atualizar combo de itens baseado no tipo selecionado"""
         tipo = self.item_tipo_var.get()
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            c.execute("SELECT id, nome, valor_unitario FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome", (tipo,))
-            items = c.fetchall()
+            items = [(p.id, p.nome, p.valor_unitario or 0) for p in referencias.produtos(tipo)]
             
             values = [f"{item[1]} - R$ {item[2]:.2f}" for item in items]
             self.item_combo['values'] = values
@@ -867,8 +776,6 @@ class ProdutosModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar itens: {e}")
-        finally:
-            conn.close()
             
     def adicionar_item_kit(self):
         """Adicionar item à composição do kit"""
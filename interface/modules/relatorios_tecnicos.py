@@ -1,11 +1,13 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
-import sqlite3
+from tkinter import ttk, messagebox, scrolledtext
 import json
+import sqlite3
 from datetime import datetime
-from .base_module import BaseModule
-from database import DB_NAME
+from .base_module import BaseModule, ComboBusca, FonteConsulta
+from db import concorrencia, get_connection, sequencias
 from utils.formatters import format_date
+from utils.agregados import indicadores_relatorios
+from utils import referencias
 from collections import Counter
 
 class RelatoriosTecnicosModule(BaseModule):
@@ -29,26 +31,14 @@ class RelatoriosTecnicosModule(BaseModule):
         
         # Inicializar variáveis
         self.current_relatorio_id = None
+        self.versao_relatorio = None
+        self.numero_sugerido = None
         self.tecnicos_eventos = {}
         self.anexos_aba = {1: [], 2: [], 3: [], 4: []}
         
         # Carregar dados iniciais
         self.refresh_all_data()
-        
-        self.ensure_responsavel_id_column()
-        
-    def ensure_responsavel_id_column(self):
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("PRAGMA table_info(relatorios_tecnicos)")
-        columns = [row[1] for row in c.fetchall()]
-        if 'responsavel_id' not in columns:
-            try:
-                c.execute("ALTER TABLE relatorios_tecnicos ADD COLUMN responsavel_id INTEGER")
-                conn.commit()
-            except Exception as e:
-                print(f"Erro ao adicionar coluna responsavel_id em relatorios_tecnicos: {e}")
-        conn.close()
+        self.sugerir_numero()
         
     def create_header(self, parent):
         header_frame = tk.Frame(parent, bg='#f8fafc')
@@ -118,40 +108,29 @@ class RelatoriosTecnicosModule(BaseModule):
         total_frame = tk.LabelFrame(parent, text="Total de Relatórios", bg='#f8fafc', font=('Arial', 12, 'bold'))
         total_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM relatorios_tecnicos")
-        total = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(total_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
-                bg='#f8fafc', fg='#1e40af').pack(pady=10)
-        
         # Relatórios por mês
         mes_frame = tk.LabelFrame(parent, text="Relatórios por Mês", bg='#f8fafc', font=('Arial', 12, 'bold'))
         mes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("""
-            SELECT strftime('%m/%Y', data_criacao) as mes, COUNT(*) 
-            FROM relatorios_tecnicos 
-            GROUP BY strftime('%m/%Y', data_criacao) 
-            ORDER BY data_criacao DESC 
-            LIMIT 6
-        """)
-        meses = c.fetchall()
-        conn.close()
-        
-        for mes, qtd in meses:
-            tk.Label(mes_frame, text=f"{mes}: {qtd}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
-        
         # Top técnicos
         tecnicos_frame = tk.LabelFrame(parent, text="Top Técnicos", bg='#f8fafc', font=('Arial', 12, 'bold'))
         tecnicos_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        # Relatórios por cliente
+        clientes_frame = tk.LabelFrame(parent, text="Top Clientes", bg='#f8fafc', font=('Arial', 12, 'bold'))
+        clientes_frame.pack(fill="x", padx=10, pady=5)
+        
+        frames = (total_frame, mes_frame, tecnicos_frame, clientes_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_admin,
+            lambda dados: self._preencher_indicadores_admin(dados, *frames)
+        )
+    
+    def _consultar_indicadores_admin(self, conn):
+        """Consultas dos indicadores gerais (executada fora da thread da interface)"""
+        indicadores = indicadores_relatorios(conn=conn)
         c = conn.cursor()
         c.execute("""
             SELECT u.nome_completo, COUNT(*) as total
@@ -162,18 +141,7 @@ class RelatoriosTecnicosModule(BaseModule):
             LIMIT 5
         """)
         tecnicos = c.fetchall()
-        conn.close()
-        
-        for nome, total in tecnicos:
-            tk.Label(tecnicos_frame, text=f"{nome}: {total}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
-        
-        # Relatórios por cliente
-        clientes_frame = tk.LabelFrame(parent, text="Top Clientes", bg='#f8fafc', font=('Arial', 12, 'bold'))
-        clientes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
         c.execute("""
             SELECT c.nome, COUNT(*) as total
             FROM relatorios_tecnicos r
@@ -183,7 +151,22 @@ class RelatoriosTecnicosModule(BaseModule):
             LIMIT 5
         """)
         clientes = c.fetchall()
-        conn.close()
+        return indicadores['total'], indicadores['por_mes'], tecnicos, clientes
+    
+    def _preencher_indicadores_admin(self, dados, total_frame, mes_frame, tecnicos_frame, clientes_frame):
+        total, meses, tecnicos, clientes = dados
+        self.limpar_frame(total_frame, mes_frame, tecnicos_frame, clientes_frame)
+        
+        tk.Label(total_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
+                bg='#f8fafc', fg='#1e40af').pack(pady=10)
+        
+        for mes, qtd in meses:
+            tk.Label(mes_frame, text=f"{mes}: {qtd}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
+        
+        for nome, total in tecnicos:
+            tk.Label(tecnicos_frame, text=f"{nome}: {total}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
         for nome, total in clientes:
             tk.Label(clientes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
@@ -195,41 +178,25 @@ class RelatoriosTecnicosModule(BaseModule):
         meus_frame = tk.LabelFrame(parent, text="Meus Relatórios", bg='#f8fafc', font=('Arial', 12, 'bold'))
         meus_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (self.user_id,))
-        total = c.fetchone()[0]
-        conn.close()
-        
-        tk.Label(meus_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
-                bg='#f8fafc', fg='#059669').pack(pady=10)
-        
         # Meus relatórios por mês
         mes_frame = tk.LabelFrame(parent, text="Meus Relatórios por Mês", bg='#f8fafc', font=('Arial', 12, 'bold'))
         mes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("""
-            SELECT strftime('%m/%Y', data_criacao) as mes, COUNT(*) 
-            FROM relatorios_tecnicos 
-            WHERE responsavel_id = ?
-            GROUP BY strftime('%m/%Y', data_criacao) 
-            ORDER BY data_criacao DESC 
-            LIMIT 6
-        """, (self.user_id,))
-        meses = c.fetchall()
-        conn.close()
-        
-        for mes, qtd in meses:
-            tk.Label(mes_frame, text=f"{mes}: {qtd}", font=('Arial', 10), 
-                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
-        
         # Meus clientes mais frequentes
         clientes_frame = tk.LabelFrame(parent, text="Meus Clientes Mais Frequentes", bg='#f8fafc', font=('Arial', 12, 'bold'))
         clientes_frame.pack(fill="x", padx=10, pady=5)
         
-        conn = sqlite3.connect(DB_NAME)
+        frames = (meus_frame, mes_frame, clientes_frame)
+        self.mostrar_carregando(*frames)
+        self.consultar_em_segundo_plano(
+            f"indicadores_{parent}",
+            self._consultar_indicadores_usuario,
+            lambda dados: self._preencher_indicadores_usuario(dados, *frames)
+        )
+    
+    def _consultar_indicadores_usuario(self, conn):
+        """Consultas dos indicadores do usuário (executada fora da thread da interface)"""
+        indicadores = indicadores_relatorios(self.user_id, conn)
         c = conn.cursor()
         c.execute("""
             SELECT c.nome, COUNT(*) as total
@@ -241,7 +208,18 @@ class RelatoriosTecnicosModule(BaseModule):
             LIMIT 5
         """, (self.user_id,))
         clientes = c.fetchall()
-        conn.close()
+        return indicadores['total'], indicadores['por_mes'], clientes
+    
+    def _preencher_indicadores_usuario(self, dados, meus_frame, mes_frame, clientes_frame):
+        total, meses, clientes = dados
+        self.limpar_frame(meus_frame, mes_frame, clientes_frame)
+        
+        tk.Label(meus_frame, text=f"{total}", font=('Arial', 24, 'bold'), 
+                bg='#f8fafc', fg='#059669').pack(pady=10)
+        
+        for mes, qtd in meses:
+            tk.Label(mes_frame, text=f"{mes}: {qtd}", font=('Arial', 10), 
+                    bg='#f8fafc').pack(anchor="w", padx=10, pady=2)
         
         for nome, total in clientes:
             tk.Label(clientes_frame, text=f"{nome}: {total}", font=('Arial', 10), 
@@ -265,7 +243,7 @@ class RelatoriosTecnicosModule(BaseModule):
         cliente_frame = tk.Frame(fields_frame, bg='white')
         cliente_frame.grid(row=0, column=1, sticky="ew", padx=(10, 0), pady=5)
         
-        self.cliente_combo = ttk.Combobox(cliente_frame, textvariable=self.cliente_var, width=40)
+        self.cliente_combo = ComboBusca(cliente_frame, textvariable=self.cliente_var, width=40)
         self.cliente_combo.pack(side="left", fill="x", expand=True)
         
         # Botão para buscar/atualizar clientes
@@ -347,7 +325,7 @@ class RelatoriosTecnicosModule(BaseModule):
         responsavel_frame = tk.Frame(fields_frame, bg='white')
         responsavel_frame.grid(row=0, column=1, sticky="ew", padx=(10, 0), pady=5)
         
-        self.responsavel_combo = ttk.Combobox(responsavel_frame, textvariable=self.responsavel_var, width=40)
+        self.responsavel_combo = ComboBusca(responsavel_frame, textvariable=self.responsavel_var, width=40)
         self.responsavel_combo.pack(side="left", fill="x", expand=True)
         
         # Botão para buscar/atualizar técnicos
@@ -437,7 +415,7 @@ class RelatoriosTecnicosModule(BaseModule):
         cotacao_frame = tk.Frame(fields_frame, bg='white')
         cotacao_frame.grid(row=0, column=1, sticky="ew", padx=(10, 0), pady=5)
         
-        self.cotacao_combo = ttk.Combobox(cotacao_frame, textvariable=self.cotacao_var, width=40)
+        self.cotacao_combo = ComboBusca(cotacao_frame, textvariable=self.cotacao_var, width=40)
         self.cotacao_combo.pack(side="left", fill="x", expand=True)
         
         # Botão para buscar/atualizar cotações
@@ -500,27 +478,18 @@ class RelatoriosTecnicosModule(BaseModule):
         refresh_btn = self.create_button(header_frame, "🔄 Atualizar", self.refresh_relatorios, bg='#10b981')
         refresh_btn.pack(side="right")
         
-        # Treeview
-        tree_frame = tk.Frame(parent, bg='white')
-        tree_frame.pack(fill="both", expand=True)
-        
+        # Lista virtual (só as linhas visíveis viram itens da Treeview)
         columns = ("ID", "Número", "Cliente", "Data Criação", "Responsável")
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
-        
-        # Configurar colunas
-        for col in columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=100)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.relatorios_lista = self.criar_lista_virtual(
+            parent,
+            colunas=[(col, col, 100) for col in columns],
+            ordenaveis={col: i for i, col in enumerate(columns)},
+            mensagem_erro="Erro ao carregar relatórios"
+        )
+        self.relatorios_lista.pack(fill="both", expand=True)
         
-        # Bind de seleção
-        self.tree.bind('<<TreeviewSelect>>', self.on_relatorio_select)
+        # Seleção: só recarrega o formulário quando o usuário escolhe outro relatório
+        self.relatorios_lista.ao_selecionar(self.carregar_relatorio)
         
         # Carregar dados
         self.refresh_relatorios()
@@ -539,34 +508,21 @@ class RelatoriosTecnicosModule(BaseModule):
         self.carregar_cotacoes()
         
     def carregar_clientes(self):
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT id, nome FROM clientes ORDER BY nome")
-        clientes = c.fetchall()
-        conn.close()
-        
-        self.clientes_dict = {f"{nome} (ID: {id})": id for id, nome in clientes}
-        self.cliente_combo['values'] = list(self.clientes_dict.keys())
+        self.clientes_dict = {f"{cliente.nome} (ID: {cliente.id})": cliente.id for cliente in referencias.clientes()}
+        self.cliente_combo.definir_fonte(lambda: list(self.clientes_dict))
         
     def carregar_tecnicos(self):
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("SELECT id, nome_completo FROM usuarios WHERE role = 'Técnico' ORDER BY nome_completo")
-        tecnicos = c.fetchall()
-        conn.close()
-        
-        self.tecnicos_dict = {f"{nome} (ID: {id})": id for id, nome in tecnicos}
-        self.responsavel_combo['values'] = list(self.tecnicos_dict.keys())
+        self.tecnicos_dict = {f"{tecnico.nome_completo} (ID: {tecnico.id})": tecnico.id for tecnico in referencias.tecnicos()}
+        self.responsavel_combo.definir_fonte(lambda: list(self.tecnicos_dict))
         
     def carregar_cotacoes(self):
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         c.execute("SELECT id, numero_proposta FROM cotacoes ORDER BY numero_proposta DESC")
         cotacoes = c.fetchall()
-        conn.close()
         
         self.cotacoes_dict = {f"{numero} (ID: {id})": id for id, numero in cotacoes}
-        self.cotacao_combo['values'] = list(self.cotacoes_dict.keys())
+        self.cotacao_combo.definir_fonte(lambda: list(self.cotacoes_dict))
         
     def refresh_clientes(self):
         self.carregar_clientes()
@@ -581,36 +537,22 @@ class RelatoriosTecnicosModule(BaseModule):
         messagebox.showinfo("Sucesso", "Lista de cotações atualizada!")
         
     def refresh_relatorios(self):
-        # Limpar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        if self.role in ['Admin', 'admin']:
-            c.execute("""
-                SELECT r.id, r.numero_relatorio, c.nome, r.data_criacao, u.nome_completo
-                FROM relatorios_tecnicos r
-                LEFT JOIN clientes c ON r.cliente_id = c.id
-                LEFT JOIN usuarios u ON r.responsavel_id = u.id
-                ORDER BY r.data_criacao DESC
-            """)
-        else:
-            c.execute("""
-                SELECT r.id, r.numero_relatorio, c.nome, r.data_criacao, u.nome_completo
-                FROM relatorios_tecnicos r
-                LEFT JOIN clientes c ON r.cliente_id = c.id
-                LEFT JOIN usuarios u ON r.responsavel_id = u.id
-                WHERE r.responsavel_id = ?
-                ORDER BY r.data_criacao DESC
-            """, (self.user_id,))
+        # Lista virtual, mais recentes primeiro
+        where, params = None, ()
+        if self.role not in ['Admin', 'admin']:
+            where, params = "r.responsavel_id = ?", (self.user_id,)
             
-        relatorios = c.fetchall()
-        conn.close()
-        
-        for relatorio in relatorios:
-            self.tree.insert('', 'end', values=relatorio)
+        self.relatorios_lista.definir_fonte(FonteConsulta(
+            colunas=("r.id", "r.numero_relatorio", "c.nome", "r.data_criacao", "u.nome_completo"),
+            origem="""relatorios_tecnicos r
+                LEFT JOIN clientes c ON r.cliente_id = c.id
+                LEFT JOIN usuarios u ON r.responsavel_id = u.id""",
+            ordem=("r.data_criacao", "r.id"),
+            decrescente=True,
+            where=where,
+            params=params,
+            formatar=lambda relatorio: (relatorio, ())
+        ))
             
     def salvar_relatorio(self):
         try:
@@ -636,29 +578,38 @@ class RelatoriosTecnicosModule(BaseModule):
                 messagebox.showerror("Erro", "Responsável é obrigatório")
                 return
             
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            # Número sugerido pelo formulário: reservar agora (outra estação pode ter usado o previsto)
+            if not self.current_relatorio_id and self.numero_relatorio_var.get() == self.numero_sugerido:
+                self.numero_relatorio_var.set(sequencias.reservar('relatorio', data=self.data_relatorio()))
+                self.numero_sugerido = None
             
-            if self.current_relatorio_id:
-                # Atualizar
-                c.execute("""
-                    UPDATE relatorios_tecnicos 
-                    SET numero_relatorio = ?, cliente_id = ?, responsavel_id = ?, data_criacao = ?,
-                        formulario_servico = ?, tipo_servico = ?, data_recebimento = ?,
-                        condicao_encontrada = ?, placa_identificacao = ?, acoplamento = ?,
-                        aspectos_rotores = ?, valvulas_acopladas = ?, data_recebimento_equip = ?,
-                        cotacao_id = ?
-                    WHERE id = ?
-                """, (
-                    self.numero_relatorio_var.get(), cliente_id, responsavel_id, 
-                    self.data_criacao_var.get(), self.formulario_servico_var.get(),
-                    self.tipo_servico_var.get(), self.data_recebimento_var.get(),
-                    self.condicao_encontrada_var.get(), self.placa_identificacao_var.get(),
-                    self.acoplamento_var.get(), self.aspectos_rotores_var.get(),
-                    self.valvulas_acopladas_var.get(), self.data_recebimento_equip_var.get(),
-                    cotacao_id, self.current_relatorio_id
-                ))
-            else:
+            dados = (
+                self.numero_relatorio_var.get(), cliente_id, responsavel_id, 
+                self.data_criacao_var.get(), self.formulario_servico_var.get(),
+                self.tipo_servico_var.get(), self.data_recebimento_var.get(),
+                self.condicao_encontrada_var.get(), self.placa_identificacao_var.get(),
+                self.acoplamento_var.get(), self.aspectos_rotores_var.get(),
+                self.valvulas_acopladas_var.get(), self.data_recebimento_equip_var.get(),
+                cotacao_id
+            )
+            relatorio_id, versao_lida = self.current_relatorio_id, self.versao_relatorio
+            
+            def gravar(conn):
+                c = conn.cursor()
+                if relatorio_id:
+                    # Atualizar (se ninguém o salvou depois de aberto)
+                    concorrencia.reivindicar(conn, 'relatorio', relatorio_id, versao_lida)
+                    c.execute("""
+                        UPDATE relatorios_tecnicos 
+                        SET numero_relatorio = ?, cliente_id = ?, responsavel_id = ?, data_criacao = ?,
+                            formulario_servico = ?, tipo_servico = ?, data_recebimento = ?,
+                            condicao_encontrada = ?, placa_identificacao = ?, acoplamento = ?,
+                            aspectos_rotores = ?, valvulas_acopladas = ?, data_recebimento_equip = ?,
+                            cotacao_id = ?
+                        WHERE id = ?
+                    """, dados + (relatorio_id,))
+                    return relatorio_id
+                
                 # Inserir novo
                 c.execute("""
                     INSERT INTO relatorios_tecnicos (
@@ -668,25 +619,18 @@ class RelatoriosTecnicosModule(BaseModule):
                         aspectos_rotores, valvulas_acopladas, data_recebimento_equip,
                         cotacao_id
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    self.numero_relatorio_var.get(), cliente_id, responsavel_id, 
-                    self.data_criacao_var.get(), self.formulario_servico_var.get(),
-                    self.tipo_servico_var.get(), self.data_recebimento_var.get(),
-                    self.condicao_encontrada_var.get(), self.placa_identificacao_var.get(),
-                    self.acoplamento_var.get(), self.aspectos_rotores_var.get(),
-                    self.valvulas_acopladas_var.get(), self.data_recebimento_equip_var.get(),
-                    cotacao_id
-                ))
-                
-                self.current_relatorio_id = c.lastrowid
+                """, dados)
+                return c.lastrowid
             
-            conn.commit()
-            conn.close()
+            salvo_id = concorrencia.executar(gravar)
             
             messagebox.showinfo("Sucesso", "Relatório salvo com sucesso!")
+            self.emit_event('relatorio_created', ids=salvo_id)
             self.refresh_relatorios()
             self.limpar_formulario()
             
+        except concorrencia.ConflitoVersao as e:
+            self.avisar_conflito("este relatório", e, lambda: self.carregar_relatorio(relatorio_id))
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar relatório: {str(e)}")
 
@@ -706,17 +650,33 @@ class RelatoriosTecnicosModule(BaseModule):
         self.data_recebimento_equip_var.set('')
         self.cotacao_var.set('')
         self.current_relatorio_id = None
+        self.versao_relatorio = None
+        self.sugerir_numero()
+    
+    def sugerir_numero(self):
+        """Mostrar o próximo número de relatório (reservado só ao salvar, ver db/sequencias.py)"""
+        try:
+            self.numero_sugerido = sequencias.previsao('relatorio', data=self.data_relatorio())
+        except sqlite3.Error as e:
+            print(f"Erro ao gerar número do relatório: {e}")
+            return
+        self.numero_relatorio_var.set(self.numero_sugerido)
 
-    def on_relatorio_select(self, event):
-        selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            relatorio_id = item['values'][0]
-            self.carregar_relatorio(relatorio_id)
+    def data_relatorio(self):
+        """Data de criação do formulário (dd/mm/aaaa ou aaaa-mm-dd); None se inválida"""
+        texto = self.data_criacao_var.get().strip()
+        for formato in ('%d/%m/%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(texto[:10], formato).date()
+            except ValueError:
+                continue
+        return None
 
     def carregar_relatorio(self, relatorio_id):
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
+        # Versão lida antes dos dados (ver db/concorrencia.py)
+        versao = concorrencia.versao('relatorio', relatorio_id, conn)
         c.execute("""
             SELECT r.*, c.nome as cliente_nome, u.nome_completo as responsavel_nome
             FROM relatorios_tecnicos r
@@ -725,10 +685,10 @@ class RelatoriosTecnicosModule(BaseModule):
             WHERE r.id = ?
         """, (relatorio_id,))
         relatorio = c.fetchone()
-        conn.close()
         
         if relatorio:
             self.current_relatorio_id = relatorio_id
+            self.versao_relatorio = versao
             self.numero_relatorio_var.set(relatorio[1] or '')
             
             # Encontrar cliente no combo
@@ -766,15 +726,5 @@ class RelatoriosTecnicosModule(BaseModule):
             messagebox.showerror("Erro", "Selecione um relatório para gerar o PDF")
             return
         
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf")],
-                title="Salvar PDF"
-            )
-            
-            if filename:
-                # Aqui você implementaria a geração do PDF
-                messagebox.showinfo("Sucesso", f"PDF gerado com sucesso: {filename}")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao gerar PDF: {str(e)}")
\ No newline at end of file
+        # Gerado em segundo plano (data/relatorios); o andamento aparece na barra de status
+        self.enfileirar_pdf('relatorio', self.current_relatorio_id)
\ No newline at end of file
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 from .base_module import BaseModule
-from database import DB_NAME
+from db import get_connection, transaction
 from utils.formatters import format_phone, validate_email
 
 class TecnicosModule(BaseModule):
@@ -155,107 +155,66 @@ class TecnicosModule(BaseModule):
             self.show_warning("Email inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            dados = (
-                nome,
-                self.especialidade_var.get().strip(),
-                self.telefone_var.get().strip(),
-                email if email else None
-            )
+            with transaction() as conn:
+                c = conn.cursor()
+                dados = (
+                    nome,
+                    self.especialidade_var.get().strip(),
+                    self.telefone_var.get().strip(),
+                    email if email else None
+                )
             
-            if self.current_tecnico_id:
-                c.execute("""
-                    UPDATE tecnicos SET nome = ?, especialidade = ?, telefone = ?, email = ?
-                    WHERE id = ?
-                """, dados + (self.current_tecnico_id,))
-            else:
-                c.execute("""
-                    INSERT INTO tecnicos (nome, especialidade, telefone, email)
-                    VALUES (?, ?, ?, ?)
-                """, dados)
-                self.current_tecnico_id = c.lastrowid
+                if self.current_tecnico_id:
+                    c.execute("""
+                        UPDATE tecnicos SET nome = ?, especialidade = ?, telefone = ?, email = ?
+                        WHERE id = ?
+                    """, dados + (self.current_tecnico_id,))
+                else:
+                    c.execute("""
+                        INSERT INTO tecnicos (nome, especialidade, telefone, email)
+                        VALUES (?, ?, ?, ?)
+                    """, dados)
+                    self.current_tecnico_id = c.lastrowid
             
-            conn.commit()
             self.show_success("Técnico salvo com sucesso!")
             
             # Emitir evento
-            self.emit_event('tecnico_created')
+            self.emit_event('tecnico_created', ids=self.current_tecnico_id)
             
             self.carregar_tecnicos()
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar técnico: {e}")
-        finally:
-            conn.close()
-            
-    def carregar_tecnicos(self):
-        for item in self.tecnicos_tree.get_children():
-            self.tecnicos_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT id, nome, especialidade, telefone, email
-                FROM tecnicos
-                ORDER BY nome
-            """)
             
-            for row in c.fetchall():
-                tecnico_id, nome, especialidade, telefone, email = row
-                self.tecnicos_tree.insert("", "end", values=(
-                    nome,
-                    especialidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(tecnico_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar técnicos: {e}")
-        finally:
-            conn.close()
+    def carregar_tecnicos(self, where=None, params=()):
+        if not hasattr(self, 'tecnicos_paginador'):
+            self.tecnicos_paginador = self.criar_paginador(
+                self.tecnicos_tree,
+                colunas="id, nome, especialidade, telefone, email",
+                origem="tecnicos",
+                ordem=("nome", "id"),
+                formatar=self._linha_tecnico,
+                mensagem_erro="Erro ao carregar técnicos"
+            )
+        self.tecnicos_paginador.reiniciar(where=where, params=params)
+        
+    def _linha_tecnico(self, row):
+        tecnico_id, nome, especialidade, telefone, email = row
+        return (
+            nome,
+            especialidade or "",
+            format_phone(telefone) if telefone else "",
+            email or ""
+        ), (tecnico_id,)
             
     def buscar_tecnicos(self):
         termo = self.search_var.get().strip()
         
-        for item in self.tecnicos_tree.get_children():
-            self.tecnicos_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if termo:
-                c.execute("""
-                    SELECT id, nome, especialidade, telefone, email
-                    FROM tecnicos
-                    WHERE nome LIKE ? OR especialidade LIKE ?
-                    ORDER BY nome
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, nome, especialidade, telefone, email
-                    FROM tecnicos
-                    ORDER BY nome
-                """)
-            
-            for row in c.fetchall():
-                tecnico_id, nome, especialidade, telefone, email = row
-                self.tecnicos_tree.insert("", "end", values=(
-                    nome,
-                    especialidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(tecnico_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar técnicos: {e}")
-        finally:
-            conn.close()
+        if termo:
+            self.carregar_tecnicos("nome LIKE ? OR especialidade LIKE ?", (f"%{termo}%", f"%{termo}%"))
+        else:
+            self.carregar_tecnicos()
             
     def editar_tecnico(self):
         selected = self.tecnicos_tree.selection()
@@ -272,7 +231,7 @@ class TecnicosModule(BaseModule):
         self.notebook.select(0)
         
     def carregar_tecnico_para_edicao(self, tecnico_id):
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
@@ -291,8 +250,6 @@ class TecnicosModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar técnico: {e}")
-        finally:
-            conn.close()
             
     def excluir_tecnico(self):
         selected = self.tecnicos_tree.selection()
@@ -310,8 +267,7 @@ class TecnicosModule(BaseModule):
             
         tecnico_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        c = get_connection().cursor()
         
         try:
             # Verificar se técnico tem eventos
@@ -323,17 +279,15 @@ class TecnicosModule(BaseModule):
                                  "Não é possível excluir.")
                 return
             
-            c.execute("DELETE FROM tecnicos WHERE id = ?", (tecnico_id,))
-            conn.commit()
+            with transaction() as conn:
+                conn.execute("DELETE FROM tecnicos WHERE id = ?", (tecnico_id,))
             
             self.show_success("Técnico excluído com sucesso!")
             
             # Emitir evento
-            self.emit_event('tecnico_deleted')
+            self.emit_event('tecnico_deleted', ids=tecnico_id)
             
             self.carregar_tecnicos()
             
         except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir técnico: {e}")
-        finally:
-            conn.close()
\ No newline at end of file
+            self.show_error(f"Erro ao excluir técnico: {e}")
\ No newline at end of file
@@ -3,7 +3,7 @@ from tkinter import ttk, messagebox
 import sqlite3
 import hashlib
 from .base_module import BaseModule
-from database import DB_NAME
+from db import get_connection, transaction
 from utils.formatters import format_phone, validate_email
 
 class UsuariosModule(BaseModule):
@@ -234,32 +234,30 @@ class UsuariosModule(BaseModule):
             self.show_warning("Email inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            if self.current_usuario_id:
-                # Atualizar usuário existente (sem senha)
-                c.execute("""
-                    UPDATE usuarios SET username = ?, role = ?, nome_completo = ?, 
-                                      email = ?, telefone = ?, template_personalizado = ?, template_image_path = ?
-                    WHERE id = ?
-                """, (username, role, self.nome_completo_var.get().strip(),
-                     email if email else None, self.telefone_var.get().strip(),
-                     self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None,
-                     self.current_usuario_id))
-            else:
-                # Novo usuário
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
-                c.execute("""
-                    INSERT INTO usuarios (username, password, role, nome_completo, email, telefone, template_personalizado, template_image_path)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (username, password_hash, role, self.nome_completo_var.get().strip(),
-                     email if email else None, self.telefone_var.get().strip(), 
-                     self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None))
-                self.current_usuario_id = c.lastrowid
-            
-            conn.commit()
+            with transaction() as conn:
+                c = conn.cursor()
+                if self.current_usuario_id:
+                    # Atualizar usuário existente (sem senha)
+                    c.execute("""
+                        UPDATE usuarios SET username = ?, role = ?, nome_completo = ?, 
+                                          email = ?, telefone = ?, template_personalizado = ?, template_image_path = ?
+                        WHERE id = ?
+                    """, (username, role, self.nome_completo_var.get().strip(),
+                         email if email else None, self.telefone_var.get().strip(),
+                         self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None,
+                         self.current_usuario_id))
+                else:
+                    # Novo usuário
+                    password_hash = hashlib.sha256(password.encode()).hexdigest()
+                    c.execute("""
+                        INSERT INTO usuarios (username, password, role, nome_completo, email, telefone, template_personalizado, template_image_path)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (username, password_hash, role, self.nome_completo_var.get().strip(),
+                         email if email else None, self.telefone_var.get().strip(), 
+                         self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None))
+                    self.current_usuario_id = c.lastrowid
+            
             self.show_success("Usuário salvo com sucesso!")
             
             self.carregar_usuarios()
@@ -271,76 +269,36 @@ class UsuariosModule(BaseModule):
                 self.show_error(f"Erro de integridade: {e}")
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar usuário: {e}")
-        finally:
-            conn.close()
-            
-    def carregar_usuarios(self):
-        for item in self.usuarios_tree.get_children():
-            self.usuarios_tree.delete(item)
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT id, username, nome_completo, role, email, telefone
-                FROM usuarios
-                ORDER BY username
-            """)
-            
-            for row in c.fetchall():
-                usuario_id, username, nome_completo, role, email, telefone = row
-                self.usuarios_tree.insert("", "end", values=(
-                    username,
-                    nome_completo or "",
-                    role,
-                    email or "",
-                    format_phone(telefone) if telefone else ""
-                ), tags=(usuario_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar usuários: {e}")
-        finally:
-            conn.close()
+    def carregar_usuarios(self, where=None, params=()):
+        if not hasattr(self, 'usuarios_paginador'):
+            self.usuarios_paginador = self.criar_paginador(
+                self.usuarios_tree,
+                colunas="id, username, nome_completo, role, email, telefone",
+                origem="usuarios",
+                ordem=("username", "id"),
+                formatar=self._linha_usuario,
+                mensagem_erro="Erro ao carregar usuários"
+            )
+        self.usuarios_paginador.reiniciar(where=where, params=params)
+        
+    def _linha_usuario(self, row):
+        usuario_id, username, nome_completo, role, email, telefone = row
+        return (
+            username,
+            nome_completo or "",
+            role,
+            email or "",
+            format_phone(telefone) if telefone else ""
+        ), (usuario_id,)
             
     def buscar_usuarios(self):
         termo = self.search_var.get().strip()
         
-        for item in self.usuarios_tree.get_children():
-            self.usuarios_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if termo:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    WHERE username LIKE ? OR nome_completo LIKE ?
-                    ORDER BY username
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    ORDER BY username
-                """)
-            
-            for row in c.fetchall():
-                usuario_id, username, nome_completo, role, email, telefone = row
-                self.usuarios_tree.insert("", "end", values=(
-                    username,
-                    nome_completo or "",
-                    role,
-                    email or "",
-                    format_phone(telefone) if telefone else ""
-                ), tags=(usuario_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar usuários: {e}")
-        finally:
-            conn.close()
+        if termo:
+            self.carregar_usuarios("username LIKE ? OR nome_completo LIKE ?", (f"%{termo}%", f"%{termo}%"))
+        else:
+            self.carregar_usuarios()
             
     def editar_usuario(self):
         selected = self.usuarios_tree.selection()
@@ -357,7 +315,7 @@ class UsuariosModule(BaseModule):
         self.notebook.select(0)
         
     def carregar_usuario_para_edicao(self, usuario_id):
-        conn = sqlite3.connect(DB_NAME)
+        conn = get_connection()
         c = conn.cursor()
         
         try:
@@ -386,8 +344,6 @@ class UsuariosModule(BaseModule):
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar usuário: {e}")
-        finally:
-            conn.close()
             
     def resetar_senha(self):
         selected = self.usuarios_tree.selection()
@@ -405,22 +361,18 @@ class UsuariosModule(BaseModule):
             
         usuario_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
         try:
-            nova_senha = "123456"
-            password_hash = hashlib.sha256(nova_senha.encode()).hexdigest()
+            with transaction() as conn:
+                c = conn.cursor()
+                nova_senha = "123456"
+                password_hash = hashlib.sha256(nova_senha.encode()).hexdigest()
             
-            c.execute("UPDATE usuarios SET password = ? WHERE id = ?", (password_hash, usuario_id))
-            conn.commit()
+                c.execute("UPDATE usuarios SET password = ? WHERE id = ?", (password_hash, usuario_id))
             
             self.show_success(f"Senha resetada para '{nova_senha}' com sucesso!")
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao resetar senha: {e}")
-        finally:
-            conn.close()
             
     def excluir_usuario(self):
         selected = self.usuarios_tree.selection()
@@ -443,8 +395,7 @@ class UsuariosModule(BaseModule):
             self.show_warning("Você não pode excluir seu próprio usuário.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        c = get_connection().cursor()
         
         try:
             # Verificar se usuário tem cotações ou relatórios
@@ -454,22 +405,32 @@ class UsuariosModule(BaseModule):
             c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (usuario_id,))
             relatorios_count = c.fetchone()[0]
             
-            if cotacoes_count > 0 or relatorios_count > 0:
-                self.show_warning(f"Este usuário possui {cotacoes_count} cotações e {relatorios_count} relatórios.\n"
+            c.execute("SELECT COUNT(*) FROM eventos_campo WHERE tecnico_id = ?", (usuario_id,))
+            eventos_count = c.fetchone()[0]
+            
+            if cotacoes_count > 0 or relatorios_count > 0 or eventos_count > 0:
+                self.show_warning(f"Este usuário possui {cotacoes_count} cotações, {relatorios_count} relatórios "
+                                 f"e {eventos_count} eventos de campo.\n"
                                  "Não é possível excluir.")
                 return
             
-            c.execute("DELETE FROM usuarios WHERE id = ?", (usuario_id,))
-            conn.commit()
+            with transaction() as conn:
+                # Capas e configurações de PDF pessoais saem junto; templates criados perdem só o autor
+                conn.execute("DELETE FROM user_covers WHERE user_id = ?", (usuario_id,))
+                conn.execute("DELETE FROM pdf_edit_config WHERE user_id = ?", (usuario_id,))
+                conn.execute("UPDATE pdf_templates SET created_by = NULL WHERE created_by = ?", (usuario_id,))
+                conn.execute("DELETE FROM usuarios WHERE id = ?", (usuario_id,))
             
             self.show_success("Usuário excluído com sucesso!")
             
             self.carregar_usuarios()
             
+        except sqlite3.IntegrityError:
+            # Chaves estrangeiras ativas (db/connection.py): algum registro ainda aponta para o usuário
+            self.show_warning("Este usuário ainda está vinculado a outros registros do sistema.\n"
+                             "Não é possível excluir.")
         except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir usuário: {e}")
-        finally:
-            conn.close()    
+            self.show_error(f"Erro ao excluir usuário: {e}")    
     def toggle_template_upload(self):
         """Mostrar/ocultar campo de upload quando checkbox é marcado"""
         if self.template_personalizado_var.get():
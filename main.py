@@ -8,6 +8,15 @@ import sys
 import os
 
 def main():
+    from utils import perf, perfil
+    perf.configurar_log()
+    
+    # Modo de perfil: --profile ou CRM_PROFILE (arquivos em data/profiles/)
+    if "--profile" in sys.argv[1:]:
+        perfil.ativar()
+    else:
+        perfil.configurar_do_ambiente()
+    
     try:
         print("=== Sistema CRM - Iniciando ===")
         print(f"Python: {sys.version}")
@@ -36,9 +45,13 @@ def main():
         # Configurações para melhor compatibilidade
         root.attributes('-alpha', 0.0)  # Tornar transparente temporariamente
         
+        if perfil.ativo():
+            print(f"⏱️  Modo de perfil ativo: {perfil.diretorio()}")
+        
         print("Criando tela de login...")
         # Mostrar tela de login
-        login_window = LoginWindow(root)
+        with perfil.fase("login"):
+            login_window = LoginWindow(root)
         
         # Restaurar opacidade
         root.attributes('-alpha', 1.0)
@@ -57,6 +70,14 @@ def main():
         print("Teste com: python test_tkinter.py")
         
         root.mainloop()
+        
+        # Parar a fila de PDFs (jobs não concluídos são retomados na próxima execução)
+        from pdf_generators.fila import obter_fila
+        obter_fila().encerrar()
+        
+        # Encerrar conexões persistentes com o banco
+        from db import close_all_connections
+        close_all_connections()
         print("Sistema encerrado.")
         
     except ImportError as e:
@@ -98,5 +119,10 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    # No executável (PyInstaller) os processos da fila de PDFs e das fotos rodam este mesmo
+    # programa: freeze_support() os desvia para o trabalho deles antes de abrir o login
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     exit_code = main()
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Geração de PDFs em lote, sem a interface.
+
+    python -m pdf_generators.batch cotacoes --status "Em Aberto" --filial 2
+    python -m pdf_generators.batch cotacoes --ids 10,11,12 --trabalhadores 4 --forcar
+    python -m pdf_generators.batch relatorios --de 2024-01-01 --ate 2024-01-31 --responsavel joao
+
+Os filtros são combinados (E). Cada PDF é gerado por um processo do pool e o
+caminho é gravado em caminho_arquivo_pdf do registro. Cotações que não mudaram
+desde o último PDF reaproveitam o arquivo (ver cache_pdf); --forcar gera todas
+de novo. Execute na raiz do projeto: os arquivos são gravados em data/, como
+na interface.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from db import DB_NAME, get_connection
+from utils import perf
+
+TABELAS = {
+    "cotacoes": "cotacoes",
+    "relatorios": "relatorios_tecnicos",
+}
+
+# Tipo usado pelos geradores (ver fila.gerar)
+TIPOS = {
+    "cotacoes": "cotacao",
+    "relatorios": "relatorio",
+}
+
+# Filtros que só existem nas cotações
+SO_COTACOES = ("status", "filial")
+
+# data_criacao em ISO (aaaa-mm-dd) para --de/--ate: o formulário de relatórios grava dd/mm/aaaa
+DATA_ISO = """CASE WHEN data_criacao LIKE '__/__/____'
+                   THEN substr(data_criacao, 7, 4) || '-' || substr(data_criacao, 4, 2) || '-' || substr(data_criacao, 1, 2)
+                   ELSE date(data_criacao) END"""
+
+
+def selecionar(entidade, ids=None, de=None, ate=None, status=None, responsavel=None,
+               filial=None, db_name=None):
+    """
+    Ids dos registros que atendem aos filtros, em ordem crescente.
+    responsavel aceita o id ou o username do usuário.
+    """
+    filtros = {"status": status, "filial": filial}
+    if entidade != "cotacoes":
+        usados = [nome for nome in SO_COTACOES if filtros[nome] is not None]
+        if usados:
+            raise ValueError(f"Filtro(s) disponível(is) apenas para cotações: {', '.join(usados)}")
+
+    condicoes = []
+    params = []
+    if ids:
+        condicoes.append(f"id IN ({', '.join('?' * len(ids))})")
+        params.extend(ids)
+    if de:
+        condicoes.append(f"{DATA_ISO} >= ?")
+        params.append(de)
+    if ate:
+        condicoes.append(f"{DATA_ISO} <= ?")
+        params.append(ate)
+    if status:
+        condicoes.append("status = ?")
+        params.append(status)
+    if filial is not None:
+        condicoes.append("filial_id = ?")
+        params.append(filial)
+    if responsavel:
+        if str(responsavel).isdigit():
+            condicoes.append("responsavel_id = ?")
+            params.append(int(responsavel))
+        else:
+            condicoes.append("responsavel_id IN (SELECT id FROM usuarios WHERE username = ?)")
+            params.append(responsavel)
+
+    sql = f"SELECT id FROM {TABELAS[entidade]}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += " ORDER BY id"
+    return [row[0] for row in get_connection(db_name).execute(sql, params)]
+
+
+def _gerar_um(tipo, registro_id, db_name, usar_cache=True):
+    """Executado no processo do pool: gera um PDF e devolve (id, sucesso, resultado, segundos, páginas)"""
+    from . import fotos
+    from .fila import gerar
+
+    # O lote já usa um processo por PDF; as fotos de cada relatório são preparadas no próprio processo
+    fotos.TRABALHADORES_FOTOS = 1
+    paginas = [0]
+
+    def progresso(pagina):
+        paginas[0] = pagina
+
+    inicio = time.perf_counter()
+    try:
+        sucesso, resultado = gerar(tipo, registro_id, db_name, progresso=progresso, usar_cache=usar_cache)
+    except Exception as e:
+        sucesso, resultado = False, str(e)
+    return registro_id, sucesso, resultado, time.perf_counter() - inicio, paginas[0]
+
+
+def gerar_lote(entidade, ids, db_name=None, trabalhadores=None, ao_concluir=None, usar_cache=True):
+    """
+    Gerar os PDFs dos ids em paralelo. ao_concluir(resultado) é chamado a cada
+    PDF concluído. Retorna (resultados, segundos) com resultados na ordem de conclusão.
+    """
+    db_name = os.path.abspath(db_name or DB_NAME)
+    tipo = TIPOS[entidade]
+    resultados = []
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=trabalhadores, initializer=perf.configurar_log) as pool:
+        futuros = [pool.submit(_gerar_um, tipo, registro_id, db_name, usar_cache) for registro_id in ids]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            if ao_concluir:
+                ao_concluir(resultado)
+    return resultados, time.perf_counter() - inicio
+
+
+def resumo(resultados, segundos):
+    """Linhas do resumo de vazão"""
+    gerados = [r for r in resultados if r[1]]
+    paginas = sum(r[4] for r in gerados)
+    tempo_medio = sum(r[3] for r in gerados) / len(gerados) if gerados else 0
+    segundos = max(segundos, 1e-9)
+    return [
+        f"PDFs gerados: {len(gerados)}/{len(resultados)} ({len(resultados) - len(gerados)} com erro)",
+        f"Tempo total: {segundos:.1f} s",
+        f"Vazão: {len(gerados) / segundos:.2f} PDFs/s, {paginas / segundos:.1f} páginas/s",
+        f"Tempo médio por PDF (no processo): {tempo_medio * 1000:.0f} ms",
+    ]
+
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {valor}")
+
+
+def _lista_ids(valor):
+    try:
+        return [int(parte) for parte in valor.split(",") if parte.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"lista de ids inválida: {valor}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pdf_generators.batch",
+                                     description="Gerar PDFs de cotações ou relatórios em lote")
+    parser.add_argument("entidade", choices=sorted(TABELAS))
+    parser.add_argument("--ids", type=_lista_ids, action="extend", help="ids separados por vírgula (repetível)")
+    parser.add_argument("--de", type=_data, help="data de criação inicial (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=_data, help="data de criação final (AAAA-MM-DD)")
+    parser.add_argument("--status", help="status da cotação")
+    parser.add_argument("--responsavel", help="id ou username do responsável")
+    parser.add_argument("--filial", type=int, help="id da filial da cotação")
+    parser.add_argument("--db", help="banco de dados (padrão: CRM_DB ou crm_compressores.db)")
+    parser.add_argument("--trabalhadores", type=int, default=os.cpu_count(), help="processos geradores")
+    parser.add_argument("--forcar", action="store_true", help="gerar mesmo as cotações sem alteração desde o último PDF")
+    parser.add_argument("--listar", action="store_true", help="apenas listar os ids selecionados")
+    args = parser.parse_args(argv)
+    perf.configurar_log()
+
+    db_name = os.path.abspath(args.db or DB_NAME)
+    if not os.path.exists(db_name):
+        parser.error(f"banco não encontrado: {db_name}")
+
+    try:
+        ids = selecionar(args.entidade, args.ids, args.de, args.ate, args.status,
+                         args.responsavel, args.filial, db_name)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.listar:
+        print(" ".join(str(i) for i in ids))
+        return 0
+    if not ids:
+        print("Nenhum registro atende aos filtros.")
+        return 0
+
+    print(f"Gerando {len(ids)} PDF(s) de {args.entidade} com {args.trabalhadores} processo(s)...")
+    concluidos = [0]
+
+    def ao_concluir(resultado):
+        registro_id, sucesso, caminho_ou_erro, segundos, paginas = resultado
+        concluidos[0] += 1
+        marca = "✅" if sucesso else "❌"
+        print(f"{marca} [{concluidos[0]}/{len(ids)}] {registro_id}: {caminho_ou_erro} "
+              f"({paginas} pág., {segundos * 1000:.0f} ms)")
+
+    resultados, segundos = gerar_lote(args.entidade, ids, db_name, args.trabalhadores, ao_concluir,
+                                      usar_cache=not args.forcar)
+    print()
+    for linha in resumo(resultados, segundos):
+        print(linha)
+    return 1 if any(not r[1] for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
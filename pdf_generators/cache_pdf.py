@@ -0,0 +1,160 @@
+"""
+Cache dos PDFs de cotação.
+
+A chave é um hash de tudo que entra no documento: linha da cotação, cliente,
+responsável, contato principal, itens, composição dos kits, dados da filial,
+data de modificação das imagens usadas e a versão do layout do gerador.
+Quando a chave gravada em cotacoes.chave_pdf é igual à atual e o arquivo de
+caminho_arquivo_pdf existe, o PDF é reaproveitado sem ser gerado de novo.
+
+O diretório dos PDFs tem tamanho limitado: ao passar do limite, os arquivos
+usados há mais tempo são removidos (e a chave das cotações correspondentes é
+apagada, forçando nova geração quando forem pedidos).
+"""
+import hashlib
+import json
+import os
+
+from db import get_connection, transaction
+from utils.kits import composicoes_kits
+
+DIRETORIO_COTACOES = os.path.join("data", "cotacoes", "arquivos")
+
+# Tamanho máximo do diretório de PDFs de cotação
+LIMITE_DIRETORIO_MB = 500
+
+_ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets')
+
+
+def _assinatura_arquivo(caminho):
+    """(mtime, tamanho) do arquivo ou None se não existir"""
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def chave_cotacao(cotacao_id, db_name, versao):
+    """Chave do PDF da cotação; None se a cotação não existir"""
+    from assets.filiais.filiais_config import obter_filial, obter_usuario_cotacao, obter_template_capa_jpeg
+
+    conn = get_connection(db_name)
+    cotacao = conn.execute("""
+        SELECT cot.*, cli.nome, cli.nome_fantasia, cli.endereco, cli.email, cli.telefone,
+               cli.site, cli.cnpj, cli.cidade, cli.estado, cli.cep,
+               usr.nome_completo, usr.email, usr.telefone, usr.username
+        FROM cotacoes AS cot
+        JOIN clientes AS cli ON cot.cliente_id = cli.id
+        JOIN usuarios AS usr ON cot.responsavel_id = usr.id
+        WHERE cot.id = ?
+    """, (cotacao_id,))
+    colunas = [d[0] for d in cotacao.description]
+    linha = cotacao.fetchone()
+    if linha is None:
+        return None
+    # Colunas gravadas pelo próprio gerador não fazem parte do conteúdo
+    dados = [valor for coluna, valor in zip(colunas, linha) if coluna not in ("caminho_arquivo_pdf", "chave_pdf")]
+    registro = dict(zip(colunas, linha))
+
+    contato = conn.execute("SELECT nome FROM contatos WHERE cliente_id = ? LIMIT 1",
+                           (registro["cliente_id"],)).fetchone()
+    itens = conn.execute("""
+        SELECT id, tipo, item_nome, quantidade, descricao, valor_unitario, valor_total_item,
+               mao_obra, deslocamento, estadia, produto_id
+        FROM itens_cotacao WHERE cotacao_id = ? ORDER BY id
+    """, (cotacao_id,)).fetchall()
+    kits = sorted({item[10] for item in itens if item[1] == "Kit" and item[10]})
+    composicoes = [(kit_id, [(i.produto_id, i.nome, i.quantidade, i.nivel, i.ciclo) for i in itens_kit])
+                   for kit_id, itens_kit in composicoes_kits(kits, db_name).items()]
+
+    username = registro["username"] or ""
+    imagens = [
+        os.path.join(_ASSETS, 'backgrounds', 'capa_fundo.jpg'),
+        os.path.join(_ASSETS, 'logos', 'world_comp_brasil.jpg'),
+        obter_template_capa_jpeg(username),
+    ]
+
+    conteudo = [
+        versao,
+        dados,
+        contato,
+        itens,
+        composicoes,
+        obter_filial(registro["filial_id"] or 2),
+        obter_usuario_cotacao(username),
+        [(imagem, _assinatura_arquivo(imagem)) for imagem in imagens if imagem],
+    ]
+    texto = json.dumps(conteudo, default=str, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def pdf_em_cache(cotacao_id, chave, db_name):
+    """Caminho do PDF já gerado com esta chave, ou None"""
+    row = get_connection(db_name).execute(
+        "SELECT chave_pdf, caminho_arquivo_pdf FROM cotacoes WHERE id = ?", (cotacao_id,)
+    ).fetchone()
+    if not row or row[0] != chave or not row[1] or not os.path.exists(row[1]):
+        return None
+    # Marcar como usado recentemente (critério de remoção do limite de tamanho)
+    try:
+        os.utime(row[1])
+    except OSError:
+        pass
+    return row[1]
+
+
+def registrar(cotacao_id, chave, caminho, db_name):
+    """Gravar caminho e chave do PDF gerado"""
+    with transaction(db_name) as conn:
+        conn.execute("UPDATE cotacoes SET caminho_arquivo_pdf = ?, chave_pdf = ? WHERE id = ?",
+                     (caminho, chave, cotacao_id))
+
+
+def invalidar(cotacao_id=None, db_name=None):
+    """Descartar o cache de uma cotação (ou de todas) e devolver quantas foram afetadas"""
+    with transaction(db_name) as conn:
+        if cotacao_id is None:
+            cursor = conn.execute("UPDATE cotacoes SET chave_pdf = NULL WHERE chave_pdf IS NOT NULL")
+        else:
+            cursor = conn.execute("UPDATE cotacoes SET chave_pdf = NULL WHERE id = ?", (cotacao_id,))
+        return cursor.rowcount
+
+
+def limitar_diretorio(db_name=None, diretorio=DIRETORIO_COTACOES, limite_mb=LIMITE_DIRETORIO_MB, manter=()):
+    """
+    Remover os PDFs usados há mais tempo até o diretório caber no limite.
+    Arquivos em manter nunca são removidos. Retorna a lista de removidos.
+    """
+    try:
+        arquivos = [entrada for entrada in os.scandir(diretorio)
+                    if entrada.is_file() and entrada.name.lower().endswith(".pdf")]
+    except FileNotFoundError:
+        return []
+
+    stats = [(entrada.path, entrada.stat()) for entrada in arquivos]
+    total = sum(stat.st_size for _, stat in stats)
+    limite = limite_mb * 1024 * 1024
+    if total <= limite:
+        return []
+
+    protegidos = {os.path.abspath(caminho) for caminho in manter}
+    removidos = []
+    for caminho, stat in sorted(stats, key=lambda item: max(item[1].st_atime, item[1].st_mtime)):
+        if total <= limite:
+            break
+        if os.path.abspath(caminho) in protegidos:
+            continue
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= stat.st_size
+        removidos.append(caminho)
+
+    if removidos:
+        with transaction(db_name) as conn:
+            conn.executemany("UPDATE cotacoes SET chave_pdf = NULL WHERE caminho_arquivo_pdf = ?",
+                             [(caminho,) for caminho in removidos])
+        print(f"🧹 {len(removidos)} PDF(s) antigo(s) removido(s) de {diretorio}")
+    return removidos
@@ -1,87 +1,26 @@
 import sqlite3
 import os
 import datetime
+import logging
 import sys
 from fpdf import FPDF
-from database import DB_NAME
+from db import get_connection
 from utils.formatters import format_cep, format_phone, format_currency, format_date, format_cnpj
 
 # Adicionar o diretório assets ao path para importar os templates
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from assets.filiais.filiais_config import obter_filial, obter_usuario_cotacao, obter_template_capa_jpeg
+from pdf_generators import cache_pdf
+from pdf_generators.imagens import imagem_para_pdf
+from utils.text_sanitize import limpar_texto_cotacao as clean_text
+from utils.kits import composicoes_kits, formatar_composicao
+from utils import perf
 
-def clean_text(text):
-    """Substitui tabs por espaços e remove caracteres problemáticos"""
-    if text is None:
-        return ""
-    
-    # Converter para string se não for
-    text = str(text)
-    
-    # Substitui tabs por 4 espaços
-    text = text.replace('\t', '    ')
-    
-    # Substituir caracteres especiais problemáticos
-    replacements = {
-        # Bullets e símbolos especiais
-        '•': '- ',
-        '●': '- ',
-        '◦': '- ',
-        '◆': '- ',
-        '▪': '- ',
-        '▫': '- ',
-        '★': '* ',
-        '☆': '* ',
-        
-        # Aspas especiais
-        '"': '"',
-        '"': '"',
-        ''': "'",
-        ''': "'",
-        
-        # Travessões
-        '–': '-',
-        '—': '-',
-        
-        # Outros símbolos
-        '…': '...',
-        '®': '(R)',
-        '™': '(TM)',
-        '©': '(C)',
-        '°': ' graus',
-        '€': 'EUR',
-        '£': 'GBP',
-        '¥': 'JPY',
-        
-        # Acentos problemáticos (fallback)
-        'À': 'A', 'Á': 'A', 'Â': 'A', 'Ã': 'A', 'Ä': 'A',
-        'È': 'E', 'É': 'E', 'Ê': 'E', 'Ë': 'E',
-        'Ì': 'I', 'Í': 'I', 'Î': 'I', 'Ï': 'I',
-        'Ò': 'O', 'Ó': 'O', 'Ô': 'O', 'Õ': 'O', 'Ö': 'O',
-        'Ù': 'U', 'Ú': 'U', 'Û': 'U', 'Ü': 'U',
-        'Ç': 'C', 'Ñ': 'N',
-        'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a',
-        'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
-        'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
-        'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o',
-        'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
-        'ç': 'c', 'ñ': 'n',
-    }
-    
-    # Aplicar substituições
-    for old_char, new_char in replacements.items():
-        text = text.replace(old_char, new_char)
-    
-    # Remover caracteres não ASCII restantes
-    try:
-        # Tentar encoding/decoding para limpar caracteres problemáticos
-        text = text.encode('ascii', 'ignore').decode('ascii')
-    except:
-        # Se falhar, usar apenas caracteres básicos
-        text = ''.join(char for char in text if ord(char) < 128)
-    
-    return text
+logger = logging.getLogger(__name__)
+
+# Versão do layout: incrementar ao alterar o documento gerado (invalida o cache de PDFs)
+VERSAO_LAYOUT = 3
 
 class PDFCotacao(FPDF):
     def __init__(self, dados_filial, dados_usuario, *args, **kwargs):
@@ -90,10 +29,16 @@ class PDFCotacao(FPDF):
         self.baby_blue = (137, 207, 240)  # Azul bebê #89CFF0
         self.dados_filial = dados_filial
         self.dados_usuario = dados_usuario
+        self.progresso = None  # callback(página) chamado a cada nova página
         
         # Configurar encoding para suportar mais caracteres
         self.set_doc_option('core_fonts_encoding', 'latin-1')
 
+    def add_page(self, *args, **kwargs):
+        super().add_page(*args, **kwargs)
+        if self.progresso:
+            self.progresso(self.page_no())
+
     def header(self):
         # NÃO exibir header na página 1 (capa JPEG)
         if self.page_no() == 1:
@@ -150,45 +95,29 @@ class PDFCotacao(FPDF):
         
         # Resetar cor para preto para o conteúdo principal
         self.set_text_color(0, 0, 0)
-    
-    @staticmethod
-    def obter_composicao_kit(kit_id):
-        """Obtém a composição de um kit a partir do banco de dados"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        composicao = []
-        
-        try:
-            c.execute("""
-                SELECT p.nome, kc.quantidade 
-                FROM kit_items kc
-                JOIN produtos p ON kc.produto_id = p.id
-                WHERE kc.kit_id = ?
-            """, (kit_id,))
-            
-            for row in c.fetchall():
-                nome, quantidade = row
-                composicao.append(f"{quantidade} x {nome}")
-                
-        except sqlite3.Error:
-            composicao = ["Erro ao carregar composição"]
-        finally:
-            conn.close()
-        
-        return composicao
 
-def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None):
+@perf.medido("pdf.cotacao")
+def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None, progresso=None, usar_cache=True):
     """
     Versão melhorada do gerador de PDF de cotações
     - Corrige problemas de logo
     - Adiciona capa personalizada por usuário
     - Corrige problemas de descrição e valores
     - Inclui CNPJ da filial no rodapé
+    
+    progresso(página), se informado, é chamado a cada página iniciada.
+    Se nada mudou desde a última geração, o PDF existente é devolvido
+    (usar_cache=False força a geração).
     """
-    conn = None
     try:
-        conn = sqlite3.connect(db_name)
-        c = conn.cursor()   
+        with perf.span("pdf.cotacao.chave"):
+            chave = cache_pdf.chave_cotacao(cotacao_id, db_name, VERSAO_LAYOUT)
+        if usar_cache and chave:
+            caminho = cache_pdf.pdf_em_cache(cotacao_id, chave, db_name)
+            if caminho:
+                return True, caminho
+        
+        c = get_connection(db_name).cursor()
 
         # Obter dados da cotação (incluindo filial_id)
         c.execute("""
@@ -258,8 +187,17 @@ def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None):
         """, (cotacao_id,))
         itens_cotacao = c.fetchall()
 
+        # Composição de todos os kits da cotação (inclusive kits dentro de kits) em uma consulta
+        try:
+            composicoes = composicoes_kits(
+                [item[10] for item in itens_cotacao if item[1] == "Kit" and item[10]], db_name
+            )
+        except sqlite3.Error:
+            composicoes = None
+
         # Criar o PDF
         pdf = PDFCotacao(dados_filial, dados_usuario, orientation='P', unit='mm', format='A4')
+        pdf.progresso = progresso
         pdf.set_auto_page_break(auto=True, margin=25)  # Aumenta margem inferior para evitar sobreposição
         
         # Configurar dados para cabeçalho/footer (como modelo antigo)
@@ -279,7 +217,7 @@ def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None):
         fundo_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'backgrounds', 'capa_fundo.jpg')
         if os.path.exists(fundo_path):
             # Adicionar fundo ocupando toda a página
-            pdf.image(fundo_path, x=0, y=0, w=210, h=297)
+            pdf.image(imagem_para_pdf(fundo_path, 210, 297), x=0, y=0, w=210, h=297)
         
         # 2. CAPA PERSONALIZADA SOBREPOSTA (se disponível)
         template_jpeg_path = obter_template_capa_jpeg(responsavel_username)
@@ -290,7 +228,8 @@ def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None):
             x_pos = (210 - capa_width) / 2  # Centralizada
             y_pos = 105  # Posição Y no terço superior
             
-            pdf.image(template_jpeg_path, x=x_pos, y=y_pos, w=capa_width, h=capa_height)
+            pdf.image(imagem_para_pdf(template_jpeg_path, capa_width, capa_height),
+                      x=x_pos, y=y_pos, w=capa_width, h=capa_height)
         
         # 3. TEXTO DINÂMICO NA PARTE INFERIOR (centro-esquerda)
         pdf.set_y(250)  # Posição Y na parte inferior
@@ -343,7 +282,7 @@ def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None):
         if os.path.exists(logo_path):
             logo_height = 30
             logo_width = logo_height * 1.5
-            pdf.image(logo_path, x=(210 - logo_width) / 2, y=20, w=logo_width)
+            pdf.image(imagem_para_pdf(logo_path, logo_width), x=(210 - logo_width) / 2, y=20, w=logo_width)
         
         # Posição para dados do cliente e empresa
         pdf.set_y(80)  # Aumentado para 80 para dar espaço ao logo maior
@@ -563,28 +502,28 @@ Com uma equipe de técnicos altamente qualificados e constantemente treinados pa
                  valor_unitario, valor_total_item, 
                  mao_obra, deslocamento, estadia, produto_id) = item
                 
-                # DEBUG: Verificar valores vindos do banco
-                print(f"DEBUG Item {item_counter}:")
-                print(f"  - ID: {item_id}")
-                print(f"  - Tipo: {item_tipo}")
-                print(f"  - Nome: {item_nome}")
-                print(f"  - Quantidade: {quantidade}")
-                print(f"  - Descrição: '{descricao}'")
-                print(f"  - Valor Unitário: {valor_unitario}")
-                print(f"  - Valor Total: {valor_total_item}")
-                print(f"  - Produto ID: {produto_id}")
+                # Valores vindos do banco (CRM_LOG=DEBUG)
+                logger.debug(
+                    "Item %s: id=%s tipo=%s nome=%s quantidade=%s descricao=%r "
+                    "valor_unitario=%s valor_total=%s produto_id=%s",
+                    item_counter, item_id, item_tipo, item_nome, quantidade, descricao,
+                    valor_unitario, valor_total_item, produto_id
+                )
                 
                 # GARANTIR que descrição não seja vazia ou None
                 if not descricao or str(descricao).strip() == '' or str(descricao).lower() in ['none', 'null']:
                     descricao = item_nome if item_nome else "Descrição não informada"
-                    print(f"  - Descrição corrigida para: '{descricao}'")
+                    logger.debug("Item %s: descrição vazia, usando %r", item_counter, descricao)
                 
                 # TRATAMENTO ESPECIAL PARA KITS E SERVIÇOS (como modelo antigo)
                 descricao_final = descricao
                 
                 if item_tipo == "Kit" and produto_id:
                     # Obter composição do kit
-                    composicao = PDFCotacao.obter_composicao_kit(produto_id)
+                    if composicoes is None:
+                        composicao = ["Erro ao carregar composição"]
+                    else:
+                        composicao = formatar_composicao(composicoes.get(produto_id, []))
                     descricao_final = f"Kit: {item_nome}\nComposição:\n" + "\n".join(composicao)
                 
                 elif item_tipo == "Serviço":
@@ -662,19 +601,17 @@ Com uma equipe de técnicos altamente qualificados e constantemente treinados pa
         os.makedirs(output_dir, exist_ok=True)
         file_name = f"Proposta_{numero_proposta.replace('/', '_').replace(' ', '')}.pdf"
         pdf_path = os.path.join(output_dir, file_name)
-        pdf.output(pdf_path)
+        with perf.span("pdf.cotacao.salvar"):
+            pdf.output(pdf_path)
 
-        # Atualizar caminho do PDF no banco de dados
-        c.execute("UPDATE cotacoes SET caminho_arquivo_pdf=? WHERE id=?", (pdf_path, cot_id))
-        conn.commit()
+        # Atualizar caminho e chave do PDF no banco de dados
+        cache_pdf.registrar(cot_id, chave, pdf_path, db_name)
+        cache_pdf.limitar_diretorio(db_name, output_dir, manter=[pdf_path])
 
         return True, pdf_path
 
     except Exception as e:
         return False, f"Erro ao gerar PDF: {str(e)}"
-    finally:
-        if conn:
-            conn.close()
 
 # Manter compatibilidade com versão antiga
 def gerar_pdf_cotacao(cotacao_id, db_name):
@@ -0,0 +1,223 @@
+"""
+Fila persistente de geração de PDFs.
+
+Cada pedido vira uma linha em pdf_jobs e é processado por um pool de
+processos, fora da thread da interface. O worker grava na própria linha o
+andamento (páginas geradas) e o resultado, então a interface acompanha a
+fila lendo a tabela e pedidos pendentes sobrevivem ao fechamento do
+programa: na próxima abertura são enviados de novo ao pool.
+
+Os PDFs são gravados em diretórios locais (data/...), por isso cada
+máquina só processa os pedidos que ela mesma criou.
+"""
+import logging
+import os
+import socket
+import sqlite3
+
+from db import DB_NAME, get_connection, transaction
+from utils import perf, perfil
+from utils.importacao import tardio
+
+logger = logging.getLogger(__name__)
+
+# Importados só quando o primeiro PDF é enviado ao pool
+multiprocessing = tardio("multiprocessing")
+processos = tardio("concurrent.futures.process")
+
+# Processos geradores (a geração é CPU-bound; deixa um núcleo para a interface)
+TRABALHADORES_PDF = max(1, min(2, (os.cpu_count() or 2) - 1))
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+TIPOS = ('cotacao', 'relatorio')
+
+
+def maquina_atual():
+    return socket.gethostname()
+
+
+def enfileirar(tipo, registro_id, usuario=None, solicitado_por=None, db_name=None):
+    """Registrar um pedido de PDF e devolver o id do job"""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de PDF desconhecido: {tipo}")
+    with transaction(db_name) as conn:
+        cursor = conn.execute(
+            "INSERT INTO pdf_jobs (tipo, registro_id, usuario, solicitado_por, maquina) VALUES (?, ?, ?, ?, ?)",
+            (tipo, registro_id, usuario, solicitado_por, maquina_atual())
+        )
+        return cursor.lastrowid
+
+
+def gerar(tipo, registro_id, db_name, usuario=None, progresso=None, usar_cache=True):
+    """Chamar o gerador do tipo e devolver (sucesso, caminho ou mensagem de erro)"""
+    if tipo == 'cotacao':
+        from .cotacao_nova import gerar_pdf_cotacao_nova
+        return gerar_pdf_cotacao_nova(registro_id, db_name, usuario, progresso=progresso, usar_cache=usar_cache)
+    from .relatorio_tecnico import gerar_pdf_relatorio
+    return gerar_pdf_relatorio(registro_id, db_name, progresso=progresso)
+
+
+def _inicializar_processo():
+    """Inicialização do processo gerador: log e modo de perfil herdados do ambiente"""
+    from . import fotos
+
+    perf.configurar_log()
+    perfil.configurar_do_ambiente()
+    # A fila já roda os PDFs em processos próprios; as fotos de cada relatório são preparadas no próprio processo
+    fotos.TRABALHADORES_FOTOS = 1
+
+
+def _executar_job(job_id, tipo, registro_id, usuario, db_name):
+    """Executado no processo gerador: gera o PDF e grava andamento e resultado no job"""
+    with transaction(db_name) as conn:
+        conn.execute(
+            "UPDATE pdf_jobs SET status = ?, paginas = 0, iniciado_em = CURRENT_TIMESTAMP WHERE id = ?",
+            (EXECUTANDO, job_id)
+        )
+
+    def progresso(pagina):
+        with transaction(db_name) as conn:
+            conn.execute("UPDATE pdf_jobs SET paginas = ? WHERE id = ?", (pagina, job_id))
+
+    try:
+        with perfil.fase(f"pdf_{tipo}_{registro_id}"):
+            sucesso, resultado = gerar(tipo, registro_id, db_name, usuario, progresso)
+    except Exception as e:
+        sucesso, resultado = False, str(e)
+
+    with transaction(db_name) as conn:
+        conn.execute(
+            "UPDATE pdf_jobs SET status = ?, caminho = ?, erro = ?, concluido_em = CURRENT_TIMESTAMP WHERE id = ?",
+            (CONCLUIDO if sucesso else ERRO,
+             resultado if sucesso else None,
+             None if sucesso else resultado,
+             job_id)
+        )
+    return sucesso, resultado
+
+
+class FilaPDF:
+    """
+    Envia os jobs pendentes desta máquina ao pool de processos.
+
+    Usada apenas pela thread da interface: processar() deve ser chamado
+    periodicamente (ex.: via after()) e devolve o estado dos jobs.
+    """
+
+    def __init__(self, db_name=None, trabalhadores=TRABALHADORES_PDF):
+        self.db_name = os.path.abspath(db_name or DB_NAME)
+        self.trabalhadores = trabalhadores
+        self.maquina = maquina_atual()
+        self._pool = None
+        self._enviados = {}  # job_id -> futuro
+
+    def _obter_pool(self):
+        if self._pool is None:
+            # spawn: o processo gerador não herda o Tk nem as threads da interface
+            self._pool = processos.ProcessPoolExecutor(
+                max_workers=self.trabalhadores,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_processo
+            )
+        return self._pool
+
+    def retomar(self):
+        """
+        Devolver à fila os jobs desta máquina interrompidos por um encerramento
+        anterior do programa (ficaram 'executando' com o pid de outro processo).
+        """
+        with transaction(self.db_name) as conn:
+            cursor = conn.execute(
+                "UPDATE pdf_jobs SET status = ?, paginas = 0 WHERE maquina = ? AND status = ? AND pid != ?",
+                (PENDENTE, self.maquina, EXECUTANDO, os.getpid())
+            )
+            return cursor.rowcount
+
+    def processar(self):
+        """
+        Enviar ao pool os jobs pendentes e devolver os jobs ativos desta máquina
+        como dicionários (id, tipo, registro_id, status, paginas, caminho, erro).
+        """
+        conn = get_connection(self.db_name)
+        pendentes = conn.execute(
+            "SELECT id, tipo, registro_id, usuario FROM pdf_jobs WHERE maquina = ? AND status = ? ORDER BY id",
+            (self.maquina, PENDENTE)
+        ).fetchall()
+        for job_id, tipo, registro_id, usuario in pendentes:
+            if job_id not in self._enviados:
+                self._enviar(job_id, tipo, registro_id, usuario)
+
+        self._verificar_falhas()
+
+        if not self._enviados:
+            return []
+        ids = list(self._enviados)
+        rows = conn.execute(
+            f"SELECT id, tipo, registro_id, status, paginas, caminho, erro FROM pdf_jobs "
+            f"WHERE id IN ({', '.join('?' * len(ids))}) ORDER BY id",
+            ids
+        ).fetchall()
+        jobs = [dict(zip(("id", "tipo", "registro_id", "status", "paginas", "caminho", "erro"), row)) for row in rows]
+        for job in jobs:
+            if job["status"] in (CONCLUIDO, ERRO):
+                self._enviados.pop(job["id"], None)
+        return jobs
+
+    def _enviar(self, job_id, tipo, registro_id, usuario):
+        with transaction(self.db_name) as conn:
+            conn.execute("UPDATE pdf_jobs SET pid = ? WHERE id = ?", (os.getpid(), job_id))
+        try:
+            futuro = self._obter_pool().submit(_executar_job, job_id, tipo, registro_id, usuario, self.db_name)
+        except processos.BrokenProcessPool:
+            self._pool = None
+            futuro = self._obter_pool().submit(_executar_job, job_id, tipo, registro_id, usuario, self.db_name)
+        self._enviados[job_id] = futuro
+
+    def _verificar_falhas(self):
+        """Jobs cujo processo morreu sem gravar o resultado são marcados com erro"""
+        for job_id, futuro in list(self._enviados.items()):
+            if not futuro.done() or futuro.cancelled():
+                continue
+            erro = futuro.exception()
+            if erro is None:
+                continue
+            if isinstance(erro, processos.BrokenProcessPool):
+                self._pool = None
+            try:
+                with transaction(self.db_name) as conn:
+                    conn.execute(
+                        "UPDATE pdf_jobs SET status = ?, erro = ?, concluido_em = CURRENT_TIMESTAMP "
+                        "WHERE id = ? AND status IN (?, ?)",
+                        (ERRO, f"Falha no processo gerador: {erro}", job_id, PENDENTE, EXECUTANDO)
+                    )
+            except sqlite3.Error:
+                logger.exception("Não foi possível registrar a falha do job %s", job_id)
+
+    def pendentes(self):
+        """Quantidade de jobs desta máquina ainda não concluídos"""
+        return get_connection(self.db_name).execute(
+            "SELECT COUNT(*) FROM pdf_jobs WHERE maquina = ? AND status IN (?, ?)",
+            (self.maquina, PENDENTE, EXECUTANDO)
+        ).fetchone()[0]
+
+    def encerrar(self):
+        """Parar o pool sem esperar: jobs não concluídos continuam na tabela e são retomados"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._enviados.clear()
+
+
+_fila = None
+
+
+def obter_fila():
+    """Fila compartilhada do programa"""
+    global _fila
+    if _fila is None:
+        _fila = FilaPDF()
+    return _fila
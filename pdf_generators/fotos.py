@@ -0,0 +1,115 @@
+"""
+Preparação das fotos anexadas aos relatórios técnicos.
+
+Fotos de celular têm 12+ MP; embutidas como estão, o fpdf decodifica o
+arquivo inteiro e o PDF carrega a resolução original. preparar_fotos()
+decodifica cada foto uma única vez (com redução já na decodificação do JPEG),
+aplica a orientação EXIF, reduz para o tamanho impresso e devolve o JPEG
+pronto para o fpdf. As fotos são processadas em paralelo e o resultado fica
+em data/cache/fotos, indexado pelo hash do conteúdo do arquivo.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+from pdf_generators.imagens import DPI_PDF, QUALIDADE_JPEG
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CACHE = os.path.join("data", "cache", "fotos")
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png')
+
+# Tamanho máximo de uma foto no relatório (mm)
+LARGURA_FOTO_MM = 80
+ALTURA_FOTO_MM = 60
+
+# Processos para preparar as fotos; abaixo de MIN_FOTOS_POOL o trabalho é feito no próprio processo
+TRABALHADORES_FOTOS = os.cpu_count() or 1
+MIN_FOTOS_POOL = 4
+
+# dados: JPEG pronto para embutir; largura/altura em pixels
+FotoPreparada = namedtuple('FotoPreparada', ['dados', 'largura', 'altura'])
+
+
+def eh_imagem(caminho):
+    return os.path.splitext(caminho)[1].lower() in EXTENSOES_IMAGEM
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha1()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _preparar(caminho, largura_px, altura_px):
+    """Executado no pool: devolve (caminho, FotoPreparada) ou (caminho, None) se não for possível ler"""
+    try:
+        prefixo = f"{_hash_arquivo(caminho)}_{largura_px}x{altura_px}_q{QUALIDADE_JPEG}"
+        destino = os.path.join(DIRETORIO_CACHE, prefixo + ".jpg")
+        if os.path.exists(destino):
+            with open(destino, "rb") as arquivo:
+                dados = arquivo.read()
+            with Image.open(io.BytesIO(dados)) as img:
+                return caminho, FotoPreparada(dados, img.width, img.height)
+
+        with Image.open(caminho) as img:
+            # JPEG: decodificar já reduzido (escala 1/2, 1/4 ou 1/8) quando a foto é muito maior que o destino
+            # (lado maior nas duas dimensões: a rotação EXIF pode trocar largura e altura)
+            lado = max(largura_px, altura_px)
+            img.draft("RGB", (lado, lado))
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+                fundo = Image.new("RGB", img.size, (255, 255, 255))
+                fundo.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+                img = fundo
+            else:
+                img = img.convert("RGB")
+            img.thumbnail((largura_px, altura_px), Image.LANCZOS)
+            saida = io.BytesIO()
+            img.save(saida, "JPEG", quality=QUALIDADE_JPEG, optimize=True)
+            dados = saida.getvalue()
+            largura, altura = img.size
+
+        os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=DIRETORIO_CACHE, suffix=".jpg")
+        with os.fdopen(fd, "wb") as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, destino)
+        return caminho, FotoPreparada(dados, largura, altura)
+    except Exception:
+        logger.exception("Erro ao preparar imagem %s", caminho)
+        return caminho, None
+
+
+def preparar_fotos(caminhos, largura_mm=LARGURA_FOTO_MM, altura_mm=ALTURA_FOTO_MM, dpi=DPI_PDF,
+                   trabalhadores=None):
+    """
+    Preparar as fotos para o tamanho impresso largura_mm x altura_mm (mantendo
+    a proporção). Retorna {caminho: FotoPreparada}; fotos que não puderam ser
+    lidas ficam com None. Sem Pillow retorna um dicionário vazio.
+    """
+    if not PIL_AVAILABLE:
+        return {}
+    caminhos = list(dict.fromkeys(c for c in caminhos if c and eh_imagem(c) and os.path.exists(c)))
+    largura_px = round(largura_mm / 25.4 * dpi)
+    altura_px = round(altura_mm / 25.4 * dpi)
+    trabalhadores = min(trabalhadores or TRABALHADORES_FOTOS, len(caminhos))
+
+    if trabalhadores <= 1 or len(caminhos) < MIN_FOTOS_POOL:
+        return dict(_preparar(caminho, largura_px, altura_px) for caminho in caminhos)
+
+    with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+        return dict(pool.map(_preparar, caminhos, [largura_px] * len(caminhos), [altura_px] * len(caminhos)))
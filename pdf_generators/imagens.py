@@ -0,0 +1,117 @@
+"""
+Cache de imagens redimensionadas para os PDFs.
+
+O fpdf embute a imagem original em cada documento, mesmo quando ela é
+desenhada pequena (o logo tem ~1 MB). imagem_para_pdf() devolve uma versão
+reduzida para o tamanho em que a imagem será desenhada, na resolução DPI_PDF,
+gravada em data/cache/imagens. A chave da variante é o caminho, mtime e
+tamanho do original e as dimensões de destino, então trocar o arquivo gera
+uma nova variante (e a antiga é apagada).
+"""
+import hashlib
+import logging
+import math
+import os
+import tempfile
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CACHE = os.path.join("data", "cache", "imagens")
+
+# Resolução das variantes (pontos por polegada no tamanho impresso) e qualidade do JPEG
+DPI_PDF = 150
+QUALIDADE_JPEG = 85
+
+# (caminho, mtime, tamanho, largura, altura, dpi) -> caminho da variante
+_variantes = {}
+
+
+def _pixels(mm, dpi):
+    return max(1, math.ceil(mm / 25.4 * dpi))
+
+
+def imagem_para_pdf(caminho, largura_mm, altura_mm=None, dpi=DPI_PDF):
+    """
+    Caminho da variante da imagem para ser desenhada com largura_mm x altura_mm
+    (altura proporcional se omitida). Sem Pillow, ou se a imagem já for menor
+    que o destino, devolve o próprio caminho.
+    """
+    if not PIL_AVAILABLE:
+        return caminho
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return caminho
+
+    origem = os.path.abspath(caminho)
+    memo = (origem, stat.st_mtime_ns, stat.st_size, largura_mm, altura_mm, dpi)
+    variante = _variantes.get(memo)
+    if variante and os.path.exists(variante):
+        return variante
+
+    try:
+        variante = _criar_variante(origem, stat, largura_mm, altura_mm, dpi)
+    except Exception:
+        logger.exception("Não foi possível reduzir a imagem %s", caminho)
+        return caminho
+    _variantes[memo] = variante
+    return variante
+
+
+def _criar_variante(origem, stat, largura_mm, altura_mm, dpi):
+    with Image.open(origem) as img:
+        largura_px = _pixels(largura_mm, dpi)
+        if altura_mm is None:
+            altura_px = max(1, round(largura_px * img.height / img.width))
+        else:
+            altura_px = _pixels(altura_mm, dpi)
+        if img.width <= largura_px and img.height <= altura_px:
+            return origem
+
+        transparente = img.mode in ("RGBA", "LA") or "transparency" in img.info
+        extensao = ".png" if transparente else ".jpg"
+
+        # <nome>_<hash do caminho>_<hash de mtime/tamanho>_<largura>x<altura>_q<qualidade>
+        base = os.path.splitext(os.path.basename(origem))[0]
+        grupo = f"{base}_{hashlib.sha1(origem.encode('utf-8')).hexdigest()[:8]}_"
+        versao = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")).hexdigest()[:12]
+        nome = f"{grupo}{versao}_{largura_px}x{altura_px}_q{QUALIDADE_JPEG}{extensao}"
+        destino = os.path.join(DIRETORIO_CACHE, nome)
+        if os.path.exists(destino):
+            return destino
+
+        reduzida = img.convert("RGBA" if transparente else "RGB").resize((largura_px, altura_px), Image.LANCZOS)
+
+    os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+    # Gravar em arquivo temporário e renomear: outro processo gerador pode estar lendo a variante
+    fd, temporario = tempfile.mkstemp(dir=DIRETORIO_CACHE, suffix=extensao)
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            if transparente:
+                reduzida.save(arquivo, "PNG", optimize=True)
+            else:
+                reduzida.save(arquivo, "JPEG", quality=QUALIDADE_JPEG, optimize=True)
+        os.replace(temporario, destino)
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    _remover_antigas(grupo, versao)
+    return destino
+
+
+def _remover_antigas(grupo, versao):
+    """Apagar variantes geradas a partir de versões anteriores do mesmo arquivo"""
+    for nome in os.listdir(DIRETORIO_CACHE):
+        if nome.startswith(grupo) and not nome.startswith(grupo + versao):
+            try:
+                os.remove(os.path.join(DIRETORIO_CACHE, nome))
+            except OSError:
+                pass
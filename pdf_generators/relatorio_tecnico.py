@@ -1,66 +1,19 @@
-import sqlite3
 import os
 from fpdf import FPDF
 from datetime import datetime
+import io
 import json
+import logging
 from utils.formatters import format_date, format_cnpj, format_phone
 from PIL import Image
+from db import get_connection, transaction
+from pdf_generators.imagens import imagem_para_pdf
+from utils.text_sanitize import limpar_texto_relatorio
+from pdf_generators.fotos import preparar_fotos, eh_imagem, LARGURA_FOTO_MM, ALTURA_FOTO_MM
 import tempfile
+from utils import perf
 
-def clean_text(text, aggressive=False):
-    """Substitui tabs por espaços e remove caracteres problemáticos"""
-    if text is None:
-        return ""
-    
-    # Converter para string se não for
-    text = str(text)
-    
-    # Substituir tabs por espaços
-    text = text.replace('\t', '    ')
-    
-    # Remover ou substituir caracteres problemáticos
-    replacements = {
-        '"': '"',  # Smart quotes
-        '"': '"',
-        ''': "'",
-        ''': "'",
-        '…': '...',
-        '–': '-',
-        '—': '-',
-        '°': 'o',
-        '®': '(R)',
-        '©': '(C)',
-        '™': '(TM)',
-        'ª': 'a',
-        'º': 'o',
-        'ç': 'c',
-        'Ç': 'C'
-    }
-    
-    for old_char, new_char in replacements.items():
-        text = text.replace(old_char, new_char)
-    
-    # Se aggressive=True, remover todos os acentos também
-    if aggressive:
-        accents = {
-            'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a', 'ä': 'a',
-            'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
-            'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
-            'ó': 'o', 'ò': 'o', 'õ': 'o', 'ô': 'o', 'ö': 'o',
-            'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u',
-            'Á': 'A', 'À': 'A', 'Ã': 'A', 'Â': 'A', 'Ä': 'A',
-            'É': 'E', 'È': 'E', 'Ê': 'E', 'Ë': 'E',
-            'Í': 'I', 'Ì': 'I', 'Î': 'I', 'Ï': 'I',
-            'Ó': 'O', 'Ò': 'O', 'Õ': 'O', 'Ô': 'O', 'Ö': 'O',
-            'Ú': 'U', 'Ù': 'U', 'Û': 'U', 'Ü': 'U'
-        }
-        for old_char, new_char in accents.items():
-            text = text.replace(old_char, new_char)
-    
-    # Remover caracteres não-ASCII restantes
-    text = ''.join(char if ord(char) < 128 else '?' for char in text)
-    
-    return text
+logger = logging.getLogger(__name__)
 
 class RelatorioPDF(FPDF):
     def __init__(self, *args, **kwargs):
@@ -70,6 +23,8 @@ class RelatorioPDF(FPDF):
         self.dark_blue = (41, 128, 185)   # Azul escuro para títulos
         self.light_gray = (245, 245, 245) # Cinza claro para backgrounds
         self.first_page = True
+        self.progresso = None  # callback(página) chamado a cada nova página
+        self.fotos = {}  # caminho -> FotoPreparada (ver preparar_fotos)
         
         # Adicionar fonte Unicode para suportar caracteres especiais
         try:
@@ -77,18 +32,23 @@ class RelatorioPDF(FPDF):
             self.add_font('DejaVu', '', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', uni=True)
             self.add_font('DejaVu', 'B', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', uni=True)
             self.unicode_font = True
-            print("Fonte Unicode DejaVu carregada com sucesso!")
+            logger.debug("Fonte Unicode DejaVu carregada")
         except:
             try:
                 # Fallback para Arial se disponível
                 self.add_font('Arial', '', 'arial.ttf', uni=True)
                 self.add_font('Arial', 'B', 'arialbd.ttf', uni=True)
                 self.unicode_font = True
-                print("Fonte Unicode Arial carregada com sucesso!")
+                logger.debug("Fonte Unicode Arial carregada")
             except:
                 # Usar fonte padrão e clean_text mais agressivo
                 self.unicode_font = False
-                print("Usando fonte padrão sem Unicode - texto será limpo agressivamente")
+                logger.debug("Usando fonte padrão sem Unicode - texto será limpo agressivamente")
+    
+    def add_page(self, *args, **kwargs):
+        super().add_page(*args, **kwargs)
+        if self.progresso:
+            self.progresso(self.page_no())
     
     def header(self):
         # Desenha a borda em todas as páginas
@@ -123,7 +83,7 @@ class RelatorioPDF(FPDF):
             if os.path.exists(logo_path):
                 logo_height = 20
                 logo_width = logo_height * 1.5
-                self.image(logo_path, x=(210 - logo_width) / 2, y=40, w=logo_width)
+                self.image(imagem_para_pdf(logo_path, logo_width), x=(210 - logo_width) / 2, y=40, w=logo_width)
             self.set_y(70)
         else:
             self.set_y(45)
@@ -150,13 +110,14 @@ class RelatorioPDF(FPDF):
     def set_pdf_font(self, style='', size=10):
         """Define fonte apropriada (Unicode se disponível)"""
         if self.unicode_font:
-            self.set_font("DejaVu", style, size)
+            # Apenas regular e negrito são registrados (legendas pedem itálico)
+            self.set_font("DejaVu", style.replace('I', ''), size)
         else:
             self.set_font("Arial", style, size)
     
     def clean_pdf_text(self, text):
         """Limpa texto conforme a capacidade da fonte"""
-        return clean_text(text, aggressive=not self.unicode_font)
+        return limpar_texto_relatorio(text, agressivo=not self.unicode_font)
     
     def section_title(self, title):
         """Título de seção com background e formatação profissional"""
@@ -220,41 +181,45 @@ class RelatorioPDF(FPDF):
         self.set_left_margin(10)  # Voltar margem normal
         self.ln(2)
     
-    def add_image_to_pdf(self, image_path, max_width=80, max_height=60):
+    def add_image_to_pdf(self, image_path, max_width=LARGURA_FOTO_MM, max_height=ALTURA_FOTO_MM):
         """Adiciona imagem ao PDF com redimensionamento automático"""
         try:
-            if not os.path.exists(image_path):
+            foto = self.fotos.get(image_path)
+            if foto is not None:
+                # Já decodificada e reduzida por preparar_fotos
+                img_width, img_height = foto.largura, foto.altura
+                origem = io.BytesIO(foto.dados)
+            elif image_path in self.fotos:
+                # preparar_fotos não conseguiu ler o arquivo
                 return False
-                
-            # Verificar se é uma imagem suportada
-            supported_formats = ['.jpg', '.jpeg', '.png']
-            file_ext = os.path.splitext(image_path)[1].lower()
+            else:
+                if not os.path.exists(image_path) or not eh_imagem(image_path):
+                    return False
+                with Image.open(image_path) as img:
+                    img_width, img_height = img.size
+                origem = None
             
-            if file_ext not in supported_formats:
-                return False
+            # Calcular proporção para redimensionamento
+            width_ratio = max_width / img_width
+            height_ratio = max_height / img_height
+            ratio = min(width_ratio, height_ratio)
             
-            # Obter dimensões da imagem
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                
-                # Calcular proporção para redimensionamento
-                width_ratio = max_width / img_width
-                height_ratio = max_height / img_height
-                ratio = min(width_ratio, height_ratio)
-                
-                new_width = img_width * ratio
-                new_height = img_height * ratio
-                
-                # Verificar se há espaço suficiente na página
-                if self.get_y() + new_height > 270:  # 270 é próximo ao fim da página
-                    self.add_page()
-                
-                # Adicionar imagem centralizada
-                x_pos = (210 - new_width) / 2
-                self.image(image_path, x=x_pos, y=self.get_y(), w=new_width, h=new_height)
-                self.ln(new_height + 3)
-                
-                return True
+            new_width = img_width * ratio
+            new_height = img_height * ratio
+            
+            # Verificar se há espaço suficiente na página
+            if self.get_y() + new_height > 270:  # 270 é próximo ao fim da página
+                self.add_page()
+            
+            if origem is None:
+                origem = imagem_para_pdf(image_path, new_width, new_height)
+            
+            # Adicionar imagem centralizada
+            x_pos = (210 - new_width) / 2
+            self.image(origem, x=x_pos, y=self.get_y(), w=new_width, h=new_height)
+            self.ln(new_height + 3)
+            
+            return True
                 
         except Exception as e:
             print(f"Erro ao adicionar imagem {image_path}: {str(e)}")
@@ -278,7 +243,8 @@ class RelatorioPDF(FPDF):
                     new_height = img_height * ratio
                     
                     x_pos = (210 - new_width) / 2
-                    self.image(logo_path, x=x_pos, y=30, w=new_width, h=new_height)
+                    self.image(imagem_para_pdf(logo_path, new_width, new_height),
+                               x=x_pos, y=30, w=new_width, h=new_height)
                     self.ln(new_height + 20)
             else:
                 self.ln(40)  # Espaço onde ficaria o logo
@@ -362,17 +328,6 @@ class RelatorioPDF(FPDF):
         self.cell(0, 6, self.clean_pdf_text(section_title), 0, 1)
         self.set_text_color(0, 0, 0)
         
-        images_in_module = []
-        
-        # Primeiro, contar quantas imagens existem
-        for anexo in anexos:
-            if isinstance(anexo, dict):
-                caminho = anexo.get('caminho', '')
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        images_in_module.append(anexo)
-        
         # Se há muitas imagens e não há espaço suficiente, continuar no mesmo módulo
         # mas em páginas adicionais do mesmo módulo
         for i, anexo in enumerate(anexos, 1):
@@ -381,20 +336,21 @@ class RelatorioPDF(FPDF):
                 caminho = anexo.get('caminho', '')
                 descricao = anexo.get('descricao', '')
                 
+                # Verificação feita uma única vez por anexo
+                eh_foto = bool(caminho) and eh_imagem(caminho) and os.path.exists(caminho)
+                
                 # Verificar se há espaço suficiente para a próxima imagem (aproximadamente 80mm)
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        # Se não há espaço, adicionar nova página DENTRO do mesmo módulo
-                        if self.get_y() > 200:  # Próximo ao fim da página
-                            self.add_page()
-                            # Repetir título do módulo (não criar novo módulo)
-                            if same_module:
-                                self.set_pdf_font('B', 10)
-                                self.set_text_color(*self.dark_blue)
-                                self.cell(0, 6, self.clean_pdf_text(f"{section_title} - Continuação"), 0, 1)
-                                self.set_text_color(0, 0, 0)
-                                self.ln(2)
+                if eh_foto:
+                    # Se não há espaço, adicionar nova página DENTRO do mesmo módulo
+                    if self.get_y() > 200:  # Próximo ao fim da página
+                        self.add_page()
+                        # Repetir título do módulo (não criar novo módulo)
+                        if same_module:
+                            self.set_pdf_font('B', 10)
+                            self.set_text_color(*self.dark_blue)
+                            self.cell(0, 6, self.clean_pdf_text(f"{section_title} - Continuação"), 0, 1)
+                            self.set_text_color(0, 0, 0)
+                            self.ln(2)
                 
                 # Exibir nome do arquivo
                 self.set_pdf_font('B', 9)
@@ -410,22 +366,20 @@ class RelatorioPDF(FPDF):
                     self.set_text_color(0, 0, 0)
                 
                 # Tentar exibir a imagem se for um arquivo de imagem
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        self.ln(2)
-                        if self.add_image_to_pdf(caminho):
-                            # Adicionar legenda
-                            self.set_pdf_font('I', 8)
-                            self.set_text_color(100, 100, 100)
-                            self.cell(0, 4, self.clean_pdf_text(f"Figura {i}: {nome}"), 0, 1, 'C')
-                            self.set_text_color(0, 0, 0)
+                if eh_foto:
+                    self.ln(2)
+                    if self.add_image_to_pdf(caminho):
+                        # Adicionar legenda
+                        self.set_pdf_font('I', 8)
+                        self.set_text_color(100, 100, 100)
+                        self.cell(0, 4, self.clean_pdf_text(f"Figura {i}: {nome}"), 0, 1, 'C')
+                        self.set_text_color(0, 0, 0)
                 
                 self.ln(3)
 
-def gerar_pdf_relatorio(relatorio_id, db_name):
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
+@perf.medido("pdf.relatorio")
+def gerar_pdf_relatorio(relatorio_id, db_name, progresso=None):
+    c = get_connection(db_name).cursor()
     
     try:
         # Primeiro obter os nomes das colunas existentes na tabela
@@ -565,6 +519,14 @@ def gerar_pdf_relatorio(relatorio_id, db_name):
         
         # Criar PDF
         pdf = RelatorioPDF()
+        pdf.progresso = progresso
+        
+        # Decodificar e reduzir todas as fotos anexadas de uma vez (em paralelo)
+        with perf.span("pdf.relatorio.fotos"):
+            pdf.fotos = preparar_fotos(
+                anexo.get('caminho') for anexos in anexos_abas.values() if isinstance(anexos, list)
+                for anexo in anexos if isinstance(anexo, dict)
+            )
         
         # Configurar dados para cabeçalho
         pdf.numero_relatorio = get_value("numero_relatorio")
@@ -762,11 +724,14 @@ def gerar_pdf_relatorio(relatorio_id, db_name):
         os.makedirs(output_dir, exist_ok=True)
         filename = f"relatorio_{relatorio_id}.pdf"
         filepath = os.path.join(output_dir, filename)
-        pdf.output(filepath)
+        with perf.span("pdf.relatorio.salvar"):
+            pdf.output(filepath)
+        
+        # Atualizar caminho do PDF no banco de dados
+        with transaction(db_name) as conn:
+            conn.execute("UPDATE relatorios_tecnicos SET caminho_arquivo_pdf=? WHERE id=?", (filepath, relatorio_id))
         
         return True, filepath
         
     except Exception as e:
-        return False, str(e)
-    finally:
-        conn.close()
\ No newline at end of file
+        return False, str(e)
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Indicadores agregados de cotações e relatórios técnicos (dashboard e painéis
+de indicadores das abas).
+
+Cada tabela é lida uma única vez, agrupada por status (cotações) ou por mês
+(relatórios); totais, médias e contagens por situação saem desse mesmo
+resultado em vez de uma consulta COUNT/SUM/AVG para cada número.
+
+Os resultados ficam em cache por escopo (None = todos, ou o id do
+responsável) até um evento que altere a tabela (EVENTOS_INVALIDACAO, emitidos
+via MainWindow.emit_event) ou até CACHE_SEGUNDOS, que cobre alterações feitas
+em outra estação.
+"""
+import threading
+import time
+
+from db import get_connection
+
+CACHE_SEGUNDOS = 60
+
+TABELAS = ('cotacoes', 'relatorios_tecnicos')
+
+# Evento -> tabelas cujos indicadores deixam de valer
+EVENTOS_INVALIDACAO = {
+    'cotacao_created': ('cotacoes',),
+    'cotacao_updated': ('cotacoes',),
+    'cotacao_deleted': ('cotacoes',),
+    'relatorio_created': ('relatorios_tecnicos',),
+    'relatorio_deleted': ('relatorios_tecnicos',),
+    'refresh_dashboard': ('cotacoes', 'relatorios_tecnicos'),
+}
+
+# (tabela, escopo) -> (momento, indicadores)
+_cache = {}
+# tabela -> número de invalidações (um cálculo iniciado antes de uma invalidação não é guardado)
+_geracoes = {}
+_lock = threading.Lock()
+
+
+def _em_cache(tabela, escopo, calcular):
+    chave = (tabela, escopo)
+    agora = time.monotonic()
+    with _lock:
+        entrada = _cache.get(chave)
+        geracao = _geracoes.get(tabela, 0)
+    if entrada and agora - entrada[0] < CACHE_SEGUNDOS:
+        return entrada[1]
+    valor = calcular()
+    with _lock:
+        if _geracoes.get(tabela, 0) == geracao:
+            _cache[chave] = (agora, valor)
+    return valor
+
+
+def indicadores_cotacoes(responsavel_id=None, conn=None):
+    """
+    Indicadores das cotações (de um responsável ou de todos):
+    total, em_aberto, aprovadas, rejeitadas, valor_total, valor_medio (das
+    cotações com valor), faturamento (aprovadas) e por_status [(status, total)].
+    """
+    def calcular():
+        sql = """
+            SELECT status, COUNT(*), COALESCE(SUM(valor_total), 0),
+                   SUM(valor_total > 0), COALESCE(SUM(CASE WHEN valor_total > 0 THEN valor_total END), 0)
+            FROM cotacoes
+        """
+        params = ()
+        if responsavel_id is not None:
+            sql += " WHERE responsavel_id = ?"
+            params = (responsavel_id,)
+        sql += " GROUP BY status"
+        linhas = (conn or get_connection()).execute(sql, params).fetchall()
+
+        por_status = {status: (total, valor) for status, total, valor, _n, _v in linhas}
+        com_valor = sum(n or 0 for _s, _t, _v, n, _sv in linhas)
+        soma_com_valor = sum(v for _s, _t, _v, _n, v in linhas)
+        return {
+            'total': sum(total for _s, total, _v, _n, _sv in linhas),
+            'em_aberto': por_status.get('Em Aberto', (0, 0))[0],
+            'aprovadas': por_status.get('Aprovada', (0, 0))[0],
+            'rejeitadas': por_status.get('Rejeitada', (0, 0))[0],
+            'valor_total': sum(valor for _s, _t, valor, _n, _sv in linhas),
+            'valor_medio': soma_com_valor / com_valor if com_valor else 0,
+            'faturamento': por_status.get('Aprovada', (0, 0))[1],
+            'por_status': sorted(((s, t) for s, (t, _v) in por_status.items()), key=lambda item: -item[1]),
+        }
+
+    return _em_cache('cotacoes', responsavel_id, calcular)
+
+
+def indicadores_relatorios(responsavel_id=None, conn=None, meses=6):
+    """
+    Indicadores dos relatórios técnicos: total, este_mes (criados no mês atual)
+    e por_mes [('mm/aaaa', total)] dos últimos `meses` meses com relatórios
+    (data_criacao é gravada como dd/mm/aaaa pelo formulário ou em ISO).
+    """
+    def calcular():
+        sql = """
+            SELECT CASE WHEN data_criacao LIKE '__/__/____'
+                        THEN substr(data_criacao, 7, 4) || '-' || substr(data_criacao, 4, 2)
+                        ELSE strftime('%Y-%m', data_criacao) END AS mes,
+                   COUNT(*),
+                   SUM(created_at >= date('now', 'start of month'))
+            FROM relatorios_tecnicos
+        """
+        params = ()
+        if responsavel_id is not None:
+            sql += " WHERE responsavel_id = ?"
+            params = (responsavel_id,)
+        sql += " GROUP BY mes"
+        linhas = (conn or get_connection()).execute(sql, params).fetchall()
+
+        por_mes = sorted(((mes, total) for mes, total, _m in linhas if mes), reverse=True)[:meses]
+        return {
+            'total': sum(total for _mes, total, _m in linhas),
+            'este_mes': sum(m or 0 for _mes, _t, m in linhas),
+            'por_mes': [(f"{mes[5:7]}/{mes[:4]}", total) for mes, total in por_mes],
+        }
+
+    return _em_cache('relatorios_tecnicos', responsavel_id, calcular)
+
+
+def invalidar(*tabelas):
+    """Descartar os indicadores das tabelas (todas, se nenhuma for informada)"""
+    with _lock:
+        for tabela in tabelas or TABELAS:
+            _geracoes[tabela] = _geracoes.get(tabela, 0) + 1
+        for chave in list(_cache):
+            if not tabelas or chave[0] in tabelas:
+                del _cache[chave]
+
+
+def ao_evento(event_type, data=None):
+    """Listener de eventos da janela principal (registrado antes dos módulos)"""
+    tabelas = EVENTOS_INVALIDACAO.get(event_type)
+    if tabelas:
+        invalidar(*tabelas)
@@ -0,0 +1,141 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from db import get_connection
+
+# Entidade -> tabela FTS5 (criadas na migração 7 de db/migrations.py)
+TABELAS_BUSCA = {
+    "clientes": "clientes_fts",
+    "produtos": "produtos_fts",
+    "cotacoes": "cotacoes_fts",
+}
+
+LIMITE_PADRAO = 500
+
+# Termos só com números e pontuação (CNPJ, NCM, série) são buscados como um único número
+_NUMERICO = re.compile(r'^[\d\s./-]+$')
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def expressao_fts(termo):
+    """Converter o texto digitado em expressão MATCH (prefixo de cada palavra, todas obrigatórias)"""
+    termo = (termo or "").strip()
+    if not termo:
+        return None
+
+    if _NUMERICO.match(termo):
+        palavras = [re.sub(r'\D', '', termo)]
+    else:
+        palavras = _PALAVRA.findall(termo)
+
+    palavras = [p for p in palavras if p]
+    if not palavras:
+        return None
+    return " ".join(f'"{p}"*' for p in palavras)
+
+
+def buscar(entidade, termo, limite=LIMITE_PADRAO, db_name=None):
+    """
+    Buscar ids da entidade ordenados por relevância (bm25).
+    A comparação ignora acentos e maiúsculas.
+    """
+    tabela = TABELAS_BUSCA[entidade]
+    expressao = expressao_fts(termo)
+    if expressao is None:
+        return []
+
+    cursor = get_connection(db_name).execute(
+        f"SELECT rowid FROM {tabela} WHERE {tabela} MATCH ? ORDER BY rank LIMIT ?",
+        (expressao, limite)
+    )
+    return [row[0] for row in cursor]
+
+
+def ordenar_por_relevancia(linhas, ids):
+    """Reordenar linhas (id na primeira coluna) na ordem devolvida por buscar()"""
+    posicao = {id_: i for i, id_ in enumerate(ids)}
+    return sorted(linhas, key=lambda linha: posicao.get(linha[0], len(posicao)))
+
+
+def marcadores(quantidade):
+    """Placeholders para cláusulas IN (?, ?, ...)"""
+    return ", ".join("?" * quantidade)
+
+
+class _TabelaDobra(dict):
+    """Tabela de str.translate: caractere -> caractere sem acento, preenchida no primeiro uso"""
+
+    def __missing__(self, codigo):
+        decomposto = unicodedata.normalize('NFKD', chr(codigo))
+        base = "".join(c for c in decomposto if not unicodedata.combining(c))
+        self[codigo] = base
+        return base
+
+
+_DOBRA = _TabelaDobra()
+
+
+def dobrar(texto):
+    """Texto sem acentos e em minúsculas, para comparação"""
+    texto = texto or ""
+    if not texto.isascii():
+        texto = texto.translate(_DOBRA)
+    return texto.casefold()
+
+
+class IndicePrefixo:
+    """
+    Índice em memória de rótulos (nomes de clientes, produtos...) para busca
+    enquanto o usuário digita.
+
+    As palavras distintas dos rótulos (sem acentos) ficam em uma lista
+    ordenada, cada uma com as posições dos rótulos em que aparece; as
+    palavras que começam com um termo ocupam uma faixa contígua dessa lista,
+    encontrada com bisect. Todas as palavras digitadas precisam ser prefixo de
+    alguma palavra do rótulo, em qualquer ordem ("silva jo" encontra "João da
+    Silva"). Rótulos que começam com o texto digitado vêm primeiro; os demais
+    seguem em ordem alfabética.
+    """
+
+    def __init__(self, rotulos):
+        dobrados = sorted((dobrar(r), r) for r in dict.fromkeys(rotulos))
+        self.rotulos = [r for _, r in dobrados]
+        self._dobrados = [d for d, _ in dobrados]
+        posicoes = {}
+        for posicao, dobrado in enumerate(self._dobrados):
+            for palavra in _PALAVRA.findall(dobrado):
+                posicoes.setdefault(palavra, []).append(posicao)
+        self._palavras = sorted(posicoes)
+        self._posicoes = [posicoes[palavra] for palavra in self._palavras]
+
+    def __len__(self):
+        return len(self.rotulos)
+
+    def _com_prefixo(self, termo):
+        inicio = bisect_left(self._palavras, termo)
+        fim = bisect_left(self._palavras, termo + "\uffff", inicio)
+        return set().union(*self._posicoes[inicio:fim])
+
+    def buscar(self, texto, limite=50):
+        """Até `limite` rótulos que combinam com o texto (sem texto: os primeiros em ordem alfabética)"""
+        dobrado = dobrar(texto).strip()
+        termos = sorted(set(_PALAVRA.findall(dobrado)), key=len, reverse=True)
+        if not termos:
+            return self.rotulos[:limite]
+
+        # O termo mais longo costuma ser o mais seletivo
+        candidatos = self._com_prefixo(termos[0])
+        for termo in termos[1:]:
+            if not candidatos:
+                break
+            candidatos &= self._com_prefixo(termo)
+
+        primeiros, demais = [], []
+        for posicao in sorted(candidatos):
+            if self._dobrados[posicao].startswith(dobrado):
+                primeiros.append(posicao)
+                if len(primeiros) == limite:
+                    break
+            elif len(demais) < limite:
+                demais.append(posicao)
+        return [self.rotulos[p] for p in (primeiros + demais)[:limite]]
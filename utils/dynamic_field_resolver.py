@@ -1,7 +1,7 @@
-import sqlite3
 from typing import Dict, Any, Optional, List
 import json
 from datetime import datetime
+from db import get_connection
 
 class DynamicFieldResolver:
     """
@@ -100,8 +100,7 @@ class DynamicFieldResolver:
         Carregar dados completos de uma cotação específica
         """
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+            cursor = get_connection(self.db_name).cursor()
             
             # Buscar dados da cotação com cliente e responsável
             cursor.execute("""
@@ -189,7 +188,6 @@ class DynamicFieldResolver:
                 }
             }
             
-            conn.close()
             return True
             
         except Exception as e:
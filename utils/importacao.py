@@ -0,0 +1,56 @@
+"""
+Importação tardia de dependências pesadas.
+
+    multiprocessing = tardio("multiprocessing")
+    ...
+    multiprocessing.get_context("spawn")   # importado só aqui, no primeiro uso
+
+O tempo de importação conta para a abertura do programa (no executável
+gerado pelo PyInstaller ainda mais). Módulos usados apenas em algumas ações
+(geração de PDF, perfil, pool de processos) devem ser importados com tardio()
+ou dentro da função que os usa. O orçamento de importação da abertura é
+verificado por `python -m bench importacao`.
+"""
+import importlib
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+class ModuloTardio:
+    """Representante de um módulo que só é importado no primeiro acesso a um atributo"""
+
+    __slots__ = ("_nome", "_modulo")
+
+    def __init__(self, nome):
+        object.__setattr__(self, "_nome", nome)
+        object.__setattr__(self, "_modulo", None)
+
+    def _carregar(self):
+        modulo = self._modulo
+        if modulo is None:
+            with _lock:
+                modulo = self._modulo
+                if modulo is None:
+                    modulo = importlib.import_module(self._nome)
+                    object.__setattr__(self, "_modulo", modulo)
+        return modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __setattr__(self, atributo, valor):
+        setattr(self._carregar(), atributo, valor)
+
+    def __repr__(self):
+        estado = "carregado" if self._modulo is not None else "não carregado"
+        return f"<módulo tardio {self._nome!r} ({estado})>"
+
+
+def tardio(nome):
+    """Módulo nome, importado no primeiro uso (ou o próprio módulo, se já estiver importado)"""
+    modulo = sys.modules.get(nome)
+    if modulo is not None:
+        return modulo
+    return ModuloTardio(nome)
@@ -0,0 +1,99 @@
+"""
+Composição dos kits (kit_items), incluindo kits dentro de kits.
+
+Todas as composições de uma cotação são lidas em uma única consulta
+(CTE recursiva). Um kit que aparece dentro da própria composição é marcado
+como ciclo e não é expandido de novo.
+
+As árvores ficam em cache por kit_id. Triggers (migração 12) incrementam
+versoes_tabelas['kit_items'] a cada alteração em kit_items ou no nome/tipo
+dos produtos; quando a versão lida difere da do cache, ele é descartado.
+Assim a invalidação vale também para os processos geradores de PDF.
+"""
+from db import get_connection
+from utils.busca import marcadores
+
+# Proteção adicional contra composições muito profundas
+MAX_NIVEIS = 10
+
+# kit_id -> lista de ItemKit na ordem de exibição (pré-ordem)
+_cache = {}
+_versao_cache = [None]
+
+
+class ItemKit:
+    """Linha da composição: nível 1 é filho direto do kit"""
+
+    __slots__ = ("produto_id", "nome", "tipo", "quantidade", "nivel", "ciclo")
+
+    def __init__(self, produto_id, nome, tipo, quantidade, nivel, ciclo):
+        self.produto_id = produto_id
+        self.nome = nome
+        self.tipo = tipo
+        self.quantidade = quantidade
+        self.nivel = nivel
+        self.ciclo = ciclo
+
+    def __repr__(self):
+        return f"ItemKit({self.nivel}, {self.quantidade} x {self.nome}{' [ciclo]' if self.ciclo else ''})"
+
+
+_SQL_COMPOSICAO = """
+    WITH RECURSIVE arvore(raiz, produto_id, quantidade, nivel, caminho, ordem, ciclo) AS (
+        SELECT ki.kit_id, ki.produto_id, ki.quantidade, 1,
+               ',' || ki.kit_id || ',', printf('%010d', ki.id),
+               ki.produto_id = ki.kit_id
+        FROM kit_items ki
+        WHERE ki.kit_id IN ({ids})
+        UNION ALL
+        SELECT a.raiz, ki.produto_id, ki.quantidade, a.nivel + 1,
+               a.caminho || ki.kit_id || ',', a.ordem || printf('%010d', ki.id),
+               instr(a.caminho || ki.kit_id || ',', ',' || ki.produto_id || ',') > 0
+        FROM arvore a
+        JOIN kit_items ki ON ki.kit_id = a.produto_id
+        WHERE NOT a.ciclo AND a.nivel < ?
+    )
+    SELECT a.raiz, a.produto_id, p.nome, p.tipo, a.quantidade, a.nivel, a.ciclo
+    FROM arvore a
+    JOIN produtos p ON p.id = a.produto_id
+    ORDER BY a.raiz, a.ordem
+"""
+
+
+def versao_kits(conn):
+    row = conn.execute("SELECT valor FROM versoes_tabelas WHERE tabela = 'kit_items'").fetchone()
+    return row[0] if row else 0
+
+
+def composicoes_kits(kit_ids, db_name=None):
+    """{kit_id: [ItemKit, ...]} para os kits informados (lista vazia se o kit não tiver itens)"""
+    conn = get_connection(db_name)
+    versao = versao_kits(conn)
+    if versao != _versao_cache[0]:
+        _cache.clear()
+        _versao_cache[0] = versao
+
+    kit_ids = list(dict.fromkeys(k for k in kit_ids if k))
+    faltando = [k for k in kit_ids if k not in _cache]
+    if faltando:
+        resultado = {k: [] for k in faltando}
+        cursor = conn.execute(_SQL_COMPOSICAO.format(ids=marcadores(len(faltando))), (*faltando, MAX_NIVEIS))
+        for raiz, produto_id, nome, tipo, quantidade, nivel, ciclo in cursor:
+            resultado[raiz].append(ItemKit(produto_id, nome, tipo, quantidade, nivel, bool(ciclo)))
+        _cache.update(resultado)
+    return {k: _cache[k] for k in kit_ids}
+
+
+def formatar_composicao(itens):
+    """Linhas 'quantidade x nome', recuadas por nível"""
+    linhas = []
+    for item in itens:
+        recuo = "  " * (item.nivel - 1)
+        sufixo = " (ciclo na composição)" if item.ciclo else ""
+        linhas.append(f"{recuo}{item.quantidade} x {item.nome}{sufixo}")
+    return linhas
+
+
+def limpar_cache():
+    _cache.clear()
+    _versao_cache[0] = None
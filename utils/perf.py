@@ -0,0 +1,261 @@
+"""
+Instrumentação dos caminhos críticos: tempos, consultas ao banco e contadores.
+
+    from utils import perf
+
+    with perf.span("pdf.cotacao", id=cotacao_id):
+        ...
+
+    @perf.medido("modulo.setup")
+    def setup_ui(self): ...
+
+Cada span concluído vira um registro com nome, duração (ms), número de
+consultas SQL executadas pela thread durante o span e os atributos
+informados. Os registros mais recentes ficam em memória (ultimos(), resumo())
+e, se CRM_PERF_JSONL apontar para um arquivo, são também gravados nele, um
+JSON por linha (cada processo gerador de PDF acrescenta ao mesmo arquivo).
+
+As consultas são contadas pelo trace callback instalado em toda conexão
+aberta por db.get_connection (ver contar_consulta).
+
+Log: os módulos usam logging.getLogger(__name__); configurar_log() define o
+nível a partir de CRM_LOG (DEBUG, INFO, WARNING...; padrão WARNING).
+
+Resumo de um arquivo exportado:
+
+    python -m utils.perf data/perf/perf.jsonl
+"""
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from utils.importacao import tardio
+
+# Usados só na exportação e no resumo (fora do caminho de abertura do programa)
+json = tardio("json")
+statistics = tardio("statistics")
+
+# Registros mantidos em memória
+TAMANHO_BUFFER = 2000
+
+FORMATO_LOG = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Pacotes do sistema que seguem CRM_LOG (bibliotecas como fpdf/fontTools ficam em WARNING)
+PACOTES_LOG = ("db", "interface", "pdf_generators", "utils", "bench", "__main__")
+
+_registros = deque(maxlen=TAMANHO_BUFFER)
+_contadores = Counter()
+_lock = threading.Lock()
+_local = threading.local()
+
+# Exportação contínua: arquivo aberto por processo (após fork/spawn é reaberto)
+_exportacao = {"pid": None, "arquivo": None}
+
+
+def configurar_log(nivel=None):
+    """Configurar o log da aplicação; nivel (ou CRM_LOG) aceita nome ou número"""
+    nivel = nivel or os.environ.get("CRM_LOG", "WARNING")
+    if isinstance(nivel, str):
+        nivel = logging.getLevelName(nivel.upper())
+        if not isinstance(nivel, int):
+            nivel = logging.WARNING
+    logging.basicConfig(level=logging.WARNING, format=FORMATO_LOG)
+    for pacote in PACOTES_LOG:
+        logging.getLogger(pacote).setLevel(nivel)
+
+
+def contar_consulta(_sql):
+    """Trace callback das conexões: uma chamada por instrução executada"""
+    # Instruções executadas por triggers chegam como comentário ("-- ...") e não são contadas
+    if _sql.startswith("--"):
+        return
+    _local.consultas = getattr(_local, "consultas", 0) + 1
+
+
+def consultas():
+    """Total de consultas executadas pela thread atual"""
+    return getattr(_local, "consultas", 0)
+
+
+def incrementar(nome, valor=1):
+    """Somar valor ao contador nome (compartilhado por todas as threads do processo)"""
+    with _lock:
+        _contadores[nome] += valor
+
+
+def contadores():
+    """Cópia dos contadores do processo"""
+    with _lock:
+        return dict(_contadores)
+
+
+class span:
+    """
+    Medir um trecho: context manager (with perf.span("nome", chave=valor)).
+    Spans podem ser aninhados; o registro indica o span pai.
+    """
+
+    __slots__ = ("nome", "atributos", "_inicio", "_consultas", "_pai")
+
+    def __init__(self, nome, **atributos):
+        self.nome = nome
+        self.atributos = atributos
+
+    def __enter__(self):
+        pilha = getattr(_local, "pilha", None)
+        if pilha is None:
+            pilha = _local.pilha = []
+        self._pai = pilha[-1] if pilha else None
+        pilha.append(self.nome)
+        self._consultas = consultas()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, _tb):
+        duracao = time.perf_counter() - self._inicio
+        _local.pilha.pop()
+        registro = {
+            "nome": self.nome,
+            "ms": round(duracao * 1000, 3),
+            "consultas": consultas() - self._consultas,
+            "em": round(time.time() - duracao, 3),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+        if self._pai:
+            registro["pai"] = self._pai
+        if tipo_erro is not None:
+            registro["erro"] = tipo_erro.__name__
+        if self.atributos:
+            registro["atributos"] = self.atributos
+        _registrar(registro)
+        return False
+
+
+def medido(nome=None):
+    """Decorator: cada chamada da função vira um span (nome padrão: módulo.função)"""
+    def decorar(funcao):
+        nome_span = nome or f"{funcao.__module__}.{funcao.__qualname__}"
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with span(nome_span):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+def _registrar(registro):
+    with _lock:
+        _registros.append(registro)
+    caminho = os.environ.get("CRM_PERF_JSONL")
+    if caminho:
+        _exportar_continuo(caminho, registro)
+
+
+def _exportar_continuo(caminho, registro):
+    with _lock:
+        if _exportacao["pid"] != os.getpid():
+            _exportacao["pid"] = os.getpid()
+            _exportacao["arquivo"] = None
+        arquivo = _exportacao["arquivo"]
+        try:
+            if arquivo is None:
+                diretorio = os.path.dirname(caminho)
+                if diretorio:
+                    os.makedirs(diretorio, exist_ok=True)
+                arquivo = _exportacao["arquivo"] = open(caminho, "a", encoding="utf-8", buffering=1)
+            arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logging.getLogger(__name__).warning("Exportação de métricas desativada: %s", e)
+            os.environ.pop("CRM_PERF_JSONL", None)
+
+
+def ultimos(n=None, nome=None):
+    """Registros mais recentes (opcionalmente só os de um nome), do mais antigo ao mais novo"""
+    with _lock:
+        registros = list(_registros)
+    if nome is not None:
+        registros = [r for r in registros if r["nome"] == nome]
+    return registros[-n:] if n else registros
+
+
+def limpar():
+    """Descartar registros e contadores em memória"""
+    with _lock:
+        _registros.clear()
+        _contadores.clear()
+
+
+def exportar_jsonl(caminho, registros=None):
+    """Acrescentar os registros (padrão: os em memória) ao arquivo, um JSON por linha"""
+    if registros is None:
+        registros = ultimos()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    with open(caminho, "a", encoding="utf-8") as arquivo:
+        for registro in registros:
+            arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+    return len(registros)
+
+
+def ler_jsonl(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def resumo(registros=None):
+    """{nome: {chamadas, total_ms, mediana_ms, p95_ms, max_ms, consultas_media, erros}}"""
+    if registros is None:
+        registros = ultimos()
+    por_nome = {}
+    for registro in registros:
+        por_nome.setdefault(registro["nome"], []).append(registro)
+
+    resultado = {}
+    for nome, itens in por_nome.items():
+        tempos = sorted(r["ms"] for r in itens)
+        resultado[nome] = {
+            "chamadas": len(itens),
+            "total_ms": round(sum(tempos), 3),
+            "mediana_ms": round(statistics.median(tempos), 3),
+            "p95_ms": tempos[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))],
+            "max_ms": tempos[-1],
+            "consultas_media": round(sum(r.get("consultas", 0) for r in itens) / len(itens), 1),
+            "erros": sum(1 for r in itens if "erro" in r),
+        }
+    return resultado
+
+
+def formatar_resumo(resumo_por_nome):
+    """Linhas de texto do resumo, ordenadas pelo tempo total"""
+    linhas = [f"{'span':<40} {'chamadas':>8} {'total ms':>10} {'mediana':>9} {'p95':>9} {'máx':>9} {'consultas':>9}"]
+    for nome, r in sorted(resumo_por_nome.items(), key=lambda item: -item[1]["total_ms"]):
+        linhas.append(
+            f"{nome:<40} {r['chamadas']:>8} {r['total_ms']:>10.1f} {r['mediana_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['max_ms']:>9.2f} {r['consultas_media']:>9.1f}"
+            + (f"  ({r['erros']} com erro)" if r["erros"] else "")
+        )
+    return linhas
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("uso: python -m utils.perf ARQUIVO.jsonl [...]")
+        return 2
+    registros = []
+    for caminho in argv:
+        registros.extend(ler_jsonl(caminho))
+    for linha in formatar_resumo(resumo(registros)):
+        print(linha)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Modo de perfil da aplicação (diagnóstico de lentidão em campo).
+
+Ativado por `python main.py --profile` ou CRM_PROFILE=1 (ou CRM_PROFILE=<diretório>).
+Cada fase instrumentada grava, em data/profiles/<AAAAMMDD-HHMMSS>/:
+
+    NN_<fase>.prof     estatísticas do cProfile (python -m pstats, snakeviz...)
+    NN_<fase>.folded   pilhas amostradas no formato "a;b;c contagem"
+                       (flamegraph.pl, speedscope, inferno)
+
+Fases: login, create_modules, primeira abertura de cada aba e cada PDF
+gerado pela fila (no processo gerador). Com o programa aberto, F12 inicia e
+para uma captura manual em torno de uma ação (ex.: Gerar PDF, atualizar aba),
+mesmo sem o modo de perfil ligado.
+
+Fases não se aninham: uma fase aberta dentro de outra não gera arquivos
+(a externa já inclui o tempo da interna).
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from utils.importacao import tardio
+
+cProfile = tardio("cProfile")
+
+DIRETORIO_PADRAO = os.path.join("data", "profiles")
+
+# Intervalo entre amostras das pilhas (s)
+INTERVALO_AMOSTRA = 0.005
+
+_estado = {"diretorio": None, "sessao": None, "sequencia": 0, "ativa": None}
+_lock = threading.Lock()
+
+
+def _nova_sessao():
+    return os.path.join(DIRETORIO_PADRAO, datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+
+def ativar(diretorio=None):
+    """Ligar o modo de perfil; os processos geradores de PDF herdam a configuração"""
+    if not diretorio or diretorio == "1":
+        diretorio = _nova_sessao()
+    os.makedirs(diretorio, exist_ok=True)
+    _estado["diretorio"] = os.path.abspath(diretorio)
+    # Processos iniciados depois (spawn) gravam no mesmo diretório
+    os.environ["CRM_PROFILE"] = _estado["diretorio"]
+    return _estado["diretorio"]
+
+
+def configurar_do_ambiente():
+    """Ativar se CRM_PROFILE estiver definido (chamado na inicialização dos processos)"""
+    valor = os.environ.get("CRM_PROFILE")
+    if valor and valor != "0" and _estado["diretorio"] is None:
+        ativar(valor)
+    return ativo()
+
+
+def ativo():
+    return _estado["diretorio"] is not None
+
+
+def diretorio():
+    """Diretório dos arquivos: o do modo de perfil ou, só com capturas manuais, um da sessão"""
+    if _estado["diretorio"] is not None:
+        return _estado["diretorio"]
+    if _estado["sessao"] is None:
+        _estado["sessao"] = os.path.abspath(_nova_sessao())
+    os.makedirs(_estado["sessao"], exist_ok=True)
+    return _estado["sessao"]
+
+
+class Amostrador(threading.Thread):
+    """Amostrar a pilha de uma thread a cada INTERVALO_AMOSTRA e contar as pilhas iguais"""
+
+    def __init__(self, thread_id, intervalo=INTERVALO_AMOSTRA):
+        super().__init__(name="crm-perfil", daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                frame = frame.f_back
+            self.pilhas[";".join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class Captura:
+    """Captura de perfil da thread atual: iniciar() ... parar() grava .prof e .folded"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.arquivos = None
+        self._perfil = None
+        self._amostrador = None
+        self._inicio = None
+
+    def iniciar(self):
+        with _lock:
+            if _estado["ativa"] is not None:
+                return False
+            _estado["ativa"] = self
+        self._perfil = cProfile.Profile()
+        self._amostrador = Amostrador(threading.get_ident())
+        self._amostrador.start()
+        self._inicio = time.perf_counter()
+        self._perfil.enable()
+        return True
+
+    def parar(self):
+        """Encerrar e gravar os arquivos; devolve (caminho .prof, caminho .folded, segundos)"""
+        if self._perfil is None:
+            return None
+        self._perfil.disable()
+        segundos = time.perf_counter() - self._inicio
+        self._amostrador.parar()
+        try:
+            base = _proximo_arquivo(self.nome)
+            self._perfil.dump_stats(base + ".prof")
+            with open(base + ".folded", "w", encoding="utf-8") as arquivo:
+                for pilha, contagem in self._amostrador.pilhas.most_common():
+                    arquivo.write(f"{pilha} {contagem}\n")
+            self.arquivos = (base + ".prof", base + ".folded", segundos)
+        finally:
+            self._perfil = None
+            with _lock:
+                _estado["ativa"] = None
+        return self.arquivos
+
+
+def _proximo_arquivo(nome):
+    with _lock:
+        _estado["sequencia"] += 1
+        sequencia = _estado["sequencia"]
+    nome = re.sub(r"[^\w.-]+", "_", nome).strip("_") or "fase"
+    # pid: processos geradores gravam no mesmo diretório
+    return os.path.join(diretorio(), f"{sequencia:02d}_{nome}_{os.getpid()}")
+
+
+def capturando():
+    return _estado["ativa"] is not None
+
+
+class fase:
+    """
+    Perfilar um trecho quando o modo de perfil está ativo (with perfil.fase("login")).
+    Desativado, ou dentro de outra fase, não faz nada.
+    """
+
+    __slots__ = ("nome", "_captura")
+
+    def __init__(self, nome):
+        self.nome = nome
+        self._captura = None
+
+    def __enter__(self):
+        if _estado["diretorio"] is not None:
+            captura = Captura(self.nome)
+            if captura.iniciar():
+                self._captura = captura
+        return self
+
+    def __exit__(self, *_erro):
+        if self._captura is not None:
+            try:
+                self._captura.parar()
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar o perfil de {self.nome}: {e}")
+        return False
@@ -0,0 +1,223 @@
+"""
+Cache em memória dos dados de referência: clientes, produtos e usuários
+(técnicos), usados nos combos e nas buscas por nome dos formulários.
+
+    from utils import referencias
+
+    referencias.produtos("Serviço")              # ativos, por nome
+    referencias.produto_por_nome("Kit", nome)
+    referencias.cliente(cliente_id).prazo_pagamento
+
+Cada tabela é lida uma vez e indexada por id, por nome e (produtos) por
+(tipo, nome). Depois disso só as linhas alteradas são relidas: triggers
+(migração 13) registram em alteracoes_referencia cada linha inserida,
+alterada ou excluída, e o cache lê as entradas após a última que já aplicou.
+
+O registro só é consultado quando há indício de alteração:
+- a própria conexão alterou linhas (Connection.total_changes);
+- outra conexão gravou no banco (PRAGMA data_version, verificado no máximo
+  a cada INTERVALO_VERIFICACAO segundos);
+- a janela principal emitiu um evento de cliente/produto (ao_evento).
+"""
+import threading
+import time
+from collections import namedtuple
+
+from db import get_connection
+from utils import perf
+from utils.busca import marcadores
+
+# Intervalo mínimo entre verificações de PRAGMA data_version (s)
+INTERVALO_VERIFICACAO = 0.5
+
+Cliente = namedtuple('Cliente', ['id', 'nome', 'prazo_pagamento'])
+Produto = namedtuple('Produto', ['id', 'nome', 'tipo', 'valor_unitario', 'descricao', 'ativo'])
+Usuario = namedtuple('Usuario', ['id', 'username', 'nome_completo', 'role'])
+
+# tabela -> (consulta das colunas, classe do registro)
+_TABELAS = {
+    'clientes': ("SELECT id, nome, prazo_pagamento FROM clientes", Cliente),
+    'produtos': ("SELECT id, nome, tipo, valor_unitario, descricao, ativo FROM produtos", Produto),
+    'usuarios': ("SELECT id, username, nome_completo, role FROM usuarios", Usuario),
+}
+
+# Eventos da janela principal que antecipam a verificação
+EVENTOS = ('cliente_created', 'cliente_deleted', 'produto_created')
+
+_lock = threading.RLock()
+# tabela -> {id: registro}
+_registros = {}
+# Índices derivados, refeitos sob demanda após cada alteração da tabela
+_indices = {}
+_estado = {"carregado": False, "seq": 0, "forcar": False}
+# id(conexão) -> (data_version, total_changes, momento da última verificação)
+_conexoes = {}
+
+
+def _carregar_tudo(conn):
+    """Ler as tabelas inteiras e a posição atual do registro de alterações (mesma leitura)"""
+    propria = not conn.in_transaction
+    if propria:
+        conn.execute("BEGIN")
+    try:
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alteracoes_referencia").fetchone()[0]
+        registros = {}
+        for tabela, (sql, classe) in _TABELAS.items():
+            registros[tabela] = {row[0]: classe(*row) for row in conn.execute(sql)}
+    finally:
+        if propria:
+            conn.execute("COMMIT")
+    _registros.clear()
+    _registros.update(registros)
+    _indices.clear()
+    _estado["seq"] = seq
+    perf.incrementar("referencias.cargas_completas")
+
+
+def _aplicar_alteracoes(conn):
+    """Reler só as linhas registradas após a última alteração aplicada"""
+    alteracoes = conn.execute(
+        "SELECT seq, tabela, registro_id FROM alteracoes_referencia WHERE seq > ? ORDER BY seq",
+        (_estado["seq"],)
+    ).fetchall()
+    if not alteracoes:
+        return
+    if alteracoes[0][0] > _estado["seq"] + 1:
+        # Parte do registro já foi descartada (ver LIMITE_ALTERACOES_REFERENCIA)
+        _carregar_tudo(conn)
+        return
+
+    por_tabela = {}
+    for _seq, tabela, registro_id in alteracoes:
+        por_tabela.setdefault(tabela, set()).add(registro_id)
+    for tabela, ids in por_tabela.items():
+        if tabela not in _TABELAS:
+            continue
+        sql, classe = _TABELAS[tabela]
+        ids = list(ids)
+        lidos = {row[0]: classe(*row) for row in conn.execute(f"{sql} WHERE id IN ({marcadores(len(ids))})", ids)}
+        registros = _registros[tabela]
+        for registro_id in ids:
+            if registro_id in lidos:
+                registros[registro_id] = lidos[registro_id]
+            else:
+                registros.pop(registro_id, None)
+        _indices.pop(tabela, None)
+        perf.incrementar("referencias.linhas_relidas", len(ids))
+    _estado["seq"] = alteracoes[-1][0]
+
+
+def _atualizar():
+    """Garantir que o cache reflete o banco da conexão da thread atual"""
+    conn = get_connection()
+    with _lock:
+        if not _estado["carregado"]:
+            versao = conn.execute("PRAGMA data_version").fetchone()[0]
+            _carregar_tudo(conn)
+            _estado["carregado"] = True
+            _conexoes[id(conn)] = (versao, conn.total_changes, time.monotonic())
+            return
+
+        if conn.in_transaction:
+            # Alterações ainda não confirmadas (podem ser desfeitas) não entram no cache
+            return
+        versao, alteracoes, verificado_em = _conexoes.get(id(conn), (None, None, 0))
+        agora = time.monotonic()
+        if not _estado["forcar"] and conn.total_changes == alteracoes and agora - verificado_em < INTERVALO_VERIFICACAO:
+            return
+        versao_atual = conn.execute("PRAGMA data_version").fetchone()[0]
+        if _estado["forcar"] or conn.total_changes != alteracoes or versao_atual != versao:
+            _aplicar_alteracoes(conn)
+            _estado["forcar"] = False
+        _conexoes[id(conn)] = (versao_atual, conn.total_changes, agora)
+
+
+def _indice(tabela, nome, construir):
+    """Índice derivado da tabela (ex.: por nome), construído na primeira consulta após uma alteração"""
+    indices = _indices.setdefault(tabela, {})
+    if nome not in indices:
+        indices[nome] = construir(_registros[tabela].values())
+    return indices[nome]
+
+
+def _por_chave(chave):
+    """Construtor de índice chave(registro) -> registro; chaves repetidas: vale o de menor id"""
+    def construir(registros):
+        indice = {}
+        for registro in sorted(registros, key=lambda r: r.id):
+            indice.setdefault(chave(registro), registro)
+        return indice
+    return construir
+
+
+def _ordenados(registros, campo='nome'):
+    return sorted(registros, key=lambda r: ((getattr(r, campo) or "").casefold(), r.id))
+
+
+def clientes():
+    """Todos os clientes, por nome"""
+    _atualizar()
+    with _lock:
+        return _indice('clientes', 'ordenados', _ordenados)
+
+
+def cliente(cliente_id):
+    _atualizar()
+    with _lock:
+        return _registros['clientes'].get(cliente_id)
+
+
+def cliente_por_nome(nome):
+    _atualizar()
+    with _lock:
+        return _indice('clientes', 'por_nome', _por_chave(lambda c: c.nome)).get(nome)
+
+
+def produtos(tipo=None, ativos=True):
+    """Produtos (de um tipo ou de vários, ex.: ('Produto', 'Serviço')), por nome"""
+    _atualizar()
+    with _lock:
+        lista = _indice('produtos', 'ordenados', _ordenados)
+    tipos = (tipo,) if isinstance(tipo, str) else tipo
+    return [p for p in lista if (not tipos or p.tipo in tipos) and (not ativos or p.ativo)]
+
+
+def produto(produto_id):
+    _atualizar()
+    with _lock:
+        return _registros['produtos'].get(produto_id)
+
+
+def produto_por_nome(tipo, nome):
+    _atualizar()
+    with _lock:
+        return _indice('produtos', 'por_tipo_nome', _por_chave(lambda p: (p.tipo, p.nome))).get((tipo, nome))
+
+
+def usuario(usuario_id):
+    _atualizar()
+    with _lock:
+        return _registros['usuarios'].get(usuario_id)
+
+
+def tecnicos():
+    """Usuários com perfil Técnico, por nome completo"""
+    _atualizar()
+    with _lock:
+        return _indice('usuarios', 'tecnicos', lambda registros: _ordenados(
+            [u for u in registros if u.role == 'Técnico'], 'nome_completo'))
+
+
+def limpar():
+    """Descartar o cache (ex.: ao trocar de banco); a próxima consulta relê as tabelas"""
+    with _lock:
+        _registros.clear()
+        _indices.clear()
+        _conexoes.clear()
+        _estado.update(carregado=False, seq=0, forcar=False)
+
+
+def ao_evento(event_type, data=None):
+    """Listener de eventos da janela principal: verificar o registro na próxima consulta"""
+    if event_type in EVENTOS:
+        _estado["forcar"] = True
@@ -0,0 +1,117 @@
+"""
+Limpeza de texto para os geradores de PDF.
+
+As fontes padrão do fpdf não têm todos os caracteres; o texto é convertido
+para ASCII antes de ser escrito. A conversão usa uma tabela de str.translate
+montada uma vez (em vez de um str.replace por caractere a cada chamada),
+com caminho rápido para texto que já é ASCII e memória dos textos curtos
+(números, nomes, rótulos), que se repetem muito em um mesmo documento.
+"""
+from functools import lru_cache
+
+# Textos até este tamanho são memorizados (descrições longas raramente se repetem)
+TAMANHO_MAX_MEMO = 200
+ENTRADAS_MEMO = 4096
+
+TAB = '    '
+
+# Símbolos comuns aos dois geradores
+_SIMBOLOS = {
+    '…': '...',
+    '–': '-',
+    '—': '-',
+    '®': '(R)',
+    '©': '(C)',
+    '™': '(TM)',
+}
+
+_ACENTOS = {
+    'À': 'A', 'Á': 'A', 'Â': 'A', 'Ã': 'A', 'Ä': 'A',
+    'È': 'E', 'É': 'E', 'Ê': 'E', 'Ë': 'E',
+    'Ì': 'I', 'Í': 'I', 'Î': 'I', 'Ï': 'I',
+    'Ò': 'O', 'Ó': 'O', 'Ô': 'O', 'Õ': 'O', 'Ö': 'O',
+    'Ù': 'U', 'Ú': 'U', 'Û': 'U', 'Ü': 'U',
+    'à': 'a', 'á': 'a', 'â': 'a', 'ã': 'a', 'ä': 'a',
+    'è': 'e', 'é': 'e', 'ê': 'e', 'ë': 'e',
+    'ì': 'i', 'í': 'i', 'î': 'i', 'ï': 'i',
+    'ò': 'o', 'ó': 'o', 'ô': 'o', 'õ': 'o', 'ö': 'o',
+    'ù': 'u', 'ú': 'u', 'û': 'u', 'ü': 'u',
+}
+
+# Cotações: marcadores viram hífen, moedas viram sigla e o restante não ASCII é removido
+_COTACAO = {
+    **_SIMBOLOS,
+    '•': '- ', '●': '- ', '◦': '- ', '◆': '- ', '▪': '- ', '▫': '- ',
+    '★': '* ', '☆': '* ',
+    '°': ' graus',
+    '€': 'EUR', '£': 'GBP', '¥': 'JPY',
+    **_ACENTOS,
+    'Ç': 'C', 'Ñ': 'N', 'ç': 'c', 'ñ': 'n',
+}
+
+# Relatórios: acentos só são removidos no modo agressivo; o restante não ASCII vira '?'
+_RELATORIO = {
+    **_SIMBOLOS,
+    '°': 'o',
+    'ª': 'a',
+    'º': 'o',
+    'ç': 'c',
+    'Ç': 'C',
+}
+
+
+class _Tabela(dict):
+    """
+    Tabela para str.translate: caracteres sem entrada explícita são resolvidos
+    uma única vez (ASCII mantido, demais trocados por substituto) e guardados.
+    """
+
+    def __init__(self, nome, mapa, substituto):
+        super().__init__({ord(k): v for k, v in mapa.items()})
+        self[ord('\t')] = TAB
+        self.nome = nome
+        self.substituto = substituto
+
+    def __missing__(self, codigo):
+        valor = codigo if codigo < 128 else self.substituto
+        self[codigo] = valor
+        return valor
+
+
+TABELA_COTACAO = _Tabela("cotacao", _COTACAO, None)
+TABELA_RELATORIO = _Tabela("relatorio", _RELATORIO, '?')
+TABELA_RELATORIO_AGRESSIVA = _Tabela("relatorio_agressiva", {**_RELATORIO, **_ACENTOS}, '?')
+
+_TABELAS = {t.nome: t for t in (TABELA_COTACAO, TABELA_RELATORIO, TABELA_RELATORIO_AGRESSIVA)}
+
+
+def sanitizar(texto, tabela, memo=True):
+    """
+    Converter texto para ASCII com a tabela informada (None vira texto vazio).
+    memo=False não guarda o resultado (textos que não vão se repetir).
+    """
+    if texto is None:
+        return ""
+    if not isinstance(texto, str):
+        texto = str(texto)
+    # Caminho rápido: a maior parte do texto (números, códigos, datas) já é ASCII
+    if texto.isascii():
+        return texto.replace('\t', TAB) if '\t' in texto else texto
+    if memo and len(texto) <= TAMANHO_MAX_MEMO:
+        return _traduzir_memo(texto, tabela.nome)
+    return texto.translate(tabela)
+
+
+@lru_cache(maxsize=ENTRADAS_MEMO)
+def _traduzir_memo(texto, nome_tabela):
+    return texto.translate(_TABELAS[nome_tabela])
+
+
+def limpar_texto_cotacao(texto):
+    """Texto para o PDF de cotação (fonte padrão, sem acentos)"""
+    return sanitizar(texto, TABELA_COTACAO)
+
+
+def limpar_texto_relatorio(texto, agressivo=False):
+    """Texto para o PDF de relatório; agressivo remove também os acentos"""
+    return sanitizar(texto, TABELA_RELATORIO_AGRESSIVA if agressivo else TABELA_RELATORIO)